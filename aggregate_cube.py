@@ -0,0 +1,148 @@
+# aggregate_cube.py
+import weakref
+
+import numpy as np
+import pandas as pd
+
+# 数据立方体的维度与度量
+CUBE_DIMENSIONS = ['课题级别', '课题类型', '课题状态', '开始年份', '承担单位', '参与角色']
+CUBE_MEASURES = ['总预算', '外部专项经费', '院自筹经费', '所属单位自筹经费']
+# 课题数量作为度量时的名称
+COUNT_MEASURE = '课题数量'
+
+
+def _dimension_value(value):
+    if value is None or value != value:  # None 或 NaN
+        return ''
+    return str(value)
+
+
+def _measure_value(value):
+    try:
+        number = float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if number != number else number
+
+
+class AggregateCube:
+    """按 CUBE_DIMENSIONS 预先汇总的数据立方体
+
+    各维度的取值编码为整数 (类别编码)，每个维度组合 (单元格) 保存课题数量与各度量之和；
+    记录变更时只从原单元格减去该课题并加到新单元格，切片与下钻都只汇总单元格而不扫描数据行。
+    """
+
+    def __init__(self, df=None):
+        self.categories = {dim: [] for dim in CUBE_DIMENSIONS}  # 维度 -> 各编码对应的取值
+        self.codes = {dim: {} for dim in CUBE_DIMENSIONS}  # 维度 -> {取值: 编码}
+        self.cells = {}  # (各维度编码) -> [课题数量, 各度量之和]
+        self.records = {}  # 课题编号 -> (单元格, 度量元组)
+        self._frame = None  # 单元格的 DataFrame 形式，查询时生成，变更后失效
+        self._source_ref = None
+        if df is not None:
+            self.rebuild(df)
+
+    def _encode(self, dim, value):
+        codes = self.codes[dim]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self.categories[dim])
+            self.categories[dim].append(value)
+        return code
+
+    def rebuild(self, df):
+        """根据整个数据表重新汇总 (各维度用 pd.factorize 一次性编码，再按单元格 groupby)"""
+        self.categories = {dim: [] for dim in CUBE_DIMENSIONS}
+        self.codes = {dim: {} for dim in CUBE_DIMENSIONS}
+        self.cells.clear()
+        self.records.clear()
+        self._frame = None
+
+        codes = {}
+        for dim in CUBE_DIMENSIONS:
+            values = df[dim].map(_dimension_value) if dim in df.columns else pd.Series([''] * len(df))
+            dim_codes, uniques = pd.factorize(values, sort=False)
+            self.categories[dim] = list(uniques)
+            self.codes[dim] = {value: code for code, value in enumerate(uniques)}
+            codes[dim] = dim_codes
+        measures = np.column_stack([
+            pd.to_numeric(df[m], errors='coerce').fillna(0).to_numpy(dtype=float) if m in df.columns
+            else np.zeros(len(df)) for m in CUBE_MEASURES]) if len(df) else np.zeros((0, len(CUBE_MEASURES)))
+
+        keys = list(zip(*(codes[dim].tolist() for dim in CUBE_DIMENSIONS)))
+        for project_id, key, values in zip(df['课题编号'].astype(str), keys, measures.tolist()):
+            values = tuple(values)
+            self.records[project_id] = (key, values)
+            self._add(key, values, 1)
+        self.bind(df)
+
+    def bind(self, df):
+        self._source_ref = weakref.ref(df)
+
+    def is_bound_to(self, df):
+        return self._source_ref is not None and self._source_ref() is df and len(self.records) == len(df)
+
+    def _add(self, key, values, sign):
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = self.cells[key] = [0] + [0.0] * len(CUBE_MEASURES)
+        cell[0] += sign
+        for i, value in enumerate(values, 1):
+            cell[i] += sign * value
+        if cell[0] <= 0:
+            del self.cells[key]
+        self._frame = None
+
+    def update(self, project_id, record):
+        """新增或更新一个课题；record 为包含各维度与度量值的映射"""
+        project_id_str = str(project_id)
+        key = tuple(self._encode(dim, _dimension_value(record.get(dim))) for dim in CUBE_DIMENSIONS)
+        values = tuple(_measure_value(record.get(m)) for m in CUBE_MEASURES)
+        if self.records.get(project_id_str) == (key, values):
+            return
+        self.remove(project_id_str)
+        self.records[project_id_str] = (key, values)
+        self._add(key, values, 1)
+
+    def remove(self, project_id):
+        record = self.records.pop(str(project_id), None)
+        if record is not None:
+            self._add(record[0], record[1], -1)
+
+    def frame(self):
+        """全部单元格：各维度为类别编码列，另有 COUNT_MEASURE 与各度量列"""
+        if self._frame is None:
+            keys = list(self.cells)
+            data = np.array([self.cells[key] for key in keys], dtype=float).reshape(len(keys), 1 + len(CUBE_MEASURES))
+            frame = pd.DataFrame(np.array(keys, dtype=np.int64).reshape(len(keys), len(CUBE_DIMENSIONS)),
+                                 columns=CUBE_DIMENSIONS)
+            frame[COUNT_MEASURE] = data[:, 0].astype(np.int64)
+            for i, measure in enumerate(CUBE_MEASURES, 1):
+                frame[measure] = data[:, i]
+            self._frame = frame
+        return self._frame
+
+    def aggregate(self, dims, measure=COUNT_MEASURE, filters=None):
+        """按 dims 下钻汇总 measure，filters 为 {维度: 取值或取值集合} 的切片条件
+
+        单一维度返回按值降序排列的 Series (与 value_counts 相同)；多维度返回以最后一个维度为列、
+        其余维度为行的 DataFrame (与 groupby(...).size().unstack(fill_value=0) 相同)。
+        """
+        dims = list(dims)
+        frame = self.frame()
+        if filters:
+            mask = np.ones(len(frame), dtype=bool)
+            for dim, allowed in filters.items():
+                allowed = {allowed} if isinstance(allowed, str) else set(allowed)
+                allowed_codes = [self.codes[dim][v] for v in allowed if v in self.codes[dim]]
+                mask &= frame[dim].isin(allowed_codes).to_numpy()
+            frame = frame[mask]
+
+        result = frame.groupby(dims, sort=False)[measure].sum()
+        # 类别编码还原为取值
+        if len(dims) == 1:
+            result.index = pd.Index([self.categories[dims[0]][code] for code in result.index], name=dims[0])
+            return result.sort_values(ascending=False, kind='stable')
+        result.index = pd.MultiIndex.from_tuples(
+            [tuple(self.categories[dim][code] for dim, code in zip(dims, key)) for key in result.index], names=dims)
+        return result.sort_index().unstack(fill_value=0)
@@ -1,16 +1,319 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import seaborn as sns
-from wordcloud import WordCloud
+import base64
+import io
 import os
-import matplotlib
+import queue
+import subprocess
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from lazy_import import lazy_module
+
+
+def _configure_matplotlib(matplotlib):
+    """导入 matplotlib 后设置中文显示"""
+    # 设置matplotlib支持中文显示
+    matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'SimSun', 'Arial Unicode MS']
+    matplotlib.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
+
+
+# 绘图相关模块较重，首次打开分析窗口 (或后台预加载) 时才导入。
+# 图表在后台线程中绘制，只使用面向对象的 Figure 与 Agg 画布，不经过非线程安全的 pyplot
+pd = lazy_module('pandas')
+np = lazy_module('numpy')
+matplotlib = lazy_module('matplotlib', on_load=_configure_matplotlib)
+mpl_figure = lazy_module('matplotlib.figure')
+backend_agg = lazy_module('matplotlib.backends.backend_agg')
+wordcloud = lazy_module('wordcloud')
+PLOTTING_MODULES = [pd, np, matplotlib, mpl_figure, backend_agg, wordcloud]
+data_manager = lazy_module('data_manager')
+aggregate_cube = lazy_module('aggregate_cube')
+funding_timeline = lazy_module('funding_timeline')
+
+# 图表默认尺寸 (英寸) 与分辨率；绘图区域已显示时按其实际大小绘制
+DEFAULT_FIGSIZE = (8, 4)
+FIGURE_DPI = 100
+# 词云显示的词语数
+WORD_CLOUD_MAX_WORDS = 200
+
+# 词云可用的中文字体，按顺序查找
+_WINDOWS_FONTS_DIR = os.path.join(os.environ.get('WINDIR', 'C:\\Windows'), 'Fonts')
+CHINESE_FONT_CANDIDATES = [
+    os.path.join(_WINDOWS_FONTS_DIR, 'simhei.ttf'),  # 黑体
+    os.path.join(_WINDOWS_FONTS_DIR, 'msyh.ttc'),  # 微软雅黑
+    os.path.join(_WINDOWS_FONTS_DIR, 'simsun.ttc'),  # 宋体
+    '/System/Library/Fonts/PingFang.ttc',
+    '/System/Library/Fonts/STHeiti Light.ttc',
+    '/Library/Fonts/Arial Unicode.ttf',
+    '/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc',
+    '/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc',
+    '/usr/share/fonts/google-noto-cjk/NotoSansCJK-Regular.ttc',
+    '/usr/share/fonts/truetype/wqy/wqy-microhei.ttc',
+    '/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc',
+    '/usr/share/fonts/wqy-microhei/wqy-microhei.ttc',
+    '/usr/share/fonts/truetype/droid/DroidSansFallbackFull.ttf',
+]
+
+
+@lru_cache(maxsize=None)
+def resolve_chinese_font():
+    """查找系统中可用的中文字体文件 (结果缓存)：先检查常见路径，Linux 上再通过 fontconfig 查询，找不到时返回 None"""
+    for font in CHINESE_FONT_CANDIDATES:
+        if os.path.exists(font):
+            return font
+    if sys.platform.startswith('linux'):
+        try:
+            result = subprocess.run(['fc-match', '-f', '%{file}', ':lang=zh'],
+                                    capture_output=True, text=True, timeout=5)
+            font = result.stdout.strip()
+            if result.returncode == 0 and font and os.path.exists(font):
+                return font
+        except (OSError, subprocess.SubprocessError):
+            pass
+    print("警告: 未找到中文字体，词云中的中文可能无法正常显示。")
+    return None
+
+
+def load_plotting_stack():
+    """导入全部绘图模块"""
+    for module in PLOTTING_MODULES:
+        module.load()
+
+
+class LRUCache:
+    """容量有限、按最近使用淘汰的缓存"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+
+    def get(self, key, default=None):
+        if key not in self._items:
+            return default
+        self._items.move_to_end(key)
+        return self._items[key]
+
+    def put(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def clear(self):
+        self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+# 聚合结果与已渲染图表图像的缓存，键中包含数据版本；数据变化时整体失效
+_aggregate_cache = LRUCache(64)
+_figure_cache = LRUCache(8)
+_cache_data_version = None
+
+
+def data_version(df):
+    """数据版本：数据表对象、行数与数据层的变更计数，任一变化都视为新数据"""
+    return id(df), len(df), data_manager.change_journal.version
+
+
+def _check_cache_version(version):
+    """数据版本变化时清空聚合与图表缓存"""
+    global _cache_data_version
+    if version != _cache_data_version:
+        _aggregate_cache.clear()
+        _figure_cache.clear()
+        _cache_data_version = version
+
+
+def new_figure(figsize):
+    """创建未关联 pyplot 的 Figure 及其 Agg 画布"""
+    fig = mpl_figure.Figure(figsize=figsize, dpi=FIGURE_DPI)
+    backend_agg.FigureCanvasAgg(fig)
+    return fig
+
+
+def render_png(fig):
+    """用 Agg 将图表栅格化为 PNG 数据"""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=FIGURE_DPI)
+    return buffer.getvalue()
+
+
+def build_pie_figure(figsize, counts, dim, measure='课题数量'):
+    fig = new_figure(figsize)
+    ax = fig.add_subplot()
+    counts = counts[counts > 0]  # 经费合计可能为 0，饼状图只显示正值
+    ax.pie(counts.to_numpy(), labels=[str(v) for v in counts.index], autopct='%1.1f%%', startangle=90)
+    ax.axis('equal')
+    ax.set_title(f"{dim} 分布" if measure == '课题数量' else f"{dim} {measure}分布")
+    return fig
+
+
+def build_bar_figure(figsize, counts, dims, measure='课题数量'):
+    """单一维度为普通柱状图；多维度时 counts 为交叉表，各列并排显示 (分组柱状图)"""
+    fig = new_figure(figsize)
+    ax = fig.add_subplot()
+    labels = [str(v) for v in counts.index]
+    positions = np.arange(len(labels))
+    if len(dims) > 1:
+        width = 0.8 / max(1, len(counts.columns))
+        for i, column in enumerate(counts.columns):
+            name = " | ".join(map(str, column)) if isinstance(column, tuple) else str(column)
+            ax.bar(positions - 0.4 + width * (i + 0.5), counts[column].to_numpy(), width, label=name)
+        ax.set_title("多维度课题分布")
+        ax.legend(title=" | ".join(dims[1:]), bbox_to_anchor=(1.05, 1), loc='upper left')
+    else:
+        ax.bar(positions, counts.to_numpy())
+        ax.set_title(f"{dims[0]} 课题分布")
+    ax.set_xticks(positions)
+    ax.set_xticklabels(labels, rotation=90)
+    ax.set_xlabel(dims[0])
+    ax.set_ylabel("数量" if measure == '课题数量' else measure)
+    fig.tight_layout()
+    return fig
+
+
+def build_word_cloud_figure(figsize, frequencies, font_path):
+    """按词频 {词语: 次数} 绘制词云"""
+    wc = wordcloud.WordCloud(
+        width=800,
+        height=400,
+        background_color='white',
+        font_path=font_path,  # 使用找到的中文字体
+        max_words=WORD_CLOUD_MAX_WORDS,
+        max_font_size=100,
+        random_state=42
+    ).generate_from_frequencies(frequencies)
+
+    fig = new_figure(figsize)
+    ax = fig.add_subplot()
+    ax.imshow(wc.to_array(), interpolation='bilinear')
+    ax.axis('off')
+    ax.set_title("课题名称词云")
+    return fig
+
+
+def build_trend_figure(figsize, counts, dim, measure='课题数量'):
+    fig = new_figure(figsize)
+    ax = fig.add_subplot()
+    ax.plot([str(v) for v in counts.index], counts.to_numpy(), marker='o')
+    ax.set_xlabel(dim)
+    ax.set_ylabel(measure)
+    ax.set_title(f"{measure}随{dim}趋势")
+    ax.grid(True)
+    return fig
+
+
+def build_funding_timeline_figure(figsize, yearly, monthly, group, measure):
+    """上方为按年汇总的经费柱状图 (按分组堆叠)，下方为各分组按月分摊的经费曲线"""
+    fig = new_figure(figsize)
+    ax_year, ax_month = fig.subplots(2, 1)
+    names = [str(column) or '未填写' for column in monthly.columns]
+    bottom = np.zeros(len(yearly))
+    positions = np.arange(len(yearly))
+    for column, name in zip(yearly.columns, names):
+        values = yearly[column].to_numpy()
+        ax_year.bar(positions, values, bottom=bottom, label=name)
+        bottom += values
+    ax_year.set_xticks(positions)
+    ax_year.set_xticklabels([str(year) for year in yearly.index])
+    ax_year.set_ylabel(measure)
+    ax_year.set_title(f"{measure}按年分布 (按{group})")
+    ax_year.legend(bbox_to_anchor=(1.02, 1), loc='upper left', fontsize='small')
+
+    for column, name in zip(monthly.columns, names):
+        ax_month.plot(monthly.index.to_pydatetime(), monthly[column].to_numpy(), label=name)
+    ax_month.set_xlabel("月份")
+    ax_month.set_ylabel(f"{measure} / 月")
+    ax_month.grid(True)
+    fig.tight_layout()
+    return fig
+
+
+class ChartRenderer:
+    """在单个后台线程中构建并用 Agg 栅格化图表，只把 PNG 数据交给 Tk 主线程
+
+    每次 submit 都会取消尚未完成的旧请求：排队中的旧请求不再执行，正在执行的旧请求在各阶段之间检查
+    取消标记，其结果到达主线程时也会被丢弃。on_progress(说明) 与 on_done(PNG 数据, 状态文本) 在主线程中调用。
+    """
+
+    def __init__(self, widget, on_done, on_progress=None, on_error=None, poll_ms=50):
+        self.widget = widget
+        self.on_done = on_done
+        self.on_progress = on_progress
+        self.on_error = on_error
+        self.poll_ms = poll_ms
+        self.generation = 0
+        self.queue = queue.Queue()
+        self._cancelled = None
+        self._polling = False
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='chart-render')
+
+    @property
+    def busy(self):
+        return self._cancelled is not None
+
+    def submit(self, build, *args, status=''):
+        """请求绘制 build(*args) 返回的 Figure，返回本次请求的编号"""
+        self.cancel()
+        self.generation += 1
+        self._cancelled = threading.Event()
+        self._executor.submit(self._run, self.generation, self._cancelled, build, args, status)
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.poll_ms, self._poll)
+        return self.generation
+
+    def cancel(self):
+        if self._cancelled is not None:
+            self._cancelled.set()
+            self._cancelled = None
+
+    def shutdown(self):
+        self.cancel()
+        self._executor.shutdown(wait=False)
+
+    def _run(self, generation, cancelled, build, args, status):
+        try:
+            if cancelled.is_set():
+                return
+            self.queue.put((generation, 'progress', "正在绘制图表..."))
+            fig = build(*args)
+            if cancelled.is_set():
+                return
+            self.queue.put((generation, 'progress', "正在渲染图像..."))
+            png = render_png(fig)
+            if cancelled.is_set():
+                return
+            self.queue.put((generation, 'done', (png, status)))
+        except Exception as e:
+            self.queue.put((generation, 'error', e))
 
-# 设置matplotlib支持中文显示
-matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'SimSun', 'Arial Unicode MS']
-matplotlib.rcParams['axes.unicode_minus'] = False  # 解决负号显示问题
+    def _poll(self):
+        while True:
+            try:
+                generation, kind, payload = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self.generation or self._cancelled is None:
+                continue  # 已被新请求取代
+            if kind == 'progress' and self.on_progress:
+                self.on_progress(payload)
+            elif kind == 'done':
+                self._cancelled = None
+                self.on_done(*payload)
+            elif kind == 'error':
+                self._cancelled = None
+                if self.on_error:
+                    self.on_error(payload)
+        if self.busy:
+            self.widget.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
 
 
 class AnalysisDialog(tk.Toplevel):
@@ -23,13 +326,24 @@ class AnalysisDialog(tk.Toplevel):
         self.projects_df = projects_df
         self.display_columns = display_columns
         self.selected_dimensions = []
+        self._photo = None
+        self._figure_key = None
 
         self.main_frame = ttk.Frame(self, padding="10")
         self.main_frame.pack(fill=tk.BOTH, expand=True)
 
+        # 已在后台预加载时立即返回
+        load_plotting_stack()
         self.setup_widgets()
+        self.renderer = ChartRenderer(self, on_done=self._on_render_done, on_progress=self.status_var.set,
+                                      on_error=self._on_render_error)
+        self.protocol("WM_DELETE_WINDOW", self.destroy)
         self.grab_set()
 
+    def destroy(self):
+        self.renderer.shutdown()
+        super().destroy()
+
     def setup_widgets(self):
         # Dimension selection frame
         dim_frame = ttk.LabelFrame(self.main_frame, text="选择分析维度", padding="10")
@@ -53,20 +367,30 @@ class AnalysisDialog(tk.Toplevel):
         vis_frame.pack(fill=tk.X, pady=5)
 
         self.vis_type = tk.StringVar(value="饼状图")
-        vis_types = ["饼状图", "柱状图", "词云", "趋势图"]
+        vis_types = ["饼状图", "柱状图", "词云", "趋势图", "经费时间分布"]
         ttk.Label(vis_frame, text="可视化类型:").pack(side=tk.LEFT, padx=5)
         ttk.Combobox(vis_frame, textvariable=self.vis_type, values=vis_types, state="readonly").pack(side=tk.LEFT,
                                                                                                      padx=5)
 
+        # 统计指标：课题数量或各项经费合计
+        self.measure = tk.StringVar(value=aggregate_cube.COUNT_MEASURE)
+        ttk.Label(vis_frame, text="统计指标:").pack(side=tk.LEFT, padx=5)
+        ttk.Combobox(vis_frame, textvariable=self.measure, state="readonly",
+                     values=[aggregate_cube.COUNT_MEASURE] + aggregate_cube.CUBE_MEASURES).pack(side=tk.LEFT, padx=5)
+
         ttk.Button(vis_frame, text="生成可视化", command=self.generate_visualization).pack(side=tk.LEFT, padx=10)
 
         # Plot display frame
         self.plot_frame = ttk.Frame(self.main_frame)
         self.plot_frame.pack(fill=tk.BOTH, expand=True, pady=10)
 
-        # Status bar
+        # Status bar: 后台绘制图表时显示进度
+        status_frame = ttk.Frame(self.main_frame)
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X)
         self.status_var = tk.StringVar(value="就绪")
-        ttk.Label(self.main_frame, textvariable=self.status_var, relief=tk.SUNKEN).pack(side=tk.BOTTOM, fill=tk.X)
+        ttk.Label(status_frame, textvariable=self.status_var, relief=tk.SUNKEN).pack(side=tk.LEFT, fill=tk.X,
+                                                                                    expand=True)
+        self.progress = ttk.Progressbar(status_frame, mode='indeterminate', length=120)
 
     def add_dimensions(self):
         selected_indices = self.dim_listbox.curselection()
@@ -83,10 +407,16 @@ class AnalysisDialog(tk.Toplevel):
             return
 
         vis_type = self.vis_type.get()
-
-        # Clear previous plot
-        for widget in self.plot_frame.winfo_children():
-            widget.destroy()
+        # 同一数据版本、图表类型、维度与尺寸下直接复用已渲染的图像
+        version = data_version(self.projects_df)
+        _check_cache_version(version)
+        self._figure_key = (vis_type, tuple(self.selected_dimensions), self.measure.get(), self.figure_size(), version)
+        cached = _figure_cache.get(self._figure_key)
+        if cached is not None:
+            self.renderer.cancel()
+            self._set_busy(False)
+            self.show_image(*cached)
+            return
 
         try:
             if vis_type == "饼状图":
@@ -97,91 +427,104 @@ class AnalysisDialog(tk.Toplevel):
                 self.create_word_cloud()
             elif vis_type == "趋势图":
                 self.create_trend_chart()
+            elif vis_type == "经费时间分布":
+                self.create_funding_timeline()
         except Exception as e:
             messagebox.showerror("错误", f"生成可视化失败: {e}", parent=self)
             self.status_var.set("生成可视化失败")
 
+    def figure_size(self):
+        """按绘图区域当前大小 (英寸) 绘制；窗口尚未显示时使用默认尺寸"""
+        width, height = self.plot_frame.winfo_width(), self.plot_frame.winfo_height()
+        if width < 100 or height < 100:
+            return DEFAULT_FIGSIZE
+        return round(width / FIGURE_DPI, 1), round(height / FIGURE_DPI, 1)
+
+    def render(self, build, *args, status=''):
+        """在后台线程中绘制 build(尺寸, *args) 返回的图表，较早的未完成请求会被取消"""
+        self._set_busy(True)
+        self.status_var.set("正在准备数据...")
+        self.renderer.submit(build, self.figure_size(), *args, status=status)
+
+    def _set_busy(self, busy):
+        if busy:
+            self.progress.pack(side=tk.RIGHT, padx=5)
+            self.progress.start(10)
+        else:
+            self.progress.stop()
+            self.progress.pack_forget()
+
+    def _on_render_done(self, png, status):
+        self._set_busy(False)
+        if self._figure_key is not None:
+            _figure_cache.put(self._figure_key, (png, status))
+        self.show_image(png, status)
+
+    def _on_render_error(self, error):
+        self._set_busy(False)
+        messagebox.showerror("错误", f"生成可视化失败: {error}", parent=self)
+        self.status_var.set("生成可视化失败")
+
+    def show_image(self, png, status):
+        """在绘图区域显示渲染好的图像"""
+        for widget in self.plot_frame.winfo_children():
+            widget.destroy()
+        self._photo = tk.PhotoImage(master=self, data=base64.b64encode(png).decode('ascii'))
+        ttk.Label(self.plot_frame, image=self._photo, anchor=tk.CENTER).pack(fill=tk.BOTH, expand=True)
+        self.status_var.set(status)
+
+    def get_counts(self, dims, measure=None):
+        """各维度取值的课题数量或经费合计：单一维度为降序排列的 Series，多维度为展开的交叉表
+
+        维度均属于数据立方体时直接从立方体汇总，否则对数据表 groupby。
+        结果按 (维度, 指标, 数据版本) 缓存，饼状图、柱状图与趋势图之间切换时复用同一聚合。
+        """
+        measure = measure or self.measure.get()
+        version = data_version(self.projects_df)
+        _check_cache_version(version)
+        key = ('counts', tuple(dims), measure, version)
+        counts = _aggregate_cache.get(key)
+        if counts is None:
+            if all(dim in aggregate_cube.CUBE_DIMENSIONS for dim in dims):
+                counts = data_manager.get_aggregate_cube(self.projects_df).aggregate(dims, measure)
+            elif measure == aggregate_cube.COUNT_MEASURE:
+                if len(dims) == 1:
+                    counts = self.projects_df[dims[0]].value_counts()
+                else:
+                    counts = self.projects_df.groupby(list(dims)).size().unstack(fill_value=0)
+            else:
+                values = pd.to_numeric(self.projects_df[measure], errors='coerce').fillna(0)
+                sums = values.groupby([self.projects_df[dim] for dim in dims]).sum()
+                counts = sums.sort_values(ascending=False) if len(dims) == 1 else sums.unstack(fill_value=0)
+            _aggregate_cache.put(key, counts)
+        return counts
+
     def create_pie_chart(self):
         if len(self.selected_dimensions) > 1:
             messagebox.showwarning("警告", "饼状图仅支持单一维度分析", parent=self)
             return
 
         dim = self.selected_dimensions[0]
-        counts = self.projects_df[dim].value_counts()
-
-        fig, ax = plt.subplots(figsize=(6, 4))
-        ax.pie(counts, labels=counts.index, autopct='%1.1f%%', startangle=90)
-        ax.axis('equal')
-        plt.title(f"{dim} 分布")
-
-        self.embed_plot(fig)
-        self.status_var.set(f"已生成 {dim} 的饼状图")
+        counts = self.get_counts([dim])
+        self.render(build_pie_figure, counts, dim, self.measure.get(), status=f"已生成 {dim} 的饼状图")
 
     def create_bar_chart(self):
-        dim = self.selected_dimensions[0]
-        if len(self.selected_dimensions) > 1:
-            # For multiple dimensions, use groupby
-            group_cols = self.selected_dimensions
-            counts = self.projects_df.groupby(group_cols).size().unstack(fill_value=0)
-
-            fig, ax = plt.subplots(figsize=(8, 5))
-            counts.plot(kind='bar', stacked=False, ax=ax)
-            ax.set_xlabel(group_cols[0])
-            ax.set_ylabel("数量")
-            ax.set_title("多维度课题分布")
-            ax.legend(title=" | ".join(group_cols[1:]), bbox_to_anchor=(1.05, 1), loc='upper left')
-            plt.tight_layout()
-        else:
-            counts = self.projects_df[dim].value_counts()
-            fig, ax = plt.subplots(figsize=(6, 4))
-            counts.plot(kind='bar', ax=ax)
-            ax.set_xlabel(dim)
-            ax.set_ylabel("数量")
-            ax.set_title(f"{dim} 课题分布")
-
-        self.embed_plot(fig)
-        self.status_var.set(f"已生成 {', '.join(self.selected_dimensions)} 的柱状图")
+        dims = list(self.selected_dimensions)
+        counts = self.get_counts(dims)
+        self.render(build_bar_figure, counts, dims, self.measure.get(), status=f"已生成 {', '.join(dims)} 的柱状图")
 
     def create_word_cloud(self):
         if len(self.selected_dimensions) != 1 or self.selected_dimensions[0] != "课题名称":
             messagebox.showwarning("警告", "词云仅支持‘课题名称’维度", parent=self)
             return
 
-        text = " ".join(self.projects_df["课题名称"].dropna().astype(str))
-        if not text.strip():
+        # 词频按课题增量维护，记录变更后无需重新切分全部课题名称
+        frequencies = dict(data_manager.get_title_terms(self.projects_df).most_common(WORD_CLOUD_MAX_WORDS))
+        if not frequencies:
             messagebox.showwarning("警告", "课题名称数据为空，无法生成词云", parent=self)
             return
 
-        # 尝试查找系统中可用的中文字体
-        font_path = None
-        possible_fonts = [
-            "C:\\Windows\\Fonts\\simhei.ttf",  # 黑体
-            "C:\\Windows\\Fonts\\msyh.ttc",   # 微软雅黑
-            "C:\\Windows\\Fonts\\simsun.ttc"  # 宋体
-        ]
-        
-        for font in possible_fonts:
-            if os.path.exists(font):
-                font_path = font
-                break
-                
-        wordcloud = WordCloud(
-            width=800, 
-            height=400, 
-            background_color='white', 
-            font_path=font_path,  # 使用找到的中文字体
-            max_words=200,
-            max_font_size=100,
-            random_state=42
-        ).generate(text)
-
-        fig, ax = plt.subplots(figsize=(8, 4))
-        ax.imshow(wordcloud, interpolation='bilinear')
-        ax.axis('off')
-        plt.title("课题名称词云")
-
-        self.embed_plot(fig)
-        self.status_var.set("已生成课题名称词云")
+        self.render(build_word_cloud_figure, frequencies, resolve_chinese_font(), status="已生成课题名称词云")
 
     def create_trend_chart(self):
         if len(self.selected_dimensions) != 1:
@@ -192,26 +535,34 @@ class AnalysisDialog(tk.Toplevel):
         # 检查所选维度是否可以作为趋势图的数据
         if pd.api.types.is_numeric_dtype(self.projects_df[dim]) or dim in ["开始年份", "开始日期", "计划结束日期", "实际结题时间"]:
             # 对于日期或年份类型的数据，使用value_counts并排序
-            counts = self.projects_df[dim].value_counts().sort_index()
+            counts = self.get_counts([dim]).sort_index()
             if counts.empty:
                 messagebox.showwarning("警告", f"{dim}数据为空，无法生成趋势图", parent=self)
                 return
-
-            fig, ax = plt.subplots(figsize=(8, 4))
-            counts.plot(kind='line', marker='o', ax=ax)
-            ax.set_xlabel(dim)
-            ax.set_ylabel("课题数量")
-            ax.set_title(f"课题数量随{dim}趋势")
-            ax.grid(True)
-
-            self.embed_plot(fig)
-            self.status_var.set(f"已生成{dim}趋势图")
+            self.render(build_trend_figure, counts, dim, self.measure.get(), status=f"已生成{dim}趋势图")
         else:
             messagebox.showwarning("警告", f"{dim}不适合生成趋势图，请选择日期或数值类型的维度", parent=self)
             return
 
-    def embed_plot(self, fig):
-        canvas = FigureCanvasTkAgg(fig, master=self.plot_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-        plt.close(fig)  # Close to free memory
\ No newline at end of file
+    def create_funding_timeline(self):
+        """按开始日期至实际结束日期 (考虑延期与结题) 逐月分摊经费，按所选维度 (默认承担单位) 分组显示"""
+        dims = self.selected_dimensions
+        group = dims[0] if len(dims) == 1 and dims[0] in aggregate_cube.CUBE_DIMENSIONS else '承担单位'
+        measure = self.measure.get()
+        if measure not in aggregate_cube.CUBE_MEASURES:
+            measure = '总预算'
+
+        version = data_version(self.projects_df)
+        _check_cache_version(version)
+        key = ('timeline', group, measure, version)
+        timeline = _aggregate_cache.get(key)
+        if timeline is None:
+            monthly = funding_timeline.top_groups(funding_timeline.monthly_funding(self.projects_df, measure, by=group))
+            timeline = (funding_timeline.yearly_funding(monthly), monthly)
+            _aggregate_cache.put(key, timeline)
+        yearly, monthly = timeline
+        if monthly.empty:
+            messagebox.showwarning("警告", "没有同时填写开始日期与经费的课题，无法生成经费时间分布", parent=self)
+            return
+        self.render(build_funding_timeline_figure, yearly, monthly, group, measure,
+                    status=f"已生成按{group}的{measure}时间分布")
@@ -0,0 +1,127 @@
+# background_loader.py
+import queue
+import threading
+
+from config import EXCEL_COLUMNS
+from table_view import build_display_rows
+
+
+class BackgroundLoader:
+    """在工作线程中加载课题数据，通过线程安全队列把进度和结果交给 Tk 主线程
+
+    主线程用 root.after 轮询队列：解析 Excel 时每解析一块即回调 on_rows，使各行在解析完成前逐步显示；
+    数据表读取完成后回调 on_table(df, rows_ready)，rows_ready 为 False 时 (从缓存或数据库读取) 随后再按块回调 on_rows。
+    最后在后台检查课题文件夹并回调 on_done(folder_cache)；任一步骤出错时改为回调 on_error(异常)，不再回调 on_done。
+    """
+
+    def __init__(self, root, on_table=None, on_rows=None, on_progress=None, on_done=None, on_error=None,
+                 chunk_size=500, poll_ms=50, columns=EXCEL_COLUMNS):
+        self.root = root
+        self.on_table = on_table
+        self.on_rows = on_rows
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_error = on_error
+        self.chunk_size = chunk_size
+        self.poll_ms = poll_ms
+        self.columns = columns
+        self.queue = queue.Queue()
+        self.finished = False
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._worker, name='project-loader', daemon=True)
+        self._thread.start()
+        self.root.after(self.poll_ms, self._poll)
+
+    def _worker(self):
+        try:
+            self.queue.put(('progress', "正在读取课题数据..."))
+            # 数据层 (及 pandas) 在工作线程中导入，不占用主线程启动时间
+            from data_manager import load_projects_table, verify_project_folders
+            from storage import normalize_projects_df
+            streamed = [0]
+
+            def on_chunk(raw_chunk):
+                # 只为显示规范化这一块，整表在解析完成后统一规范化，结果相同
+                chunk, _ = normalize_projects_df(raw_chunk.copy(), warn=False, first_number=streamed[0] + 1)
+                self.queue.put(('rows', chunk['课题编号'].astype(str).tolist(), build_display_rows(chunk, self.columns)))
+                streamed[0] += len(chunk)
+                self.queue.put(('progress', f"已解析 {streamed[0]} 条课题数据..."))
+
+            df, missing_cols_added = load_projects_table(on_chunk)
+            rows_ready = streamed[0] == len(df) and streamed[0] > 0
+            self.queue.put(('table', df, rows_ready))
+            self.queue.put(('progress', f"已加载 {len(df)} 条课题数据"))
+
+            if not rows_ready:
+                ids = df['课题编号'].astype(str).tolist()
+                for start in range(0, len(df), self.chunk_size):
+                    chunk = df.iloc[start:start + self.chunk_size]
+                    self.queue.put(('rows', ids[start:start + self.chunk_size], build_display_rows(chunk, self.columns)))
+
+            def report(done, total):
+                self.queue.put(('progress', f"正在检查课题文件夹 {done}/{total}"))
+
+            folder_cache = verify_project_folders(df, progress=report)
+            if missing_cols_added:
+                self.queue.put(('progress', "提示：由于添加了缺失列，建议检查数据并保存。"))
+            self.queue.put(('done', folder_cache))
+        except Exception as e:
+            print(f"后台加载课题数据时发生错误: {e}")
+            self.queue.put(('error', e))
+
+    def _poll(self):
+        """在 Tk 主线程中处理队列中的消息，每次最多处理一部分以保持界面响应"""
+        for _ in range(20):
+            try:
+                message = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            kind, *payload = message
+            if kind == 'table' and self.on_table:
+                self.on_table(*payload)
+            elif kind == 'rows' and self.on_rows:
+                self.on_rows(*payload)
+            elif kind == 'progress' and self.on_progress:
+                self.on_progress(*payload)
+            elif kind == 'done':
+                self.finished = True
+                if self.on_done:
+                    self.on_done(*payload)
+            elif kind == 'error':
+                self.finished = True
+                if self.on_error:
+                    self.on_error(*payload)
+                elif self.on_progress:
+                    self.on_progress(f"加载失败: {payload[0]}")
+        if not self.finished:
+            self.root.after(self.poll_ms, self._poll)
+
+
+def run_in_background(root, func, on_done=None, on_error=None, poll_ms=50):
+    """在工作线程中执行 func()，完成后在 Tk 主线程中回调 on_done(结果) 或 on_error(异常)"""
+    results = queue.Queue(maxsize=1)
+
+    def worker():
+        try:
+            results.put(('done', func()))
+        except Exception as e:
+            results.put(('error', e))
+
+    def poll():
+        try:
+            kind, payload = results.get_nowait()
+        except queue.Empty:
+            root.after(poll_ms, poll)
+            return
+        if kind == 'done' and on_done:
+            on_done(payload)
+        elif kind == 'error':
+            if on_error:
+                on_error(payload)
+            else:
+                print(f"后台任务执行失败: {payload}")
+
+    threading.Thread(target=worker, name='background-task', daemon=True).start()
+    root.after(poll_ms, poll)
@@ -0,0 +1,303 @@
+# benchmark.py
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+# 默认的数据规模 (课题数) 与每项测试的重复次数
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_REPEAT = 3
+# 与基准结果比较时，中位数耗时增加超过此比例视为性能回退
+REGRESSION_THRESHOLD = 0.2
+# 每次 create_project_folders 测试新建的课题文件夹数
+CREATE_FOLDER_BATCH = 100
+# find_project / search_projects 测试的查询词
+FIND_QUERIES = ['监测', '隧道', '基坑', '风险评估', '数值模拟', '智能', '边坡', '勘察']
+SEARCH_QUERIES = ['地下空间 监测', '课题负责人:王', '承担单位:西勘院 隧道', '智能*']
+
+_PLACES = ['城市', '地下空间', '轨道交通', '深大基坑', '山区隧道', '高陡边坡', '黄土地区', '软土地基', '岩溶地区', '城市更新']
+_TOPICS = ['安全监测', '工程勘察', '数值模拟', '风险评估', '智能预警', '变形控制', '地质灾害防治', '绿色施工', '数字孪生', '病害诊断']
+_SUFFIXES = ['技术研究', '关键技术研究', '方法研究', '示范应用', '体系构建', '装备研发']
+_SURNAMES = '王李张刘陈杨赵黄周吴徐孙胡朱高林何郭马罗'
+_GIVEN = '伟芳娜敏静丽强磊军洋勇艳杰涛明超秀霞平刚'
+_ADMIN_UNITS = ['科技发展部', '技术中心', '生产经营部', '研究院']
+
+
+def _person(rng):
+    return rng.choice(_SURNAMES) + ''.join(rng.choice(_GIVEN) for _ in range(rng.randint(1, 2)))
+
+
+def generate_projects(rows, seed=0):
+    """生成 rows 条取值接近真实数据的课题记录 (按 EXCEL_COLUMNS)，相同 seed 生成相同数据"""
+    import pandas as pd
+    from config import EXCEL_COLUMNS, PROJECT_TYPES, PROJECT_LEVELS, PROJECT_STATUSES, PROJECT_CHARACTER, PROJECT_AUTHOR
+
+    rng = random.Random(seed)
+    records = []
+    for i in range(rows):
+        start = date(2015, 1, 1) + timedelta(days=rng.randrange(3650))
+        end = start + timedelta(days=rng.randrange(365, 1460))
+        status = rng.choice(PROJECT_STATUSES)
+        external = round(rng.uniform(0, 500), 2) if rng.random() < 0.6 else 0.0
+        records.append({
+            '序号': i + 1,
+            '归口单位': rng.choice(_ADMIN_UNITS),
+            '承担单位': rng.choice(PROJECT_AUTHOR),
+            '课题名称': rng.choice(_PLACES) + rng.choice(_TOPICS) + rng.choice(_SUFFIXES),
+            '课题级别': rng.choice(PROJECT_LEVELS),
+            '课题类型': rng.choice(PROJECT_TYPES),
+            '开始年份': start.year,
+            '参与角色': rng.choice(PROJECT_CHARACTER),
+            '课题状态': status,
+            '课题编号': f"KT{start.year}-{i:06d}",
+            '课题联系人': _person(rng),
+            '课题负责人': _person(rng),
+            '开始日期': start.isoformat(),
+            '计划结束日期': end.isoformat(),
+            '延期时间': (end + timedelta(days=rng.randrange(90, 365))).isoformat() if status == '延期' else '',
+            '实际结题时间': (end - timedelta(days=rng.randrange(0, 90))).isoformat() if status == '已结题' else '',
+            '总预算': 0.0,
+            '外部专项经费': external,
+            '院自筹经费': round(rng.uniform(0, 100), 2),
+            '所属单位自筹经费': round(rng.uniform(0, 50), 2),
+        })
+    df = pd.DataFrame(records, columns=EXCEL_COLUMNS)
+    df['总预算'] = df['外部专项经费'] + df['院自筹经费'] + df['所属单位自筹经费']
+    return df
+
+
+def write_workbook(df):
+    """将生成的课题写入当前目录下的 Excel 总表"""
+    from config import EXCEL_FILE, SHEET_NAME
+    df.to_excel(EXCEL_FILE, sheet_name=SHEET_NAME, index=False)
+
+
+def generate_folder_tree(df, limit=None):
+    """按命名规则为前 limit 个课题直接创建文件夹结构 (不经过 file_manager，不计入测试耗时)"""
+    import file_manager
+    from config import PROJECTS_ROOT_DIR
+
+    created = 0
+    for project_id, name, status, year in zip(df['课题编号'], df['课题名称'], df['课题状态'], df['开始年份']):
+        if limit is not None and created >= limit:
+            break
+        folder_name = file_manager.build_project_folder_name(
+            project_id, name, file_manager.normalize_folder_status(status), year)
+        for path in file_manager.get_structure_paths(os.path.join(PROJECTS_ROOT_DIR, folder_name)):
+            os.makedirs(path, exist_ok=True)
+        created += 1
+    return created
+
+
+def _stats(name, rows, runs, ops=1, **extra):
+    return dict({'rows': rows, 'name': name, 'ops': ops, 'runs': runs, 'min': min(runs),
+                 'median': statistics.median(runs), 'mean': statistics.fmean(runs)}, **extra)
+
+
+def timed(name, rows, func, repeat, setup=None, ops=1, **extra):
+    """调用 func repeat 次 (每次之前调用 setup，不计时)，库函数的输出被丢弃，返回耗时统计"""
+    runs = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            func()
+            runs.append(time.perf_counter() - started)
+    return _stats(name, rows, runs, ops, **extra)
+
+
+def _remove(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def run_worker(rows, repeat, max_folders, seed):
+    """在当前目录 (临时目录) 中生成数据并测试各入口，返回结果列表；需在导入 config 之前切换到该目录"""
+    import data_manager
+    import file_manager
+    from config import DATA_CACHE_FILE, FOLDER_STATE_FILE
+
+    results = []
+    started = time.perf_counter()
+    df = generate_projects(rows, seed)
+    write_workbook(df)
+    folders = generate_folder_tree(df, max_folders)
+    results.append(_stats('generate', rows, [time.perf_counter() - started], folders=folders, setup=True))
+
+    results.append(timed('load_projects_table.cold', rows, data_manager.load_projects_table, repeat,
+                         setup=lambda: _remove(DATA_CACHE_FILE)))
+    results.append(timed('load_projects_table.warm', rows, data_manager.load_projects_table, repeat))
+    # 冷启动：数据缓存与文件夹状态缓存都不存在
+    results.append(timed('load_projects_data.cold', rows, data_manager.load_projects_data, repeat,
+                         setup=lambda: (_remove(DATA_CACHE_FILE), _remove(FOLDER_STATE_FILE))))
+    results.append(timed('load_projects_data.warm', rows, data_manager.load_projects_data, repeat))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        df, _ = data_manager.load_projects_table()
+    results.append(timed('save_projects_data', rows, lambda: data_manager.save_projects_data(df), repeat))
+
+    # 第一次查询包含建立全文索引的时间
+    results.append(timed('find_project', rows, lambda: [data_manager.find_project(df, q) for q in FIND_QUERIES],
+                         repeat, ops=len(FIND_QUERIES)))
+    results.append(timed('search_projects', rows,
+                         lambda: [data_manager.search_projects(df, q) for q in SEARCH_QUERIES],
+                         repeat, ops=len(SEARCH_QUERIES)))
+
+    rng = random.Random(seed)
+    targets = [rng.choice(df['课题编号'].tolist()) for _ in range(100)]
+
+    def update_many():
+        for project_id in targets:
+            data_manager.update_project_record(df, project_id, {'课题联系人': _person(rng), '院自筹经费': '12.5'})
+    results.append(timed('update_project_record', rows, update_many, repeat, ops=len(targets)))
+
+    batch_counter = iter(range(repeat))
+
+    def create_batch():
+        batch = next(batch_counter)
+        for i in range(CREATE_FOLDER_BATCH):
+            file_manager.create_project_folders(f"BENCH-{batch}-{i:04d}", "基准测试新建课题", '申报', 2024)
+    results.append(timed('create_project_folders', rows, create_batch, repeat, ops=CREATE_FOLDER_BATCH))
+
+    # 同样数量的新课题经线程池批量创建
+    provision_counter = iter(range(repeat))
+    folder_index = file_manager.get_folder_index()
+
+    def provision_batch():
+        batch = next(provision_counter)
+        projects = [(f"BATCH-{batch}-{i:04d}", "基准测试批量新建课题", '申报', 2024) for i in range(CREATE_FOLDER_BATCH)]
+        file_manager.provision_project_folders(projects, {}, folder_index=folder_index)
+    results.append(timed('provision_project_folders', rows, provision_batch, repeat, ops=CREATE_FOLDER_BATCH))
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_size(rows, args):
+    """在新的临时目录与子进程中测试一种数据规模 (config 中的路径在导入时确定，各模块的单例互不影响)"""
+    workdir = tempfile.mkdtemp(prefix=f'bench-{rows}-', dir=args.tmp_dir)
+    result_file = os.path.join(workdir, 'result.json')
+    command = [sys.executable, os.path.abspath(__file__), '--worker', '--sizes', str(rows),
+               '--repeat', str(args.repeat), '--seed', str(args.seed), '--result-file', result_file]
+    if args.max_folders is not None:
+        command += ['--max-folders', str(args.max_folders)]
+    try:
+        completed = subprocess.run(command, cwd=workdir)
+        if completed.returncode != 0:
+            print(f"错误: {rows} 条数据的测试失败 (退出码 {completed.returncode})")
+            return []
+        with open(result_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    finally:
+        if args.keep:
+            print(f"信息: 测试目录保留在 '{workdir}'")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def compare_results(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """按 (数据规模, 测试项) 比较中位数耗时，返回 (文本行, 回退项列表)"""
+    previous = {(r['rows'], r['name']): r for r in baseline.get('results', [])}
+    lines, regressions = [], []
+    for result in results:
+        base = previous.get((result['rows'], result['name']))
+        if result.get('setup') or base is None or not base['median']:
+            continue
+        ratio = result['median'] / base['median']
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  <-- 回退'
+            regressions.append(result)
+        lines.append(f"{result['rows']:>8} {result['name']:<28} {base['median']:>10.4f} -> {result['median']:>10.4f} s"
+                     f"  x{ratio:.2f}{flag}")
+    return lines, regressions
+
+
+def format_results(results):
+    lines = [f"{'课题数':>8} {'测试项':<28} {'中位数 (s)':>12} {'最小 (s)':>12} {'每次操作 (ms)':>14}"]
+    for r in results:
+        lines.append(f"{r['rows']:>8} {r['name']:<28} {r['median']:>12.4f} {r['min']:>12.4f}"
+                     f" {r['median'] / r['ops'] * 1000:>14.3f}")
+    return lines
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="科研课题管理系统数据读写与文件夹操作的性能测试")
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES, help="测试的课题数")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="每项测试的重复次数")
+    parser.add_argument('--max-folders', type=int, default=None,
+                        help="最多预先创建多少个课题文件夹 (默认与课题数相同)")
+    parser.add_argument('--seed', type=int, default=0, help="生成数据的随机种子")
+    parser.add_argument('--output', default='benchmark_results.json', help="保存测试结果的 JSON 文件")
+    parser.add_argument('--compare', metavar='BASELINE', help="与之前保存的测试结果比较，有回退时以退出码 1 结束")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help="中位数耗时增加超过此比例视为回退 (默认 0.2)")
+    parser.add_argument('--tmp-dir', default=None, help="生成测试数据的目录 (默认系统临时目录)")
+    parser.add_argument('--keep', action='store_true', help="测试后保留生成的数据与文件夹")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.worker:
+        # 子进程: 当前目录即临时目录，导入本仓库的模块后测试
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        results = run_worker(args.sizes[0], args.repeat, args.max_folders, args.seed)
+        with open(args.result_file, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False)
+        return 0
+
+    results = []
+    for rows in args.sizes:
+        print(f"正在测试 {rows} 条课题数据...")
+        size_results = run_size(rows, args)
+        results.extend(size_results)
+        for line in format_results(size_results)[1:]:
+            print(line)
+
+    report = {'meta': {'timestamp': datetime.now().isoformat(timespec='seconds'), 'commit': _git_commit(),
+                       'python': platform.python_version(), 'platform': platform.platform(),
+                       'sizes': args.sizes, 'repeat': args.repeat, 'seed': args.seed},
+              'results': results}
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print()
+    for line in format_results(results):
+        print(line)
+    print(f"测试结果已保存到 '{args.output}'。")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        lines, regressions = compare_results(results, baseline, args.threshold)
+        print()
+        print(f"与 '{args.compare}' 比较 (中位数耗时):")
+        for line in lines:
+            print(line)
+        if regressions:
+            print(f"发现 {len(regressions)} 项性能回退 (超过 {args.threshold:.0%})。")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+# bulk_import.py
+import csv
+import os
+import time
+from datetime import date, datetime
+
+import pandas as pd
+
+import file_manager
+import tracing
+from config import EXCEL_COLUMNS, SHEET_NAME, PROJECT_STATUSES, IMPORT_CHUNK_ROWS
+from storage import DATE_COLUMNS, FUNDING_COLUMNS, iter_excel_chunks
+
+# 按文本处理的列 (日期、经费、开始年份与序号单独处理)
+TEXT_COLUMNS = [col for col in EXCEL_COLUMNS
+                if col not in DATE_COLUMNS and col not in FUNDING_COLUMNS and col not in ('总预算', '开始年份', '序号')]
+# 错误报告的列
+ERROR_REPORT_COLUMNS = ['行号', '课题编号', '错误']
+
+
+def iter_source_chunks(path, chunk_size=IMPORT_CHUNK_ROWS):
+    """分块读取 Excel (openpyxl 只读模式)、CSV 或 JSONL 文件，逐块返回原始记录的 DataFrame
+
+    每块附带 '行号' 列：Excel 与 CSV 为数据所在行 (首行为列名)，JSONL 为文件中的行序号。
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        chunks = iter_excel_chunks(path, SHEET_NAME, chunk_size, strict=False)
+        first_row = 2
+    elif extension in ('.jsonl', '.ndjson', '.json'):
+        chunks = pd.read_json(path, lines=True, chunksize=chunk_size, dtype=False, convert_dates=False)
+        first_row = 1
+    else:
+        chunks = pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False, encoding='utf-8-sig',
+                             skipinitialspace=True)
+        first_row = 2
+    offset = first_row
+    for chunk in chunks:
+        chunk = chunk.reset_index(drop=True)
+        chunk.columns = [str(col).strip() for col in chunk.columns]
+        chunk['行号'] = range(offset, offset + len(chunk))
+        offset += len(chunk)
+        yield chunk
+
+
+def _text(chunk, col):
+    if col not in chunk.columns:
+        return pd.Series('', index=chunk.index, dtype=object)
+    return chunk[col].astype(object).where(chunk[col].notna(), '').astype(str).str.strip()
+
+
+def _blank(chunk, col):
+    if col not in chunk.columns:
+        return pd.Series(True, index=chunk.index)
+    values = chunk[col]
+    return values.isna() | (values.astype(str).str.strip() == '')
+
+
+def _parse_dates(values):
+    """解析一列日期 (字符串或 datetime)，同一列中的格式可以不同，无法解析时为 NaT"""
+    values = values.map(lambda v: v.isoformat() if isinstance(v, (datetime, date)) else v)
+    try:
+        return pd.to_datetime(values, errors='coerce', format='mixed')
+    except (TypeError, ValueError):
+        return pd.to_datetime(values, errors='coerce')
+
+
+def validate_chunk(chunk, seen_ids):
+    """对一块原始记录做向量化校验与类型转换，返回 (有效记录, 错误列表)
+
+    校验课题编号 (不能为空、不能与 seen_ids 或本块中的编号重复，大小写不敏感)、课题状态、
+    日期列与经费列 (非空时须可解析，经费不能为负)。有效记录按 EXCEL_COLUMNS 排列，类型与
+    normalize_projects_df 的结果一致；有效记录的编号 (小写) 会加入 seen_ids。
+    错误列表每项为 {'行号', '课题编号', '错误'}。
+    """
+    frame = pd.DataFrame(index=chunk.index)
+    problems = []  # (布尔掩码, 错误说明)
+
+    for col in TEXT_COLUMNS:
+        frame[col] = _text(chunk, col)
+
+    ids = frame['课题编号']
+    lower_ids = ids.str.lower()
+    missing_id = ids == ''
+    problems.append((missing_id, "缺少课题编号"))
+    problems.append((~missing_id & lower_ids.isin(seen_ids), "课题编号已存在"))
+    problems.append((~missing_id & lower_ids.duplicated(keep='first'), "课题编号在导入文件中重复"))
+
+    frame['课题状态'] = frame['课题状态'].mask(frame['课题状态'] == '', '申报')
+    problems.append((~frame['课题状态'].isin(PROJECT_STATUSES), "课题状态无效"))
+
+    for col in DATE_COLUMNS:
+        blank = _blank(chunk, col)
+        if col in chunk.columns:
+            parsed = _parse_dates(chunk[col].where(~blank, None))
+        else:
+            parsed = pd.Series(pd.NaT, index=chunk.index, dtype='datetime64[ns]')
+        problems.append((~blank & parsed.isna(), f"{col}格式无效"))
+        frame[col] = parsed.dt.strftime('%Y-%m-%d').fillna('')
+
+    for col in FUNDING_COLUMNS:
+        blank = _blank(chunk, col)
+        raw = chunk[col].where(~blank, 0) if col in chunk.columns else pd.Series(0, index=chunk.index)
+        values = pd.to_numeric(raw, errors='coerce')
+        problems.append((values.isna(), f"{col}不是有效的数值"))
+        problems.append((values < 0, f"{col}不能为负数"))
+        frame[col] = values.fillna(0).astype(float)
+    frame['总预算'] = frame[FUNDING_COLUMNS].sum(axis=1)
+
+    # 开始年份取自开始日期，没有开始日期时沿用文件中的四位年份
+    start_years = pd.to_datetime(frame['开始日期'].where(frame['开始日期'] != ''), errors='coerce').dt.year
+    given_years = _text(chunk, '开始年份').str.extract(r'^(\d{4})', expand=False)
+    frame['开始年份'] = start_years.astype('Int64').astype(str).where(start_years.notna(), given_years).fillna('')
+    frame['序号'] = 0
+
+    invalid = pd.Series(False, index=chunk.index)
+    for mask, _ in problems:
+        invalid |= mask.fillna(False).astype(bool)
+    errors = []
+    if invalid.any():
+        messages = {pos: [] for pos in chunk.index[invalid]}
+        for mask, message in problems:
+            for pos in chunk.index[mask.fillna(False).astype(bool)]:
+                messages[pos].append(message)
+        row_numbers = chunk['行号'] if '行号' in chunk.columns else pd.Series(chunk.index + 1, index=chunk.index)
+        errors = [{'行号': int(row_numbers[pos]), '课题编号': ids[pos], '错误': '；'.join(found)}
+                  for pos, found in messages.items()]
+
+    valid = frame.loc[~invalid, EXCEL_COLUMNS]
+    seen_ids.update(lower_ids[~invalid])
+    return valid, errors
+
+
+def read_import_file(path, existing_ids, chunk_size=IMPORT_CHUNK_ROWS, progress=None):
+    """分块读取并校验导入文件，返回 (有效记录, 错误列表, 读取的记录数)
+
+    existing_ids 为数据表中已有的课题编号；progress(已读取记录数) 在每块处理后调用，可在工作线程中运行。
+    """
+    seen_ids = {str(project_id).strip().lower() for project_id in existing_ids}
+    frames, errors, total = [], [], 0
+    with tracing.span('import.read', path=os.path.basename(path)):
+        for chunk in iter_source_chunks(path, chunk_size):
+            with tracing.span('import.validate', rows=len(chunk)):
+                valid, chunk_errors = validate_chunk(chunk, seen_ids)
+            tracing.count('rows_parsed', len(chunk))
+            frames.append(valid)
+            errors.extend(chunk_errors)
+            total += len(chunk)
+            if progress:
+                progress(total)
+    new_rows = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=EXCEL_COLUMNS)
+    return new_rows, errors, total
+
+
+@tracing.traced('import.folders')
+def create_import_folders(new_rows, progress=None):
+    """通过线程池为待导入的课题批量创建文件夹，返回 (成功的记录, 错误列表, {课题编号: 文件夹路径})，并更新文件夹状态缓存"""
+    if new_rows.empty:
+        return new_rows, [], {}
+    projects = list(zip(new_rows['课题编号'], new_rows['课题名称'], new_rows['课题状态'], new_rows['开始年份']))
+    folder_state = file_manager.load_folder_state()
+    folder_index = file_manager.get_folder_index(known_ids=new_rows['课题编号'].tolist())
+    results, summary = file_manager.provision_project_folders(projects, folder_state, progress=progress,
+                                                               folder_index=folder_index)
+    file_manager.save_folder_state(folder_state)
+    ok = [result['ok'] for result in results]
+    errors = [{'行号': None, '课题编号': result['project_id'], '错误': f"无法创建文件夹: {result['error']}"}
+              for result in results if not result['ok']]
+    print(f"已为 {summary['succeeded']} 个导入的课题创建文件夹，{summary['failed']} 个失败，用时 {summary['elapsed']:.2f} 秒。")
+    folder_paths = {result['project_id']: result['path'] for result in results if result['ok']}
+    return new_rows[ok].reset_index(drop=True), errors, folder_paths
+
+
+def write_error_report(errors, path):
+    """将导入错误写入 CSV 文件 (可用 Excel 打开)"""
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=ERROR_REPORT_COLUMNS)
+        writer.writeheader()
+        writer.writerows(errors)
+
+
+def import_projects(df, path, chunk_size=IMPORT_CHUNK_ROWS, create_folders=True, progress=None):
+    """从 Excel/CSV/JSONL 文件批量导入课题，返回 (df, 报告)
+
+    分块读取并校验，为有效记录批量创建文件夹后一次性追加到数据表 (data_manager.append_projects)；
+    无效记录不会中断导入，而是记入报告。报告包含 rows、imported、errors、elapsed。
+    数据不会自动保存，调用方随后调用 data_manager.save_changes 或 schedule_save。
+    """
+    import data_manager
+
+    started = time.perf_counter()
+    new_rows, errors, total = read_import_file(path, df['课题编号'].astype(str), chunk_size, progress)
+    if create_folders:
+        new_rows, folder_errors, _ = create_import_folders(new_rows)
+        errors.extend(folder_errors)
+    df, added_ids, duplicate_ids = data_manager.append_projects(df, new_rows)
+    errors.extend({'行号': None, '课题编号': project_id, '错误': "课题编号已存在"} for project_id in duplicate_ids)
+    report = {'rows': total, 'imported': len(added_ids), 'errors': errors, 'elapsed': time.perf_counter() - started}
+    print(f"导入完成: 读取 {total} 条记录，导入 {report['imported']} 条，{len(errors)} 条有错误，"
+          f"用时 {report['elapsed']:.2f} 秒。")
+    return df, report
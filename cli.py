@@ -0,0 +1,259 @@
+# cli.py
+import argparse
+import contextlib
+import csv
+import json
+import os
+import sys
+import time
+
+from config import IMPORT_CHUNK_ROWS
+
+# 命令行入口不导入 tkinter 与 matplotlib，只使用数据层 (data_manager、file_manager)
+
+# search 默认输出的列
+DEFAULT_OUTPUT_COLUMNS = ['课题编号', '课题名称', '课题状态', '承担单位', '课题负责人', '开始日期']
+
+
+def read_records(path):
+    """逐条读取 CSV (首行为列名) 或 JSONL (每行一个 JSON 对象) 中的记录；path 为 '-' 时读取标准输入"""
+    is_jsonl = path.lower().endswith(('.jsonl', '.ndjson', '.json'))
+    with (contextlib.nullcontext(sys.stdin) if path == '-' else open(path, 'r', encoding='utf-8-sig', newline='')) as f:
+        if is_jsonl:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"'{path}' 第 {line_no} 行不是有效的 JSON: {e}")
+                if not isinstance(record, dict):
+                    raise ValueError(f"'{path}' 第 {line_no} 行不是 JSON 对象")
+                yield record
+        else:
+            for record in csv.DictReader(f):
+                yield {key.strip(): value for key, value in record.items() if key}
+
+
+def _json_value(value):
+    if hasattr(value, 'item'):  # numpy 标量
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def write_records(df, fmt, path=None, columns=None):
+    """将课题记录以 table/csv/jsonl 格式写入 path (默认标准输出)"""
+    columns = [c for c in (columns or df.columns) if c in df.columns]
+    rows = df[columns]
+    with (contextlib.nullcontext(sys.stdout) if path in (None, '-') else open(path, 'w', encoding='utf-8-sig' if fmt == 'csv' else 'utf-8', newline='')) as f:
+        if fmt == 'jsonl':
+            for values in rows.itertuples(index=False, name=None):
+                f.write(json.dumps({c: _json_value(v) for c, v in zip(columns, values)}, ensure_ascii=False) + '\n')
+        else:
+            writer = csv.writer(f, delimiter='\t' if fmt == 'table' else ',', lineterminator='\n')
+            writer.writerow(columns)
+            writer.writerows(rows.itertuples(index=False, name=None))
+
+
+def read_excel_header(path):
+    """读取 Excel 工作簿第一个工作表的首行 (列名)"""
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True)
+    try:
+        first_row = next(workbook.worksheets[0].iter_rows(max_row=1, values_only=True), ())
+        return [str(value) for value in first_row if value is not None]
+    finally:
+        workbook.close()
+
+
+@contextlib.contextmanager
+def library_output(quiet):
+    """数据层的提示信息输出到标准错误 (quiet 时丢弃)，标准输出只保留命令结果"""
+    with open(os.devnull, 'w') if quiet else contextlib.nullcontext(sys.stderr) as target:
+        with contextlib.redirect_stdout(target):
+            yield
+
+
+def _load(args):
+    import data_manager
+    with library_output(args.quiet):
+        df, missing_cols_added = data_manager.load_projects_table()
+    return data_manager, df
+
+
+def cmd_load(args):
+    """读取数据表并输出课题数与各状态的课题数"""
+    started = time.perf_counter()
+    data_manager, df = _load(args)
+    summary = {'records': len(df), 'elapsed': round(time.perf_counter() - started, 3),
+               'statuses': {str(k): int(v) for k, v in df['课题状态'].value_counts().items()}}
+    print(json.dumps(summary, ensure_ascii=False))
+    return 0
+
+
+def cmd_search(args):
+    """全文检索 (或按 --column 在单列中查找) 并输出匹配的课题"""
+    data_manager, df = _load(args)
+    with library_output(args.quiet):
+        if args.column:
+            results = data_manager.find_project(df, args.query, args.column)
+        else:
+            fields = args.fields.split(',') if args.fields else None
+            results = data_manager.search_projects(df, args.query, fields)
+    if args.limit:
+        results = results.head(args.limit)
+    columns = args.columns.split(',') if args.columns else DEFAULT_OUTPUT_COLUMNS
+    write_records(results, args.format, columns=columns)
+    return 0
+
+
+def cmd_add(args):
+    """从 Excel/CSV/JSONL 批量导入课题 (分块校验、批量创建文件夹)，全部追加后一次保存"""
+    import bulk_import
+    data_manager, df = _load(args)
+    with library_output(args.quiet):
+        df, report = bulk_import.import_projects(df, args.file, args.chunk_size, create_folders=not args.no_folders)
+        saved = data_manager.save_changes(df) if report['imported'] else True
+    errors = report['errors']
+    if args.error_report:
+        bulk_import.write_error_report(errors, args.error_report)
+    else:
+        for error in errors:
+            print(f"第 {error['行号'] or '-'} 行 (课题编号: {error['课题编号'] or '无'}): {error['错误']}", file=sys.stderr)
+    print(json.dumps({'rows': report['rows'], 'added': report['imported'], 'failed': len(errors), 'saved': saved,
+                      'elapsed': round(report['elapsed'], 3)}, ensure_ascii=False))
+    return 0 if saved and not errors else 1
+
+
+def cmd_update_status(args):
+    """批量变更课题状态 (CSV/JSONL 中的 课题编号 与 课题状态 列，或 --ids 与 --status)，数据与文件夹重命名一次提交"""
+    status_by_id = {}
+    if args.file:
+        for record in read_records(args.file):
+            project_id = str(record.get('课题编号') or '').strip()
+            status = args.status or str(record.get('课题状态') or '').strip()
+            if project_id:
+                status_by_id[project_id] = status
+    for project_id in args.ids or []:
+        status_by_id[project_id] = args.status
+    if not status_by_id:
+        print("错误: 没有需要变更状态的课题 (请提供文件或 --ids)", file=sys.stderr)
+        return 2
+    if any(not status for status in status_by_id.values()):
+        print("错误: 部分课题缺少新状态 (文件中没有 课题状态 列时请使用 --status)", file=sys.stderr)
+        return 2
+
+    data_manager, df = _load(args)
+    with library_output(args.quiet):
+        df, ok, report = data_manager.update_projects_statuses(df, status_by_id, {})
+    print(json.dumps({'ok': ok, 'updated': len(report['updated']), 'renamed': report['renamed'],
+                      'unchanged': len(report['unchanged']), 'not_found': report['not_found'],
+                      'conflicts': report['conflicts'], 'errors': report['errors'],
+                      'elapsed': round(report['elapsed'], 3)}, ensure_ascii=False))
+    return 0 if ok else 1
+
+
+def cmd_export(args):
+    """导出课题数据 (可先按 --query 检索)，格式由 --format 或文件扩展名决定"""
+    data_manager, df = _load(args)
+    if args.query:
+        with library_output(args.quiet):
+            df = data_manager.search_projects(df, args.query)
+    fmt = args.format or {'.csv': 'csv', '.jsonl': 'jsonl', '.xlsx': 'xlsx'}.get(
+        os.path.splitext(args.output)[1].lower(), 'csv')
+    columns = args.columns.split(',') if args.columns else None
+    if fmt == 'xlsx':
+        import storage
+        columns = [c for c in columns if c in df.columns] if columns else list(df.columns)
+        try:
+            storage.write_excel_file(storage.prepare_excel_frame(df, columns), args.output)
+            header = read_excel_header(args.output)
+        except Exception as e:
+            print(f"错误: 导出到 '{args.output}' 失败: {e}", file=sys.stderr)
+            return 1
+        if header != columns:
+            print(f"错误: '{args.output}' 的列 ({', '.join(header)}) 与要导出的列不一致。", file=sys.stderr)
+            return 1
+    else:
+        write_records(df, fmt, args.output, columns)
+    print(json.dumps({'exported': len(df), 'format': fmt, 'path': args.output}, ensure_ascii=False))
+    return 0
+
+
+def cmd_folder_verify(args):
+    """检查每个课题的文件夹结构，缺失的文件夹与子文件夹会被创建"""
+    data_manager, df = _load(args)
+    started = time.perf_counter()
+    with library_output(args.quiet):
+        folder_cache = data_manager.verify_project_folders(df)
+    missing = sorted(set(df['课题编号'].astype(str)) - set(folder_cache))
+    print(json.dumps({'projects': len(df), 'ok': len(folder_cache), 'failed': missing,
+                      'elapsed': round(time.perf_counter() - started, 3)}, ensure_ascii=False))
+    return 0 if not missing else 1
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="科研课题管理系统命令行工具 (无图形界面的批量操作)")
+    parser.add_argument('-q', '--quiet', action='store_true', help="不输出数据层的提示信息 (默认输出到标准错误)")
+    parser.add_argument('--trace', nargs='?', const='', metavar='FILE',
+                        help="记录各阶段耗时，退出时导出为 Chrome trace JSON")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    load = commands.add_parser('load', help="读取数据表并输出汇总")
+    load.set_defaults(func=cmd_load)
+
+    search = commands.add_parser('search', help="检索课题")
+    search.add_argument('query', help="检索词，空格分隔取交集，可用 '字段:词' 限定字段，词末尾加 '*' 表示前缀匹配")
+    search.add_argument('--column', help="只在此列中查找 (大小写不敏感的包含匹配)")
+    search.add_argument('--fields', help="全文检索的字段，逗号分隔")
+    search.add_argument('--columns', help="输出的列，逗号分隔")
+    search.add_argument('--format', choices=['table', 'csv', 'jsonl'], default='table')
+    search.add_argument('--limit', type=int, default=0, help="最多输出的课题数")
+    search.set_defaults(func=cmd_search)
+
+    add = commands.add_parser('add', help="从 Excel/CSV/JSONL 批量导入课题")
+    add.add_argument('file', help="Excel (.xlsx)、CSV 或 JSONL 文件")
+    add.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_ROWS, help="每次读取与校验的记录数")
+    add.add_argument('--error-report', metavar='CSV', help="将无法导入的记录及原因写入此 CSV 文件")
+    add.add_argument('--no-folders', action='store_true', help="不为导入的课题创建文件夹")
+    add.set_defaults(func=cmd_add)
+
+    update_status = commands.add_parser('update-status', help="批量变更课题状态并重命名文件夹")
+    update_status.add_argument('file', nargs='?', help="含 课题编号 (与 课题状态) 列的 CSV 或 JSONL 文件")
+    update_status.add_argument('--ids', nargs='+', help="课题编号")
+    update_status.add_argument('--status', help="新状态 (指定时覆盖文件中的 课题状态)")
+    update_status.set_defaults(func=cmd_update_status)
+
+    export = commands.add_parser('export', help="导出课题数据为 CSV/JSONL/Excel")
+    export.add_argument('output', help="输出文件 (- 表示标准输出)")
+    export.add_argument('--format', choices=['csv', 'jsonl', 'xlsx'], help="默认按扩展名判断")
+    export.add_argument('--query', help="只导出检索到的课题")
+    export.add_argument('--columns', help="导出的列，逗号分隔")
+    export.set_defaults(func=cmd_export)
+
+    folder_verify = commands.add_parser('folder-verify', help="检查并补全课题文件夹结构")
+    folder_verify.set_defaults(func=cmd_folder_verify)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.trace is not None:
+        import tracing
+        tracing.enable(args.trace or None)
+    try:
+        return args.func(args)
+    except BrokenPipeError:
+        # 输出被 head 等命令提前关闭
+        sys.stdout = open(os.devnull, 'w')
+        return 0
+    except (OSError, ValueError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,41 @@ EXCEL_FILE = '科研课题管理总表.xlsx'
 PROJECTS_ROOT_DIR = os.path.join(os.path.abspath('.'), '科研课题管理')
 # Excel 中的工作表名称
 SHEET_NAME = '课题列表'
+# 课题文件夹状态缓存文件 (与 Excel 文件放在同一目录)
+FOLDER_STATE_FILE = os.path.splitext(EXCEL_FILE)[0] + '.folders.json'
+# 规范化后总表的二进制缓存文件，Excel 未被修改时跳过 openpyxl 解析
+DATA_CACHE_FILE = os.path.splitext(EXCEL_FILE)[0] + '.cache.pkl'
+# 课题文档清单缓存文件 (各目录的文件数、大小与修改时间)，目录修改时间未变化时不再重新列目录
+INVENTORY_FILE = os.path.splitext(EXCEL_FILE)[0] + '.inventory.json'
+# 重复文件检查的文件哈希缓存 (按 路径、大小、修改时间)，再次检查时只计算变化的文件
+DEDUP_CACHE_FILE = os.path.splitext(EXCEL_FILE)[0] + '.hashes.json'
+# 批量变更课题状态时的文件夹重命名日志，程序在提交前中断时据此在下次启动时回滚
+TRANSITION_JOURNAL_FILE = os.path.splitext(EXCEL_FILE)[0] + '.transition.json'
+# 批量创建/检查课题文件夹时的并发线程数 (网络共享盘上每次文件操作都有往返延迟)
+FOLDER_WORKERS = 8
+# 数据存储后端: 'excel' 直接读写 Excel 总表; 'sqlite' 使用 SQLite 数据库按记录保存，Excel 仅用于导入导出
+STORAGE_BACKEND = 'excel'
+# SQLite 数据库文件
+SQLITE_FILE = os.path.splitext(EXCEL_FILE)[0] + '.db'
+# 修改后延迟保存的空闲时间 (秒)，期间的多次修改合并为一次保存
+SAVE_DEBOUNCE_SECONDS = 2.0
+# 主窗口空闲后是否在后台预加载分析窗口所需的绘图模块 (matplotlib、wordcloud)
+PREWARM_ANALYSIS_MODULES = True
+# 是否监视课题文件夹根目录与数据文件，在外部修改后自动同步 (Linux 使用 inotify，其他平台定时轮询)
+WATCH_FILE_CHANGES = True
+# 外部修改的合并等待时间 (秒)：最后一次变化后空闲这么久才处理，避免复制大量文件时反复刷新
+WATCH_DEBOUNCE_SECONDS = 1.0
+# 无法使用 inotify 时轮询文件状态的间隔 (秒)
+WATCH_POLL_INTERVAL = 3.0
+# inotify 监视课题文件夹内子文件夹的层数 (2 覆盖标准子文件夹及 03_过程管理 下的各子文件夹)，更深的文件夹不监视
+WATCH_FOLDER_DEPTH = 2
+# 性能追踪: 设置此环境变量 (值为 1 或输出文件路径) 或以 --trace 启动时，记录加载、规范化、文件夹检查与保存各阶段的耗时与计数，
+# 退出时导出为 Chrome trace JSON (可在 chrome://tracing 或 Perfetto 中打开)
+TRACE_ENV_VAR = 'PROJECT_MANAGER_TRACE'
+# 性能追踪的默认输出文件
+TRACE_FILE = os.path.splitext(EXCEL_FILE)[0] + '.trace.json'
+# 批量导入时每次读取与校验的记录数
+IMPORT_CHUNK_ROWS = 5000
 # 标准的课题子文件夹结构
 FOLDER_STRUCTURE = ['01_申报', '02_立项', '03_过程管理', '04_结题', '05_财务', '06_其他']
 # Excel 表格的列名 (移除 '课题文件夹路径')
@@ -1,157 +1,401 @@
 # data_manager.py
 import pandas as pd
 from datetime import datetime
+import atexit
 import os
+import threading
+import time
 import file_manager
+import storage
+import tracing
+from project_index import get_project_index
+from search_index import ProjectSearchIndex, SEARCH_FIELDS
+from title_terms import TitleTermCounter
+from aggregate_cube import AggregateCube
+from watcher import FileSystemWatcher
 
 # 从 config 模块导入配置
-from config import EXCEL_FILE, SHEET_NAME, EXCEL_COLUMNS, PROJECT_STATUSES
+from config import EXCEL_COLUMNS, PROJECT_STATUSES, SAVE_DEBOUNCE_SECONDS, PROJECTS_ROOT_DIR
+
+
+class ChangeJournal:
+    """记录自上次保存以来新增/修改与删除的课题编号，并维护数据版本号"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.dirty_ids = set()
+        self.deleted_ids = set()
+        # 每次记录变更时递增，供缓存判断数据是否变化
+        self.version = 0
+
+    def mark_dirty(self, project_id):
+        with self._lock:
+            project_id_str = str(project_id)
+            self.dirty_ids.add(project_id_str)
+            self.deleted_ids.discard(project_id_str)
+            self.version += 1
+
+    def mark_dirty_many(self, project_ids):
+        """一次记录多个新增/修改的课题 (批量导入)，版本号只递增一次"""
+        with self._lock:
+            project_ids = {str(project_id) for project_id in project_ids}
+            self.dirty_ids |= project_ids
+            self.deleted_ids -= project_ids
+            self.version += 1
+
+    def mark_deleted(self, project_id):
+        with self._lock:
+            project_id_str = str(project_id)
+            self.deleted_ids.add(project_id_str)
+            self.dirty_ids.discard(project_id_str)
+            self.version += 1
+
+    def pending_ids(self):
+        """尚未保存的新增/修改与删除的课题编号"""
+        with self._lock:
+            return self.dirty_ids | self.deleted_ids
+
+    def touch(self):
+        """数据被外部修改同步后递增版本号 (不产生待保存的变更)"""
+        with self._lock:
+            self.version += 1
+
+    def has_changes(self):
+        with self._lock:
+            return bool(self.dirty_ids or self.deleted_ids)
+
+    def drain(self):
+        """取出并清空待保存的变更，返回 (变更编号集合, 删除编号集合)"""
+        with self._lock:
+            dirty, deleted = self.dirty_ids, self.deleted_ids
+            self.dirty_ids, self.deleted_ids = set(), set()
+            return dirty, deleted
+
+    def restore(self, dirty, deleted):
+        """保存失败时放回取出的变更 (期间产生的新变更优先)"""
+        with self._lock:
+            self.dirty_ids |= dirty - self.deleted_ids
+            self.deleted_ids |= deleted - self.dirty_ids
+
+    def clear(self):
+        with self._lock:
+            self.dirty_ids.clear()
+            self.deleted_ids.clear()
+
+
+change_journal = ChangeJournal()
+
+
+def _merge_changes(older, newer):
+    """合并两批 (变更编号集合, 删除编号集合)，同一课题以较新一批为准"""
+    dirty = newer[0] | (older[0] - newer[1])
+    deleted = newer[1] | (older[1] - newer[0])
+    return dirty, deleted
+
+
+class DebouncedSaver:
+    """合并短时间内的多次修改，在空闲 delay 秒后于后台线程只保存变更的记录
+
+    快照与变更日志中的编号在 schedule() 中同一把锁内一起取出，保存的快照总是包含它要写入的全部变更。
+    """
+
+    def __init__(self, delay=SAVE_DEBOUNCE_SECONDS, journal=change_journal):
+        self.delay = delay
+        self.journal = journal
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._timer = None
+        self._snapshot = None
+        self._pending = (set(), set())
+
+    def schedule(self, df):
+        """记录最新数据并重新开始计时；在修改数据的线程中于记录变更之后调用，快照在此处生成"""
+        with self._lock:
+            self._snapshot = df.copy()
+            self._pending = _merge_changes(self._pending, self.journal.drain())
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def pending_ids(self):
+        """已安排但尚未保存的课题编号"""
+        with self._lock:
+            return self._pending[0] | self._pending[1]
+
+    def take_pending(self):
+        """取消计时并取出待保存的变更，由调用方用更新的数据表一起保存，返回 (变更编号集合, 删除编号集合)"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            pending, self._pending = self._pending, (set(), set())
+            self._snapshot = None
+            return pending
+
+    def flush(self):
+        """立即保存待写入的变更，没有变更时直接返回 True"""
+        with self._save_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                df, self._snapshot = self._snapshot, None
+                (dirty, deleted), self._pending = self._pending, (set(), set())
+            if df is None or (not dirty and not deleted):
+                return True
+            success = storage.get_storage_backend().save(df, dirty, deleted)
+            if not success:
+                with self._lock:
+                    self._pending = _merge_changes((dirty, deleted), self._pending)
+                    if self._snapshot is None:
+                        self._snapshot = df
+            return success
+
+
+_saver = None
+
+
+def schedule_save(df):
+    """延迟批量保存：多次修改在空闲 SAVE_DEBOUNCE_SECONDS 秒后合并为一次只写入变更记录的保存"""
+    global _saver
+    if _saver is None:
+        _saver = DebouncedSaver()
+    _saver.schedule(df)
+
+
+def flush_pending_saves():
+    """立即写入所有待保存的变更 (程序退出前调用)"""
+    if _saver is None:
+        return True
+    return _saver.flush()
 
-def load_projects_data():
-    """从 Excel 加载课题数据，处理日期和特定类型，并为新项目创建文件夹"""
-    try:
-        date_columns = ['开始日期', '计划结束日期', '延期时间', '实际结题时间']
-        string_columns = {
-            '课题编号': str, '课题联系人': str, '课题负责人': str,
-            '承担单位': str, '参与角色': str, '课题名称': str, '归口单位': str,
-            '课题级别': str, '课题类型': str, '课题状态': str,
-        }
-        string_columns_to_use = {k: v for k, v in string_columns.items() if k in EXCEL_COLUMNS}
-
-        df = pd.read_excel(
-            EXCEL_FILE,
-            sheet_name=SHEET_NAME,
-            engine='openpyxl',
-            dtype=string_columns_to_use,
-        )
-        print(f"成功从 '{EXCEL_FILE}' 加载 {len(df)} 条课题数据。")
-
-        # Validate project IDs
-        if '课题编号' in df.columns:
-            project_ids = df['课题编号'].astype(str)
-            # Check for missing project IDs
-            missing_ids = project_ids.isna() | (project_ids == '')
-            if missing_ids.any():
-                print(f"警告: 发现 {missing_ids.sum()} 条记录缺少课题编号，将为这些记录分配临时编号。")
-                df.loc[missing_ids, '课题编号'] = [f"temp_id_{i}" for i in df.index[missing_ids]]
-            # Check for duplicate project IDs
-            duplicates = project_ids.duplicated(keep=False)
-            if duplicates.any():
-                duplicate_ids = df.loc[duplicates, '课题编号'].unique()
-                print(f"警告: 发现重复的课题编号: {', '.join(map(str, duplicate_ids))}。请确保课题编号唯一。")
-        else:
-            print("警告: Excel 文件中缺少 '课题编号' 列，将为所有记录分配临时编号。")
-            df['课题编号'] = [f"temp_id_{i}" for i in df.index]
 
-        missing_cols_added = False
-        for col in EXCEL_COLUMNS:
-            if col not in df.columns:
-                df[col] = None
-                missing_cols_added = True
-                print(f"警告: 文件中缺少列 '{col}'，已添加。")
+atexit.register(flush_pending_saves)
 
-        df = df[EXCEL_COLUMNS]
 
-        if '序号' in EXCEL_COLUMNS:
-            df['序号'] = range(1, len(df) + 1)
+def pending_change_ids():
+    """尚未保存的课题编号 (变更日志中的与已安排延迟保存的)"""
+    pending = change_journal.pending_ids()
+    if _saver is not None:
+        pending |= _saver.pending_ids()
+    return pending
 
-        for col in date_columns:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce')
-                df[col] = df[col].dt.strftime('%Y-%m-%d').fillna('')
-            else:
-                df[col] = ''
 
-        numeric_cols = ['外部专项经费', '院自筹经费', '所属单位自筹经费', '总预算']
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-            else:
-                df[col] = 0.0
+def save_changes(df):
+    """立即把自上次保存以来记录的全部变更一次写入存储后端 (批量操作结束时调用)，没有变更时直接返回 True
 
-        if all(c in df.columns for c in ['外部专项经费', '院自筹经费', '所属单位自筹经费']):
-            df['总预算'] = df['外部专项经费'] + df['院自筹经费'] + df['所属单位自筹经费']
-        elif '总预算' in df.columns:
-            print("警告: 缺少部分经费列，无法重新计算总预算。将使用文件中读取的值。")
+    df 须为最新的数据表；已安排的延迟保存随之取消，其变更一并写入。
+    """
+    scheduled = _saver.take_pending() if _saver is not None else (set(), set())
+    dirty, deleted = _merge_changes(scheduled, change_journal.drain())
+    if not dirty and not deleted:
+        return True
+    if save_projects_data(df, dirty, deleted):
+        return True
+    change_journal.restore(dirty, deleted)
+    return False
 
-        if '开始年份' in df.columns and '开始日期' in df.columns:
-            mask = df['开始日期'] != ''
-            df.loc[mask, '开始年份'] = pd.to_datetime(df.loc[mask, '开始日期']).dt.year
-            df['开始年份'] = df['开始年份'].astype('Int64').fillna(pd.NA).astype(str).replace('<NA>', '')
 
-        df.fillna('', inplace=True)
+_change_listeners = []
 
-        # Check for projects without valid folders and create them
-        folder_cache = {}
-        for idx, row in df.iterrows():
-            project_id = str(row['课题编号'])
-            project_name = row.get('课题名称', '')
-            status = row.get('课题状态', '申报')
-            start_year = row.get('开始年份', '')
-            # Check if folder needs to be created
-            folder_path = None
-            # Assuming folder path isn't stored in Excel (as per EXCEL_COLUMNS), we create folders for all projects
-            if not folder_path or not os.path.isdir(folder_path):
-                folder_path = file_manager.create_project_folders(project_id, project_name, status, start_year)
-                if folder_path:
-                    print(f"自动为课题 '{project_name}' (编号: {project_id}) 创建文件夹: {folder_path}")
-                    folder_cache[project_id] = folder_path
-                else:
-                    print(f"警告: 无法为课题 '{project_name}' (编号: {project_id}) 创建文件夹")
-            else:
-                folder_cache[project_id] = folder_path
 
-        if missing_cols_added:
-            print("提示：由于添加了缺失列，建议检查数据并保存。")
+def add_change_listener(callback):
+    """注册记录变更回调 callback(df, project_id, deleted)，在新增、修改、删除记录后调用"""
+    if callback not in _change_listeners:
+        _change_listeners.append(callback)
 
-        return df, folder_cache
 
-    except FileNotFoundError:
-        print(f"信息: Excel 文件 '{EXCEL_FILE}' 未找到。将创建一个新的空 DataFrame。")
-        empty_df = pd.DataFrame(columns=EXCEL_COLUMNS)
-        for col in EXCEL_COLUMNS:
-            if col in ['外部专项经费', '院自筹经费', '所属单位自筹经费', '总预算']:
-                empty_df[col] = 0.0
-            elif col in ['开始日期', '计划结束日期', '延期时间', '实际结题时间']:
-                empty_df[col] = ''
-            elif col == '开始年份':
-                empty_df[col] = ''
-            elif col == '序号':
-                empty_df[col] = pd.Series(dtype='int64')
-            else:
-                empty_df[col] = ''
-        return empty_df, {}
+def remove_change_listener(callback):
+    if callback in _change_listeners:
+        _change_listeners.remove(callback)
+
+
+def _record_changed(df, project_id, deleted=False):
+    """记录变更：写入变更日志并通知各派生索引增量更新"""
+    if deleted:
+        change_journal.mark_deleted(project_id)
+    else:
+        change_journal.mark_dirty(project_id)
+    _notify_listeners(df, project_id, deleted)
+
+
+def _notify_listeners(df, project_id, deleted=False):
+    for callback in list(_change_listeners):
+        try:
+            callback(df, str(project_id), deleted)
+        except Exception as e:
+            print(f"警告: 处理课题 '{project_id}' 的变更通知时出错: {e}")
+
+
+_search_index = None
+
+
+def get_search_index(df):
+    """获取与 df 同步的全文索引，首次使用或数据表被整体替换时重建"""
+    global _search_index
+    if _search_index is None:
+        _search_index = ProjectSearchIndex()
+    if not _search_index.is_bound_to(df):
+        _search_index.rebuild(df)
+    return _search_index
+
+
+def _update_search_index(df, project_id, deleted):
+    """记录变更时增量更新全文索引 (索引尚未建立时跳过)"""
+    if _search_index is None:
+        return
+    if deleted:
+        _search_index.remove(project_id)
+    else:
+        row = find_project_row(df, project_id)
+        if row is not None:
+            _search_index.update(project_id, row)
+    _search_index.bind(df)
+
+
+add_change_listener(_update_search_index)
+
+
+_title_terms = None
+
+
+def get_title_terms(df):
+    """获取与 df 同步的课题名称词频统计，首次使用或数据表被整体替换时重新统计"""
+    global _title_terms
+    if _title_terms is None:
+        _title_terms = TitleTermCounter()
+    if not _title_terms.is_bound_to(df):
+        _title_terms.rebuild(df)
+    return _title_terms
+
+
+def _update_title_terms(df, project_id, deleted):
+    """记录变更时增量更新课题名称词频 (尚未统计时跳过)"""
+    if _title_terms is None:
+        return
+    if deleted:
+        _title_terms.remove(project_id)
+    else:
+        row = find_project_row(df, project_id)
+        if row is not None:
+            _title_terms.update(project_id, row['课题名称'])
+    _title_terms.bind(df)
+
+
+add_change_listener(_update_title_terms)
+
+
+_aggregate_cube = None
 
-    except Exception as e:
-        print(f"加载 Excel 文件 '{EXCEL_FILE}' 时发生严重错误: {e}")
-        return pd.DataFrame(columns=EXCEL_COLUMNS).fillna(''), {}
 
-def save_projects_data(df):
-    """将课题数据保存回 Excel，确保数据类型正确"""
+def get_aggregate_cube(df):
+    """获取与 df 同步的分析数据立方体，首次使用或数据表被整体替换时重新汇总"""
+    global _aggregate_cube
+    if _aggregate_cube is None:
+        _aggregate_cube = AggregateCube()
+    if not _aggregate_cube.is_bound_to(df):
+        _aggregate_cube.rebuild(df)
+    return _aggregate_cube
+
+
+def _update_aggregate_cube(df, project_id, deleted):
+    """记录变更时增量更新数据立方体 (尚未汇总时跳过)"""
+    if _aggregate_cube is None:
+        return
+    if deleted:
+        _aggregate_cube.remove(project_id)
+    else:
+        row = find_project_row(df, project_id)
+        if row is not None:
+            _aggregate_cube.update(project_id, row)
+    _aggregate_cube.bind(df)
+
+
+add_change_listener(_update_aggregate_cube)
+
+
+@tracing.traced('data.load_table')
+def load_projects_table(on_chunk=None):
+    """从存储后端加载课题数据表 (不检查文件夹)，返回 (df, 是否补充了缺失列)
+
+    逐块解析时每解析一块调用 on_chunk(未经处理的 DataFrame)，见 StorageBackend.load。
+    """
+    backend = storage.get_storage_backend()
     try:
-        df_to_save = df.reindex(columns=EXCEL_COLUMNS)
-        numeric_cols = ['外部专项经费', '院自筹经费', '所属单位自筹经费', '总预算']
-        for col in numeric_cols:
-            if col in df_to_save.columns:
-                df_to_save[col] = pd.to_numeric(df_to_save[col].replace('', 0), errors='coerce').fillna(0)
-
-        date_columns = ['开始日期', '计划结束日期', '延期时间', '实际结题时间']
-        for col in date_columns:
-            if col in df_to_save.columns:
-                df_to_save[col] = pd.to_datetime(df_to_save[col].replace('', None), errors='coerce')
-
-        if '开始年份' in df_to_save.columns:
-            df_to_save['开始年份'] = pd.to_numeric(df_to_save['开始年份'], errors='coerce').astype('Int64').fillna(pd.NA)
-
-        df_to_save.to_excel(EXCEL_FILE, sheet_name=SHEET_NAME, index=False, engine='openpyxl')
-        print(f"数据已成功保存到 '{EXCEL_FILE}'。")
-        return True
-    except PermissionError:
-        print(f"保存错误: 无法写入文件 '{EXCEL_FILE}'。请确保文件未被其他程序打开，并且您有写入权限。")
-        return False
+        return backend.load(on_chunk)
+    except FileNotFoundError:
+        print(f"信息: 数据文件 '{backend.path}' 未找到。将创建一个新的空 DataFrame。")
+        return storage.empty_projects_df(), False
     except Exception as e:
-        print(f"保存数据到 Excel 文件 '{EXCEL_FILE}' 时发生未知错误: {e}")
-        return False
+        print(f"加载数据文件 '{backend.path}' 时发生严重错误: {e}")
+        return pd.DataFrame(columns=EXCEL_COLUMNS).fillna(''), False
+
+@tracing.traced('folders.verify')
+def verify_project_folders(df, progress=None, progress_every=100):
+    """确保每个课题都有完整的文件夹结构，返回 {课题编号: 文件夹路径}
+
+    文件夹状态缓存中路径与目录修改时间均未变化的课题跳过完整的 FOLDER_STRUCTURE 检查，
+    其余课题通过线程池并发检查/创建。progress(已检查数, 总数) 每检查 progress_every 个课题调用一次，
+    可在工作线程中运行。
+    """
+    # 先取出各列的值，运行期间数据表被修改也不受影响
+    projects = [(project_id, project_name, status or '申报', start_year) for project_id, project_name, status, start_year
+                in zip(df['课题编号'].astype(str), df['课题名称'], df['课题状态'], df['开始年份'])]
+    total = len(projects)
+    # 上次批量变更状态时中断，先撤销新状态未能保存的文件夹重命名
+    file_manager.recover_rename_journal(dict(zip(df['课题编号'].astype(str), df['课题状态'])))
+    folder_state = file_manager.load_folder_state()
+
+    def report(done, total):
+        if progress and (done % progress_every == 0 or done == total):
+            progress(done, total)
+
+    # 一次列目录找出已有的课题文件夹，在外部改过名的文件夹直接沿用而不重复创建
+    folder_index = file_manager.get_folder_index(known_ids=[p[0] for p in projects])
+    results, summary = file_manager.provision_project_folders(
+        projects, folder_state, progress=report, folder_index=folder_index)
+    folder_cache = {}
+    for (project_id, project_name, _, _), result in zip(projects, results):
+        if result['ok']:
+            if not result['cached']:
+                print(f"自动为课题 '{project_name}' (编号: {project_id}) 创建文件夹: {result['path']}")
+            folder_cache[project_id] = result['path']
+        else:
+            print(f"警告: 无法为课题 '{project_name}' (编号: {project_id}) 创建文件夹")
+
+    # 删除已不在数据表中的课题的缓存记录
+    for stale_id in set(folder_state) - set(folder_cache):
+        del folder_state[stale_id]
+    file_manager.save_folder_state(folder_state)
+    print(f"文件夹检查完成: {total - summary['cached']} 个课题完整检查，{summary['cached']} 个命中缓存，"
+          f"跳过 {summary['skipped_stats']} 次文件状态查询，用时 {summary['elapsed']:.2f} 秒。")
+    return folder_cache
+
+@tracing.traced('data.load')
+def load_projects_data(progress=None):
+    """从存储后端加载课题数据，处理日期和特定类型，并为新项目创建文件夹"""
+    df, missing_cols_added = load_projects_table()
+    try:
+        folder_cache = verify_project_folders(df, progress)
+    except Exception as e:
+        print(f"检查课题文件夹时发生错误: {e}")
+        folder_cache = {}
+
+    if missing_cols_added:
+        print("提示：由于添加了缺失列，建议检查数据并保存。")
+
+    return df, folder_cache
+
+@tracing.traced('data.save')
+def save_projects_data(df, changed_ids=None, deleted_ids=None):
+    """将课题数据保存到存储后端；提供 changed_ids/deleted_ids 时，支持增量保存的后端只写入变更的记录"""
+    success = storage.get_storage_backend().save(df, changed_ids, deleted_ids)
+    if success and changed_ids is None and deleted_ids is None:
+        # 整表已写入，之前记录的变更均已保存
+        change_journal.clear()
+    return success
 
 def add_project_record(df, data, custom_folder_path=None):
     """添加新课题记录到 DataFrame，并创建文件夹"""
@@ -161,7 +405,8 @@ def add_project_record(df, data, custom_folder_path=None):
         return df, False, None
 
     project_id_str = str(project_id).strip()
-    if project_id_str.lower() in df['课题编号'].astype(str).str.lower().values:
+    id_index = get_project_index(df)
+    if id_index.contains(project_id_str, case_sensitive=False):
         print(f"错误: 课题编号 '{project_id_str}' 已存在，无法添加。")
         return df, False, None
 
@@ -214,19 +459,45 @@ def add_project_record(df, data, custom_folder_path=None):
 
     new_df_row = pd.DataFrame([new_record], columns=EXCEL_COLUMNS)
     df = pd.concat([df, new_df_row], ignore_index=True)
+    id_index.append(df, new_record['课题编号'])
 
     if '序号' in df.columns:
         df['序号'] = range(1, len(df) + 1)
 
+    _record_changed(df, project_id_str)
     print(f"课题 '{project_name}' (编号: {project_id_str}) 添加成功。")
     return df, True, folder_path
 
+def append_projects(df, new_rows):
+    """将已校验的多条课题记录 (按 EXCEL_COLUMNS) 一次性追加到数据表末尾，返回 (df, 新增的编号, 已存在而跳过的编号)
+
+    与逐条 add_project_record 不同，整批只做一次 concat；新增记录计入待保存的变更，
+    各派生索引发现数据表已被替换后在下次使用时重建，而不逐条通知。
+    """
+    if new_rows.empty:
+        return df, [], []
+    existing = set(df['课题编号'].astype(str).str.lower())
+    new_ids = new_rows['课题编号'].astype(str)
+    duplicate = new_ids.str.lower().isin(existing)
+    new_rows = new_rows[~duplicate]
+    if new_rows.empty:
+        return df, [], new_ids[duplicate].tolist()
+
+    df = pd.concat([df, new_rows.reindex(columns=EXCEL_COLUMNS)], ignore_index=True)
+    if '序号' in df.columns:
+        df['序号'] = range(1, len(df) + 1)
+    added_ids = new_rows['课题编号'].astype(str).tolist()
+    change_journal.mark_dirty_many(added_ids)
+    print(f"已追加 {len(added_ids)} 条课题记录。")
+    return df, added_ids, new_ids[duplicate].tolist()
+
+
 def update_project_status(df, project_id, new_status, folder_path=None):
     """更新指定课题的状态，并重命名文件夹"""
     project_id_str = str(project_id)
-    project_index = df.index[df['课题编号'].astype(str) == project_id_str].tolist()
+    idx = get_project_index(df).locate(df, project_id_str)
 
-    if not project_index:
+    if idx is None:
         print(f"错误: 找不到课题编号 '{project_id_str}'。")
         return df, False, folder_path
 
@@ -234,9 +505,9 @@ def update_project_status(df, project_id, new_status, folder_path=None):
         print(f"错误: 无效的课题状态 '{new_status}'。可选状态: {', '.join(PROJECT_STATUSES)}")
         return df, False, folder_path
 
-    idx = project_index[0]
     old_status = df.loc[idx, '课题状态']
     df.loc[idx, '课题状态'] = new_status
+    _record_changed(df, project_id_str)
     print(f"课题 '{project_id_str}' 的状态已更新为 '{new_status}'。")
 
     if folder_path and old_status != new_status:
@@ -248,6 +519,119 @@ def update_project_status(df, project_id, new_status, folder_path=None):
 
     return df, True, folder_path
 
+def update_projects_status(df, project_ids, new_status, folder_cache):
+    """将多个课题变更为同一状态，见 update_projects_statuses"""
+    return update_projects_statuses(df, {str(p): new_status for p in project_ids}, folder_cache)
+
+@tracing.traced('data.update_status')
+def update_projects_statuses(df, status_by_id, folder_cache):
+    """批量变更课题状态 ({课题编号: 新状态}) 并重命名文件夹，数据与文件夹的修改作为一个整体提交
+
+    先为全部课题生成重命名计划并检查冲突 (有冲突时不做任何修改)，写入重命名日志后并发重命名，
+    再更新数据表并立即保存；重命名或保存失败时撤销已完成的重命名并恢复原状态。
+    返回 (df, 是否成功, 报告)，报告包含 updated、renamed、unchanged、not_found、conflicts、errors、elapsed。
+    """
+    started = time.perf_counter()
+    report = {'updated': [], 'renamed': 0, 'unchanged': [], 'not_found': [],
+              'conflicts': [], 'errors': [], 'elapsed': 0.0}
+    invalid = sorted({status for status in status_by_id.values() if status not in PROJECT_STATUSES}, key=str)
+    if invalid:
+        print(f"错误: 无效的课题状态 '{', '.join(map(str, invalid))}'。可选状态: {', '.join(PROJECT_STATUSES)}")
+        return df, False, report
+
+    id_index = get_project_index(df)
+    targets = []
+    for project_id, new_status in status_by_id.items():
+        project_id = str(project_id)
+        idx = id_index.locate(df, project_id)
+        if idx is None:
+            report['not_found'].append(project_id)
+        elif df.at[idx, '课题状态'] == new_status:
+            report['unchanged'].append(project_id)
+        else:
+            targets.append((project_id, idx, new_status))
+    if report['not_found']:
+        print(f"警告: 找不到以下课题编号，已跳过: {', '.join(report['not_found'])}")
+    if not targets:
+        return df, True, report
+
+    # 1. 生成重命名计划并检查冲突 (提供全部课题编号，含 '-' 的编号才能从文件夹名称中正确解析)
+    folder_index = file_manager.get_folder_index(known_ids=df['课题编号'].astype(str).tolist())
+    items = []
+    for project_id, idx, new_status in targets:
+        folder_path = folder_cache.get(project_id) or folder_index.resolve(project_id)
+        if folder_path:
+            new_name = file_manager.build_project_folder_name(
+                project_id, df.at[idx, '课题名称'], new_status, df.at[idx, '开始年份'])
+            items.append((project_id, folder_path, new_name))
+    plan, conflicts = file_manager.plan_folder_renames(items, folder_index)
+    # 日志中同时记录新状态，中断后恢复时据此判断该重命名的数据是否已经保存
+    new_statuses = {project_id: new_status for project_id, _, new_status in targets}
+    for item in plan:
+        item['status'] = new_statuses[item['project_id']]
+    if conflicts:
+        report['conflicts'] = conflicts
+        for project_id, reason in conflicts:
+            print(f"冲突: 课题 '{project_id}': {reason}")
+        print(f"错误: 批量变更状态存在 {len(conflicts)} 处冲突，未做任何修改。")
+        return df, False, report
+
+    # 之前尚未写入的延迟保存先落盘，避免其旧快照在本次提交之后覆盖新状态
+    flush_pending_saves()
+
+    # 2. 写入日志后并发重命名
+    if plan:
+        try:
+            file_manager.write_rename_journal(plan)
+        except OSError as e:
+            report['errors'].append(('', f"无法写入重命名日志: {e}"))
+            print(f"错误: 无法写入重命名日志，未做任何修改: {e}")
+            return df, False, report
+        ok, errors = file_manager.execute_folder_renames(plan)
+        if not ok:
+            file_manager.clear_rename_journal()
+            report['errors'] = errors
+            print(f"错误: {len(errors)} 个文件夹重命名失败，已撤销本次批量变更的全部重命名。")
+            return df, False, report
+
+    # 3. 更新数据并保存，保存失败时回滚
+    idxs = [idx for _, idx, _ in targets]
+    changed_ids = {project_id for project_id, _, _ in targets}
+    old_statuses = df.loc[idxs, '课题状态'].tolist()
+    df.loc[idxs, '课题状态'] = [new_status for _, _, new_status in targets]
+    if not save_projects_data(df, changed_ids, set()):
+        df.loc[idxs, '课题状态'] = old_statuses
+        if not file_manager.rollback_folder_renames(plan):
+            file_manager.clear_rename_journal()
+        report['errors'].append(('', "保存数据失败"))
+        print("错误: 保存数据失败，已撤销本次批量变更的状态与文件夹重命名。")
+        return df, False, report
+    file_manager.clear_rename_journal()
+
+    if plan:
+        folder_state = file_manager.load_folder_state()
+        for item in plan:
+            folder_cache[item['project_id']] = item['new']
+            entry = folder_state.get(item['project_id'])
+            if entry:
+                entry['path'] = item['new']
+        file_manager.save_folder_state(folder_state)
+
+    # 数据已保存，只通知各派生索引而不再记入待保存的变更
+    change_journal.touch()
+    for project_id, _, _ in targets:
+        _notify_listeners(df, project_id)
+    report['updated'] = [project_id for project_id, _, _ in targets]
+    report['renamed'] = len(plan)
+    report['elapsed'] = time.perf_counter() - started
+    statuses = sorted({new_status for _, _, new_status in targets}, key=PROJECT_STATUSES.index)
+    print(f"已将 {len(targets)} 个课题的状态变更为 '{'、'.join(statuses)}'，重命名 {len(plan)} 个文件夹，"
+          f"用时 {report['elapsed']:.2f} 秒。")
+    return df, True, report
+
+# 含有这些字符的查询按正则表达式处理，不走全文索引
+_REGEX_CHARS = set('.^$*+?{}[]\\|()')
+
 def find_project(df, query, column='课题名称'):
     """根据指定列和查询词查找课题 (大小写不敏感)"""
     if column not in df.columns:
@@ -259,7 +643,15 @@ def find_project(df, query, column='课题名称'):
         return df
 
     try:
-        results = df[df[column].astype(str).str.contains(query, case=False, na=False)]
+        if column in SEARCH_FIELDS and not (set(query) & _REGEX_CHARS) and len(query.split()) == 1:
+            # 普通关键词走全文索引，结果保持表格原有顺序
+            hits = get_search_index(df).search(f"{column}:{query}")
+            id_index = get_project_index(df)
+            positions = (id_index.position(project_id) for project_id, _ in hits)
+            # 索引中已不存在的课题 (过期的检索结果) 跳过
+            results = df.iloc[sorted(pos for pos in positions if pos is not None)]
+        else:
+            results = df[df[column].astype(str).str.contains(query, case=False, na=False)]
         if results.empty:
             print(f"未找到 '{column}' 中包含 '{query}' 的课题。")
         return results
@@ -267,16 +659,27 @@ def find_project(df, query, column='课题名称'):
         print(f"查询课题时出错: {e}")
         return pd.DataFrame(columns=df.columns)
 
+def search_projects(df, query, fields=None):
+    """多字段全文检索课题，按相关度降序返回匹配的记录
+
+    查询词以空格分隔并取交集，可用 '字段:词' 限定字段，词末尾加 '*' 表示前缀匹配。
+    """
+    if query is None or query.strip() == "":
+        return df
+    hits = get_search_index(df).search(query, fields)
+    id_index = get_project_index(df)
+    positions = [id_index.position(project_id) for project_id, _ in hits]
+    return df.iloc[[pos for pos in positions if pos is not None]]
+
 def update_project_record(df, project_id, updated_data, folder_path=None):
     """更新指定课题的记录信息"""
     project_id_str = str(project_id)
-    project_index = df.index[df['课题编号'].astype(str) == project_id_str].tolist()
+    idx = get_project_index(df).locate(df, project_id_str)
 
-    if not project_index:
+    if idx is None:
         print(f"错误: 找不到课题编号 '{project_id_str}' 无法更新。")
         return df, False, folder_path
 
-    idx = project_index[0]
     try:
         budget_changed = False
         start_date_changed = False
@@ -344,6 +747,7 @@ def update_project_record(df, project_id, updated_data, folder_path=None):
             dept_fund = float(df.loc[idx, '所属单位自筹经费'] or 0)
             df.loc[idx, '总预算'] = ext_fund + inst_fund + dept_fund
 
+        _record_changed(df, project_id_str)
         print(f"课题 '{project_id_str}' 的信息已更新。")
         return df, True, folder_path
     except Exception as e:
@@ -355,22 +759,172 @@ def update_project_record(df, project_id, updated_data, folder_path=None):
 def delete_project_record(df, project_id):
     """从 DataFrame 删除指定课题的记录 (不处理文件夹)"""
     project_id_str = str(project_id)
-    initial_len = len(df)
-    df = df[df['课题编号'].astype(str) != project_id_str]
-    if len(df) < initial_len:
-        print(f"课题 '{project_id_str}' 的记录已从数据表中删除。")
+    id_index = get_project_index(df)
+    idx = id_index.locate(df, project_id_str)
+    if idx is not None:
+        if id_index.has_duplicates:
+            # 存在重复编号时删除所有同编号的记录
+            df = df[df['课题编号'].astype(str) != project_id_str]
+            id_index.rebuild(df)
+        else:
+            pos = id_index.position(project_id_str)
+            df = df.drop(index=idx)
+            id_index.remove(df, pos)
         if '序号' in df.columns:
             df['序号'] = range(1, len(df) + 1)
+        _record_changed(df, project_id_str, deleted=True)
+        print(f"课题 '{project_id_str}' 的记录已从数据表中删除。")
         return df, True
     else:
         print(f"错误: 找不到课题编号 '{project_id_str}'，无法删除记录。")
         return df, False
 
+def find_project_row(df, project_id):
+    """按课题编号获取单条记录 (Series)，不存在时返回 None"""
+    idx = get_project_index(df).locate(df, str(project_id))
+    return df.loc[idx] if idx is not None else None
+
+def project_exists(df, project_id):
+    """判断课题编号是否已存在 (大小写不敏感)"""
+    return get_project_index(df).locate(df, str(project_id).strip(), case_sensitive=False) is not None
+
 def get_project_folder_path(df, project_id, folder_cache):
-    """获取指定课题的文件夹路径，从缓存中获取"""
+    """获取指定课题的文件夹路径，先从缓存中获取，再从文件夹索引中查找"""
     project_id_str = str(project_id)
     folder_path = folder_cache.get(project_id_str)
     if folder_path and os.path.isdir(folder_path):
         return folder_path
+    # 缓存中没有或已失效 (如在外部改名) 时从文件夹索引中查找
+    folder_path = file_manager.get_folder_index().resolve(project_id_str)
+    if folder_path and os.path.isdir(folder_path):
+        folder_cache[project_id_str] = folder_path
+        return folder_path
     print(f"信息: 课题 '{project_id_str}' 的文件夹路径未在缓存中找到或无效。")
-    return None
\ No newline at end of file
+    return None
+
+
+def create_file_watcher(on_change):
+    """创建监视课题文件夹根目录与数据文件的 FileSystemWatcher (调用 start() 后开始监视)
+
+    on_change(changes) 在监视线程中调用，changes 由 prepare_file_changes 生成，应交给主线程调用 apply_file_changes。
+    """
+    backend = storage.get_storage_backend()
+    return FileSystemWatcher(PROJECTS_ROOT_DIR, [backend.path],
+                             on_change=lambda paths: on_change(prepare_file_changes(paths)))
+
+def prepare_file_changes(paths):
+    """在监视线程中预处理一批变化路径：数据文件被外部修改时在此重新读取，避免在主线程中解析 Excel"""
+    backend = storage.get_storage_backend()
+    data_file = os.path.abspath(backend.path)
+    paths = {os.path.abspath(path) for path in paths}
+    changes = {'folders': paths - {data_file}, 'table': None}
+    # 本程序自身保存数据文件也会产生变化事件，只有大小或修改时间与最近一次读写不同时才重新读取
+    if data_file in paths and backend.has_external_changes():
+        try:
+            changes['table'], _ = backend.load()
+        except Exception as e:
+            print(f"警告: 重新读取在外部修改的数据文件 '{backend.path}' 失败: {e}")
+    return changes
+
+def apply_file_changes(df, changes, folder_cache):
+    """将外部修改合并到当前数据 (在主线程中调用)，只刷新受影响的记录与课题文件夹缓存
+
+    返回 (df, 新增或更新的课题编号集合, 删除的课题编号集合)。
+    """
+    changed_ids, deleted_ids = set(), set()
+    if changes.get('table') is not None:
+        df, changed_ids, deleted_ids = merge_external_table(df, changes['table'])
+    if changes.get('folders'):
+        refresh_changed_folders(df, changes['folders'], folder_cache)
+    return df, changed_ids, deleted_ids
+
+def _comparable_frame(df):
+    """用于逐条比较的字符串表 (按课题编号索引，不含序号)"""
+    columns = [col for col in EXCEL_COLUMNS if col != '序号' and col in df.columns]
+    frame = df[columns].astype(object)
+    frame = frame.where(frame.notna(), '').astype(str)
+    frame.index = df['课题编号'].astype(str)
+    return frame
+
+def merge_external_table(df, new_df):
+    """将外部修改后重新读取的数据表逐条合并到 df，只修改有差异的记录并通知各派生索引
+
+    尚未保存的本地修改优先，对应记录不会被外部内容覆盖。返回 (df, 新增或更新的课题编号集合, 删除的课题编号集合)。
+    """
+    old_ids = df['课题编号'].astype(str)
+    new_ids = new_df['课题编号'].astype(str)
+    if old_ids.duplicated().any() or new_ids.duplicated().any():
+        # 存在重复编号时无法逐条对应，整体替换
+        print("信息: 数据表中存在重复的课题编号，外部修改将整体替换当前数据。")
+        change_journal.touch()
+        return new_df, set(new_ids), set(old_ids) - set(new_ids)
+
+    old, new = _comparable_frame(df), _comparable_frame(new_df)
+    common = old.index.intersection(new.index)
+    differs = (old.loc[common] != new.loc[common, old.columns]).any(axis=1)
+    pending = pending_change_ids()
+    changed = [pid for pid in common[differs.to_numpy()] if pid not in pending]
+    added = [pid for pid in new.index.difference(old.index, sort=False) if pid not in pending]
+    deleted = {pid for pid in old.index.difference(new.index) if pid not in pending}
+    if not changed and not added and not deleted:
+        return df, set(), set()
+
+    id_index = get_project_index(df)
+    new_positions = dict(zip(new_ids, range(len(new_df))))
+    for project_id in changed:
+        idx = id_index.locate(df, project_id)
+        new_row = new_df.iloc[new_positions[project_id]]
+        for col in old.columns[old.loc[project_id] != new.loc[project_id]]:
+            df.at[idx, col] = new_row[col]
+
+    if deleted:
+        df = df[~old_ids.isin(deleted)]
+    if added:
+        df = pd.concat([df, new_df.iloc[[new_positions[pid] for pid in added]]], ignore_index=True)
+    if (deleted or added) and '序号' in df.columns:
+        df = df.reset_index(drop=True)
+        df['序号'] = range(1, len(df) + 1)
+
+    change_journal.touch()
+    for project_id in changed + added:
+        _notify_listeners(df, project_id)
+    for project_id in deleted:
+        _notify_listeners(df, project_id, deleted=True)
+    print(f"已同步数据文件的外部修改: 更新 {len(changed)} 条，新增 {len(added)} 条，删除 {len(deleted)} 条。")
+    return df, set(changed) | set(added), deleted
+
+def refresh_changed_folders(df, paths, folder_cache):
+    """根据变化的路径只刷新受影响课题的文件夹索引、文件夹缓存与文件夹状态缓存，返回受影响的课题编号集合
+
+    仍有文件夹的课题补全标准子文件夹结构 (在外部改名的文件夹直接沿用)；文件夹被移走或删除的课题
+    只从缓存中移除，下次启动检查时再重新创建。
+    """
+    folder_index = file_manager.get_folder_index(refresh=False)
+    affected = folder_index.apply_changes(paths)
+    ids = df['课题编号'].astype(str)
+    if affected is not None:
+        mask = ids.map(file_manager.sanitize_foldername).isin(affected)
+        rows = df[mask.to_numpy()]
+    else:
+        rows = df
+    if rows.empty:
+        return set()
+
+    existing, missing = [], []
+    for project_id, project_name, status, start_year in zip(
+            rows['课题编号'].astype(str), rows['课题名称'], rows['课题状态'], rows['开始年份']):
+        path = folder_index.resolve(project_id)
+        project = (project_id, project_name, status or '申报', start_year)
+        (existing if path and os.path.isdir(path) else missing).append(project)
+
+    folder_state = file_manager.load_folder_state()
+    results, _ = file_manager.provision_project_folders(existing, folder_state, folder_index=folder_index)
+    for result in results:
+        if result['ok']:
+            folder_cache[result['project_id']] = result['path']
+    for project_id, project_name, _, _ in missing:
+        folder_cache.pop(project_id, None)
+        folder_state.pop(project_id, None)
+        print(f"警告: 课题 '{project_name}' (编号: {project_id}) 的文件夹已被移走或删除，下次启动时将重新创建。")
+    file_manager.save_folder_state(folder_state)
+    return {project[0] for project in existing + missing}
\ No newline at end of file
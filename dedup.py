@@ -0,0 +1,229 @@
+# dedup.py
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import PROJECTS_ROOT_DIR, DEDUP_CACHE_FILE, FOLDER_WORKERS
+from file_manager import parse_project_folder_name
+from inventory import STANDARD_SUBFOLDERS, format_size
+
+# 先比较文件开头这么多字节的哈希，不同的文件大多在此即可区分，无需读完整个文件
+HEAD_BYTES = 64 * 1024
+# 计算完整哈希时每次读取的块大小
+CHUNK_BYTES = 1024 * 1024
+# 不在标准子文件夹中的文件 (课题文件夹根目录或自建文件夹) 的分类名称
+OTHER_CATEGORY = '其他位置'
+
+
+def iter_files(root):
+    """用 os.scandir 遍历目录树，逐个返回 (路径, 大小, 修改时间)"""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            stat = entry.stat()
+                            yield entry.path, stat.st_size, stat.st_mtime_ns
+                    except OSError:
+                        continue
+        except OSError as e:
+            print(f"警告: 无法列出目录 '{directory}': {e}")
+
+
+def hash_file(path, limit=None):
+    """分块计算文件 (或其前 limit 字节) 的 SHA-1"""
+    digest = hashlib.sha1()
+    remaining = limit
+    with open(path, 'rb') as f:
+        while remaining is None or remaining > 0:
+            size = CHUNK_BYTES if remaining is None else min(CHUNK_BYTES, remaining)
+            chunk = f.read(size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def classify_path(path, root=PROJECTS_ROOT_DIR, known_ids=None):
+    """文件所属的 (课题文件夹名称, 课题编号, 分类)；课题编号无法解析时为 None，分类为标准子文件夹名称或 OTHER_CATEGORY"""
+    parts = os.path.relpath(path, root).split(os.sep)
+    folder_name = parts[0]
+    parsed = parse_project_folder_name(folder_name, known_ids)
+    project_id = parsed[2] if parsed else None
+    category = parts[1] if len(parts) > 2 and parts[1] in STANDARD_SUBFOLDERS else OTHER_CATEGORY
+    return folder_name, project_id, category
+
+
+class HashCache:
+    """文件哈希缓存 {路径: [大小, 修改时间, 开头哈希, 完整哈希]}，大小或修改时间变化时失效"""
+
+    def __init__(self, cache_file=DEDUP_CACHE_FILE):
+        self.cache_file = cache_file
+        self.entries = {}
+        self.hits = 0
+        self.computed = 0
+        self._lock = threading.Lock()
+
+    def load(self):
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            self.entries = entries if isinstance(entries, dict) else {}
+        except FileNotFoundError:
+            self.entries = {}
+        except (OSError, ValueError) as e:
+            print(f"警告: 读取文件哈希缓存 '{self.cache_file}' 失败，将重新计算: {e}")
+            self.entries = {}
+        return self
+
+    def save(self, keep_paths=None):
+        """保存缓存；提供 keep_paths 时只保留其中的文件 (删除已不存在的文件的记录)"""
+        if keep_paths is not None:
+            self.entries = {path: entry for path, entry in self.entries.items() if path in keep_paths}
+        try:
+            tmp_file = self.cache_file + '.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False)
+            os.replace(tmp_file, self.cache_file)
+            return True
+        except OSError as e:
+            print(f"警告: 保存文件哈希缓存 '{self.cache_file}' 失败: {e}")
+            return False
+
+    def get(self, path, size, mtime_ns, full):
+        """计算或从缓存中取得文件的开头哈希 (full=False) 或完整哈希 (full=True)"""
+        entry = self.entries.get(path)
+        if not entry or entry[0] != size or entry[1] != mtime_ns:
+            entry = [size, mtime_ns, None, None]
+        slot = 3 if full else 2
+        if entry[slot] is None:
+            entry[slot] = hash_file(path, None if full else HEAD_BYTES)
+            if size <= HEAD_BYTES:
+                # 文件不超过开头部分时两种哈希相同
+                entry[2] = entry[3] = entry[slot]
+            computed = True
+        else:
+            computed = False
+        with self._lock:
+            self.entries[path] = entry
+            if computed:
+                self.computed += 1
+            else:
+                self.hits += 1
+        return entry[slot]
+
+
+def _hash_groups(groups, cache, full, max_workers):
+    """并发计算各候选组内文件的哈希，按 (大小, 哈希) 重新分组，只返回仍有多个文件的组"""
+    files = [f for group in groups for f in group]
+    if not files:
+        return []
+
+    def task(file_info):
+        path, size, mtime_ns = file_info
+        try:
+            return file_info, cache.get(path, size, mtime_ns, full)
+        except OSError as e:
+            print(f"警告: 无法读取文件 '{path}': {e}")
+            return file_info, None
+
+    buckets = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        for file_info, digest in executor.map(task, files):
+            if digest is not None:
+                buckets.setdefault((file_info[1], digest), []).append(file_info)
+    return [group for group in buckets.values() if len(group) > 1]
+
+
+def find_duplicates(root=PROJECTS_ROOT_DIR, cache=None, max_workers=FOLDER_WORKERS, min_size=1):
+    """查找 root 下内容相同的文件，返回 (重复组列表, 汇总)
+
+    先按文件大小分组，只有大小相同的文件才计算哈希：先比较开头 HEAD_BYTES 字节的哈希，仍相同的再分块计算完整哈希。
+    每个重复组为 {'size', 'hash', 'paths'}，paths 按路径排序。
+    """
+    started = time.perf_counter()
+    cache = cache if cache is not None else HashCache().load()
+    by_size = {}
+    seen_paths = set()
+    total_files = 0
+    for path, size, mtime_ns in iter_files(root):
+        total_files += 1
+        seen_paths.add(path)
+        if size >= min_size:
+            by_size.setdefault(size, []).append((path, size, mtime_ns))
+    candidates = [group for group in by_size.values() if len(group) > 1]
+    candidate_files = sum(len(group) for group in candidates)
+
+    head_groups = _hash_groups(candidates, cache, False, max_workers)
+    large = [group for group in head_groups if group[0][1] > HEAD_BYTES]
+    small = [group for group in head_groups if group[0][1] <= HEAD_BYTES]
+    full_groups = small + _hash_groups(large, cache, True, max_workers)
+
+    duplicates = []
+    for group in full_groups:
+        path, size, mtime_ns = group[0]
+        duplicates.append({'size': size, 'hash': cache.entries[path][3] or cache.entries[path][2],
+                           'paths': sorted(p for p, _, _ in group)})
+    duplicates.sort(key=lambda d: -d['size'] * (len(d['paths']) - 1))
+    cache.save(keep_paths=seen_paths)
+
+    summary = {'files': total_files, 'candidates': candidate_files, 'groups': len(duplicates),
+               'hashed': cache.computed, 'cache_hits': cache.hits,
+               'wasted_bytes': sum(d['size'] * (len(d['paths']) - 1) for d in duplicates),
+               'elapsed': time.perf_counter() - started}
+    return duplicates, summary
+
+
+def build_dedup_report(duplicates, root=PROJECTS_ROOT_DIR, known_ids=None):
+    """按课题与 FOLDER_STRUCTURE 分类汇总重复文件
+
+    每组中路径排序最靠前的文件视为原件，其余为多余副本；返回
+    {'projects': {课题文件夹名称: {'project_id', 'files', 'wasted_bytes', 'categories': {分类: {'files', 'wasted_bytes'}}}},
+     'categories': {分类: {'files', 'wasted_bytes'}}}，files 为多余副本数。
+    """
+    projects, categories = {}, {}
+    for group in duplicates:
+        for path in group['paths'][1:]:
+            folder_name, project_id, category = classify_path(path, root, known_ids)
+            project = projects.setdefault(folder_name, {'project_id': project_id, 'files': 0,
+                                                        'wasted_bytes': 0, 'categories': {}})
+            for totals in (project, project['categories'].setdefault(category, {'files': 0, 'wasted_bytes': 0}),
+                           categories.setdefault(category, {'files': 0, 'wasted_bytes': 0})):
+                totals['files'] += 1
+                totals['wasted_bytes'] += group['size']
+    return {'projects': projects, 'categories': categories}
+
+
+def format_dedup_report(duplicates, summary, report, top=20, root=PROJECTS_ROOT_DIR):
+    """将重复文件检查结果格式化为文本行"""
+    lines = [f"重复文件检查: 共 {summary['files']} 个文件，大小相同的候选 {summary['candidates']} 个，"
+             f"计算哈希 {summary['hashed']} 次 (缓存命中 {summary['cache_hits']} 次)，用时 {summary['elapsed']:.2f} 秒。",
+             f"发现 {summary['groups']} 组重复文件，多余副本共占用 {format_size(summary['wasted_bytes'])}。"]
+    if report['categories']:
+        lines.append("")
+        lines.append("按分类:")
+        for category, totals in sorted(report['categories'].items(), key=lambda item: -item[1]['wasted_bytes']):
+            lines.append(f"  {category}: {totals['files']} 个副本，{format_size(totals['wasted_bytes'])}")
+    if report['projects']:
+        lines.append("")
+        lines.append("按课题:")
+        for folder_name, totals in sorted(report['projects'].items(), key=lambda item: -item[1]['wasted_bytes'])[:top]:
+            detail = "，".join(f"{c} {t['files']}" for c, t in sorted(totals['categories'].items()))
+            lines.append(f"  {folder_name}: {totals['files']} 个副本，{format_size(totals['wasted_bytes'])} ({detail})")
+    if duplicates:
+        lines.append("")
+        lines.append("占用空间最多的重复组:")
+        for group in duplicates[:top]:
+            lines.append(f"  {format_size(group['size'])} x {len(group['paths'])}:")
+            lines.extend(f"    {os.path.relpath(path, root)}" for path in group['paths'])
+    return lines
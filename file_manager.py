@@ -1,12 +1,18 @@
 # file_manager.py
+import json
 import os
 import re
 import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
+import tracing
+
 # 从 config 模块导入配置
-from config import PROJECTS_ROOT_DIR
+from config import PROJECTS_ROOT_DIR, FOLDER_STATE_FILE, FOLDER_WORKERS, TRANSITION_JOURNAL_FILE
 
 # 定义文件夹结构，包含 03_过程管理 的子文件夹
 FOLDER_STRUCTURE = [
@@ -28,23 +34,59 @@ def sanitize_foldername(name):
     sanitized_name = sanitized_name.strip()
     return sanitized_name
 
-def create_project_folders(project_id, project_name, status, start_year, custom_path=None):
-    """为新课题创建文件夹结构，使用命名规则：年度-课题状态-课题编号-课题名称"""
+def build_project_folder_name(project_id, project_name, status, start_year):
+    """按命名规则生成课题文件夹名称：年度-课题状态-课题编号-课题名称"""
     sanitized_name = sanitize_foldername(project_name)
     sanitized_id = sanitize_foldername(str(project_id))
     # Use provided start_year or current year if None
     year = str(start_year) if start_year and str(start_year) != '' else str(datetime.now().year)
+    return f"{year}-{status}-{sanitized_id}-{sanitized_name}"
+
+def normalize_folder_status(status):
+    """文件夹名称中使用的状态，无效状态默认为 '申报'"""
+    return status if status and status in ['申报', '已立项', '在研', '中期已过', '已结题', '延期', '中止', '其他'] else '申报'
+
+def get_structure_paths(project_path):
+    """按 FOLDER_STRUCTURE 顺序列出课题文件夹下所有标准子文件夹路径"""
+    paths = []
+    for item in FOLDER_STRUCTURE:
+        if isinstance(item, dict):
+            subfolder_path = os.path.join(project_path, item['name'])
+            paths.append(subfolder_path)
+            paths.extend(os.path.join(subfolder_path, sub) for sub in item['subfolders'])
+        else:
+            paths.append(os.path.join(project_path, item))
+    return paths
+
+def get_fingerprint_paths(project_path):
+    """用于判断文件夹结构是否变化的目录：课题主文件夹及含有子文件夹的标准文件夹"""
+    paths = [project_path]
+    for item in FOLDER_STRUCTURE:
+        if isinstance(item, dict):
+            paths.append(os.path.join(project_path, item['name']))
+    return paths
+
+# 完整检查一个课题文件夹结构所需的 os.path.exists 调用次数 (主文件夹 + 全部标准子文件夹)
+FULL_CHECK_STAT_CALLS = 1 + len(get_structure_paths(''))
+
+def create_project_folders(project_id, project_name, status, start_year, custom_path=None):
+    """为新课题创建文件夹结构，使用命名规则：年度-课题状态-课题编号-课题名称"""
     # Use provided status or default to '申报'
-    status = status if status and status in ['申报', '已立项', '在研', '中期已过', '已结题', '延期', '中止', '其他'] else '申报'
+    status = normalize_folder_status(status)
 
-    folder_name = f"{year}-{status}-{sanitized_id}-{sanitized_name}"
+    folder_name = build_project_folder_name(project_id, project_name, status, start_year)
     # Use custom_path if provided, else default to PROJECTS_ROOT_DIR
     base_path = custom_path if custom_path and os.path.isdir(os.path.dirname(custom_path)) else PROJECTS_ROOT_DIR
     project_path = os.path.join(base_path, folder_name)
+    return ensure_folder_structure(project_path)
 
+def ensure_folder_structure(project_path):
+    """确保课题文件夹及 FOLDER_STRUCTURE 中的标准子文件夹都存在，成功时返回文件夹路径"""
     try:
+        tracing.count('stat_calls', FULL_CHECK_STAT_CALLS)
         if not os.path.exists(project_path):
             os.makedirs(project_path)
+            tracing.count('makedirs')
             print(f"创建课题主文件夹: {project_path}")
         else:
             print(f"信息: 文件夹 '{project_path}' 已存在，检查子文件夹。")
@@ -57,12 +99,14 @@ def create_project_folders(project_id, project_name, status, start_year, custom_
                 subfolder_path = os.path.join(project_path, subfolder_name)
                 if not os.path.exists(subfolder_path):
                     os.makedirs(subfolder_path)
+                    tracing.count('makedirs')
                     print(f"创建子文件夹: {subfolder_path}")
                     created_subfolder = True
                 for sub_subfolder in item['subfolders']:
                     sub_subfolder_path = os.path.join(subfolder_path, sub_subfolder)
                     if not os.path.exists(sub_subfolder_path):
                         os.makedirs(sub_subfolder_path)
+                        tracing.count('makedirs')
                         print(f"创建子子文件夹: {sub_subfolder_path}")
                         created_subfolder = True
             else:
@@ -70,11 +114,14 @@ def create_project_folders(project_id, project_name, status, start_year, custom_
                 subfolder_path = os.path.join(project_path, item)
                 if not os.path.exists(subfolder_path):
                     os.makedirs(subfolder_path)
+                    tracing.count('makedirs')
                     print(f"创建子文件夹: {subfolder_path}")
                     created_subfolder = True
 
         if created_subfolder:
             print(f"已在 '{project_path}' 中补全标准子文件夹。")
+        if _folder_index is not None:
+            _folder_index.add_path(project_path)
         return project_path
     except OSError as e:
         print(f"创建文件夹 '{project_path}' 时发生 OS 错误: {e}")
@@ -83,16 +130,313 @@ def create_project_folders(project_id, project_name, status, start_year, custom_
         print(f"创建文件夹时发生未知错误: {e}")
         return None
 
+def load_folder_state(state_file=FOLDER_STATE_FILE):
+    """读取课题文件夹状态缓存 {课题编号: {'path': 路径, 'mtimes': [目录修改时间]}}"""
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        return state if isinstance(state, dict) else {}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"警告: 读取文件夹状态缓存 '{state_file}' 失败，将重新检查所有课题文件夹: {e}")
+        return {}
+
+def save_folder_state(state, state_file=FOLDER_STATE_FILE):
+    """保存课题文件夹状态缓存"""
+    try:
+        tmp_file = state_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+            tracing.count('bytes_written', f.tell())
+        os.replace(tmp_file, state_file)
+        return True
+    except OSError as e:
+        print(f"警告: 保存文件夹状态缓存 '{state_file}' 失败: {e}")
+        return False
+
+def _read_fingerprint(project_path):
+    """读取指纹目录的修改时间，任一目录不存在时返回 None"""
+    paths = get_fingerprint_paths(project_path)
+    tracing.count('stat_calls', len(paths))
+    try:
+        return [os.stat(path).st_mtime_ns for path in paths]
+    except OSError:
+        return None
+
+def _ensure_one(project_id, project_name, status, start_year, entry, folder_index=None):
+    """检查或创建单个课题的文件夹，返回 (文件夹路径, 是否命中缓存, 跳过的查询次数, 新的缓存记录)
+
+    提供 folder_index 时，若标准名称的文件夹不存在而该课题已有 (在外部改过名的) 文件夹，则沿用该文件夹。
+    """
+    expected_name = build_project_folder_name(project_id, project_name, normalize_folder_status(status), start_year)
+    expected_path = os.path.join(PROJECTS_ROOT_DIR, expected_name)
+    existing_path = folder_index.existing_path_for(project_id, expected_name) if folder_index else None
+    target_path = existing_path or expected_path
+
+    if entry and entry.get('path') == target_path:
+        mtimes = _read_fingerprint(target_path)
+        if mtimes is not None and mtimes == entry.get('mtimes'):
+            return target_path, True, FULL_CHECK_STAT_CALLS - len(mtimes), entry
+
+    if existing_path:
+        print(f"信息: 课题 '{project_id}' 的文件夹名称与命名规则不一致，沿用已有文件夹: {existing_path}")
+        folder_path = ensure_folder_structure(existing_path)
+    else:
+        folder_path = create_project_folders(project_id, project_name, status, start_year)
+    new_entry = None
+    if folder_path:
+        mtimes = _read_fingerprint(folder_path)
+        if mtimes is not None:
+            new_entry = {'path': folder_path, 'mtimes': mtimes}
+    return folder_path, False, 0, new_entry
+
+def ensure_project_folders(project_id, project_name, status, start_year, folder_state):
+    """借助文件夹状态缓存确保课题文件夹结构完整
+
+    缓存中记录的路径与目录修改时间均未变化时跳过完整的 FOLDER_STRUCTURE 检查。
+    返回 (文件夹路径, 是否命中缓存, 跳过的文件状态查询次数)，并就地更新 folder_state。
+    """
+    project_id_str = str(project_id)
+    folder_path, cached, skipped, entry = _ensure_one(
+        project_id, project_name, status, start_year, folder_state.get(project_id_str))
+    if entry:
+        folder_state[project_id_str] = entry
+    else:
+        folder_state.pop(project_id_str, None)
+    return folder_path, cached, skipped
+
+@tracing.traced('folders.provision')
+def provision_project_folders(projects, folder_state=None, max_workers=FOLDER_WORKERS, progress=None,
+                              folder_index=None):
+    """通过有界线程池并发为多个课题检查/创建文件夹结构
+
+    projects 为 (课题编号, 课题名称, 状态, 开始年份) 元组的列表。提供 folder_state 时借助文件夹状态缓存
+    跳过未变化的课题，并在主调线程中更新缓存；提供 folder_index 时沿用课题已有的文件夹而不重复创建。
+    progress(已完成数, 总数) 在每个课题完成后调用。
+    返回 (结果列表, 汇总)：结果与 projects 顺序一致，每项为
+    {'project_id', 'path', 'ok', 'cached', 'seconds', 'error'}；
+    汇总包含 total、succeeded、failed、cached、skipped_stats、elapsed (墙钟秒数)、task_seconds (各课题耗时之和)。
+    """
+    projects = list(projects)
+    states = folder_state if folder_state is not None else {}
+
+    def task(project):
+        project_id, project_name, status, start_year = project
+        started = time.perf_counter()
+        counted = tracing.thread_counters()
+        try:
+            folder_path, cached, skipped, entry = _ensure_one(
+                project_id, project_name, status, start_year, states.get(str(project_id)), folder_index)
+            error = None if folder_path else "无法创建文件夹"
+        except Exception as e:
+            folder_path, cached, skipped, entry, error = None, False, 0, None, str(e)
+        counts = {name: value - counted.get(name, 0) for name, value in tracing.thread_counters().items()
+                  if value != counted.get(name, 0)}
+        return folder_path, cached, skipped, entry, error, time.perf_counter() - started, counts
+
+    results = [None] * len(projects)
+    summary = {'total': len(projects), 'succeeded': 0, 'failed': 0, 'cached': 0,
+               'skipped_stats': 0, 'elapsed': 0.0, 'task_seconds': 0.0}
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {executor.submit(task, project): i for i, project in enumerate(projects)}
+        for done, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            project_id_str = str(projects[i][0])
+            folder_path, cached, skipped, entry, error, seconds, counts = future.result()
+            # 工作线程中的 stat/makedirs 计数计入主调线程的计时区间
+            tracing.credit(counts)
+            results[i] = {'project_id': project_id_str, 'path': folder_path, 'ok': folder_path is not None,
+                          'cached': cached, 'seconds': seconds, 'error': error}
+            if folder_state is not None:
+                if entry:
+                    folder_state[project_id_str] = entry
+                else:
+                    folder_state.pop(project_id_str, None)
+            summary['succeeded' if folder_path else 'failed'] += 1
+            summary['cached'] += int(cached)
+            summary['skipped_stats'] += skipped
+            summary['task_seconds'] += seconds
+            if progress:
+                progress(done, len(projects))
+    summary['elapsed'] = time.perf_counter() - started
+    return results, summary
+
+# 文件夹名称 "年度-状态-编号-名称" 中年度与状态部分的格式
+_FOLDER_NAME_PATTERN = re.compile(
+    r'^(?P<year>\d{4})-(?P<status>申报|已立项|在研|中期已过|已结题|延期|中止|其他)-(?P<rest>.+)$')
+
+def parse_project_folder_name(folder_name, known_ids=None):
+    """解析 "年度-状态-编号-名称" 格式的文件夹名称，返回 (年度, 状态, 编号, 名称)，不符合格式时返回 None
+
+    编号与名称中都可能含有 '-'：提供 known_ids (已清理的课题编号集合) 时取能匹配的最长编号，否则以第一个 '-' 分隔。
+    """
+    match = _FOLDER_NAME_PATTERN.match(folder_name)
+    if not match:
+        return None
+    rest = match.group('rest')
+    split_positions = [i for i, ch in enumerate(rest) if ch == '-']
+    if not split_positions:
+        return match.group('year'), match.group('status'), rest, ''
+    pos = split_positions[0]
+    if known_ids:
+        matches = [i for i in split_positions if rest[:i] in known_ids]
+        if matches:
+            pos = matches[-1]
+    return match.group('year'), match.group('status'), rest[:pos], rest[pos + 1:]
+
+class ProjectFolderIndex:
+    """对 PROJECTS_ROOT_DIR 做一次 os.scandir 列目录，按命名规则建立 课题编号 -> 文件夹路径 的索引
+
+    根目录修改时间未变化时 refresh() 只需一次 stat；创建、重命名文件夹时通过 add_path/remove_path 增量更新，
+    更新由内部的锁串行化，可以在线程池的工作线程中调用。
+    """
+
+    def __init__(self, root=PROJECTS_ROOT_DIR, known_ids=None):
+        self.root = root
+        self.known_ids = {sanitize_foldername(str(i)) for i in known_ids} if known_ids else set()
+        self.paths = {}  # 已清理的课题编号 -> 文件夹路径
+        self.names = set()  # 根目录下全部子文件夹名称
+        self.duplicates = {}  # 已清理的课题编号 -> 其余同编号的文件夹路径
+        self.root_mtime_ns = None
+        # 批量创建、重命名文件夹时各工作线程会并发更新索引
+        self._lock = threading.RLock()
+
+    @tracing.traced('folders.index_scan')
+    def scan(self):
+        """重新列出根目录 (一次 os.scandir)"""
+        with self._lock:
+            self.paths.clear()
+            self.names.clear()
+            self.duplicates.clear()
+            try:
+                self.root_mtime_ns = os.stat(self.root).st_mtime_ns
+                with os.scandir(self.root) as entries:
+                    for entry in entries:
+                        if entry.is_dir():
+                            self.add_path(entry.path)
+            except FileNotFoundError:
+                self.root_mtime_ns = None
+            except OSError as e:
+                print(f"警告: 扫描课题文件夹根目录 '{self.root}' 失败: {e}")
+            return self
+
+    def refresh(self):
+        """根目录修改时间变化 (有文件夹新增、删除或改名) 时重新扫描，返回是否重新扫描"""
+        try:
+            mtime_ns = os.stat(self.root).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        if mtime_ns == self.root_mtime_ns:
+            return False
+        self.scan()
+        return True
+
+    def add_known_ids(self, project_ids):
+        self.known_ids.update(sanitize_foldername(str(i)) for i in project_ids)
+
+    def add_path(self, path):
+        """记录一个课题文件夹 (只处理根目录下符合命名规则的文件夹)"""
+        with self._lock:
+            if os.path.dirname(os.path.abspath(path)) != os.path.abspath(self.root):
+                return
+            folder_name = os.path.basename(path)
+            self.names.add(folder_name)
+            parsed = parse_project_folder_name(folder_name, self.known_ids)
+            if parsed is None:
+                return
+            sanitized_id = parsed[2]
+            current = self.paths.get(sanitized_id)
+            if current is None or current == path:
+                self.paths[sanitized_id] = path
+            else:
+                self.duplicates.setdefault(sanitized_id, set()).add(path)
+
+    def remove_path(self, path):
+        """移除一个已不存在的课题文件夹"""
+        with self._lock:
+            folder_name = os.path.basename(path)
+            self.names.discard(folder_name)
+            parsed = parse_project_folder_name(folder_name, self.known_ids)
+            if parsed is None:
+                return
+            sanitized_id = parsed[2]
+            others = self.duplicates.get(sanitized_id)
+            if others:
+                others.discard(path)
+            if self.paths.get(sanitized_id) == path:
+                if others:
+                    self.paths[sanitized_id] = others.pop()
+                else:
+                    del self.paths[sanitized_id]
+            if others is not None and not others:
+                del self.duplicates[sanitized_id]
+
+    def apply_changes(self, paths):
+        """按监视到的变化路径增量更新索引，返回受影响的已清理课题编号集合
+
+        路径可以位于课题文件夹内部，按其所在的课题文件夹处理；包含根目录本身 (如事件队列溢出) 时
+        重新扫描整个根目录并返回 None，表示所有课题都可能受影响。
+        """
+        with self._lock:
+            root = os.path.abspath(self.root)
+            folders = set()
+            for path in paths:
+                relative = os.path.relpath(os.path.abspath(path), root)
+                if relative == os.curdir:
+                    self.scan()
+                    return None
+                if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+                    continue
+                folders.add(os.path.join(root, relative.split(os.sep)[0]))
+
+            affected = set()
+            for folder in folders:
+                if os.path.isdir(folder):
+                    self.add_path(folder)
+                else:
+                    self.remove_path(folder)
+                parsed = parse_project_folder_name(os.path.basename(folder), self.known_ids)
+                if parsed is not None:
+                    affected.add(parsed[2])
+            try:
+                self.root_mtime_ns = os.stat(root).st_mtime_ns
+            except OSError:
+                self.root_mtime_ns = None
+            return affected
+
+    def resolve(self, project_id):
+        """返回课题的文件夹路径，索引中没有时返回 None"""
+        return self.paths.get(sanitize_foldername(str(project_id)))
+
+    def existing_path_for(self, project_id, expected_name):
+        """标准名称的文件夹不存在而课题已有其他名称的文件夹时返回该路径，否则返回 None"""
+        if expected_name in self.names:
+            return None
+        return self.resolve(project_id)
+
+_folder_index = None
+
+def get_folder_index(known_ids=None, refresh=True):
+    """获取课题文件夹索引 (进程内单例)，首次调用时扫描根目录，之后按需刷新"""
+    global _folder_index
+    if _folder_index is None:
+        _folder_index = ProjectFolderIndex(known_ids=known_ids).scan()
+    else:
+        if known_ids:
+            _folder_index.add_known_ids(known_ids)
+        if refresh:
+            _folder_index.refresh()
+    return _folder_index
+
 def rename_project_folder(old_path, project_id, project_name, new_status, start_year):
     """根据新状态重命名课题文件夹"""
     if not old_path or not os.path.exists(old_path):
         print(f"错误: 原文件夹路径 '{old_path}' 不存在或无效。")
         return None
 
-    sanitized_name = sanitize_foldername(project_name)
-    sanitized_id = sanitize_foldername(str(project_id))
-    year = str(start_year) if start_year and str(start_year) != '' else str(datetime.now().year)
-    new_folder_name = f"{year}-{new_status}-{sanitized_id}-{sanitized_name}"
+    new_folder_name = build_project_folder_name(project_id, project_name, new_status, start_year)
     new_path = os.path.join(os.path.dirname(old_path), new_folder_name)
 
     try:
@@ -104,6 +448,9 @@ def rename_project_folder(old_path, project_id, project_name, new_status, start_
             return old_path
         os.rename(old_path, new_path)
         print(f"文件夹已从 '{old_path}' 重命名为 '{new_path}'")
+        if _folder_index is not None:
+            _folder_index.remove_path(old_path)
+            _folder_index.add_path(new_path)
         return new_path
     except OSError as e:
         print(f"重命名文件夹从 '{old_path}' 到 '{new_path}' 时发生 OS 错误: {e}")
@@ -112,6 +459,123 @@ def rename_project_folder(old_path, project_id, project_name, new_status, start_
         print(f"重命名文件夹时发生未知错误: {e}")
         return old_path
 
+def plan_folder_renames(items, folder_index=None):
+    """为批量重命名预先生成计划并检查冲突，不修改任何文件夹
+
+    items 为 (课题编号, 原文件夹路径, 新文件夹名称) 的列表。提供 folder_index 时，根目录下的目标名称
+    直接在索引中查找而无需逐个 os.path.exists。返回 (计划, 冲突)：计划为 {'project_id', 'old', 'new'} 的列表
+    (名称未变化的课题不在其中)，冲突为 (课题编号, 原因) 的列表。
+    """
+    root = os.path.abspath(PROJECTS_ROOT_DIR)
+    plan, conflicts = [], []
+    targets = {}
+    for project_id, old_path, new_name in items:
+        project_id_str = str(project_id)
+        if not old_path or not os.path.isdir(old_path):
+            conflicts.append((project_id_str, f"原文件夹 '{old_path}' 不存在"))
+            continue
+        new_path = os.path.join(os.path.dirname(old_path), new_name)
+        if new_path == old_path:
+            continue
+        if new_path in targets:
+            conflicts.append((project_id_str, f"目标文件夹与课题 '{targets[new_path]}' 相同: {new_path}"))
+            continue
+        if folder_index is not None and os.path.dirname(os.path.abspath(new_path)) == root:
+            exists = new_name in folder_index.names
+        else:
+            exists = os.path.exists(new_path)
+        if exists:
+            conflicts.append((project_id_str, f"目标文件夹 '{new_path}' 已存在"))
+            continue
+        targets[new_path] = project_id_str
+        plan.append({'project_id': project_id_str, 'old': old_path, 'new': new_path})
+    return plan, conflicts
+
+def write_rename_journal(plan, journal_file=TRANSITION_JOURNAL_FILE):
+    """在执行重命名前写入日志 (先写临时文件再替换)，提交完成后由 clear_rename_journal 删除"""
+    tmp_file = journal_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump({'renames': plan}, f, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, journal_file)
+
+def clear_rename_journal(journal_file=TRANSITION_JOURNAL_FILE):
+    try:
+        os.remove(journal_file)
+    except FileNotFoundError:
+        pass
+
+def _rename_many(pairs, max_workers=FOLDER_WORKERS):
+    """通过线程池并发执行 (原路径, 新路径) 的重命名，返回 (成功的 pairs, [(pair, 错误)])"""
+    def task(pair):
+        old_path, new_path = pair
+        os.rename(old_path, new_path)
+        if _folder_index is not None:
+            _folder_index.remove_path(old_path)
+            _folder_index.add_path(new_path)
+
+    done, failed = [], []
+    if not pairs:
+        return done, failed
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pairs)))) as executor:
+        futures = {executor.submit(task, pair): pair for pair in pairs}
+        for future in as_completed(futures):
+            pair = futures[future]
+            try:
+                future.result()
+                done.append(pair)
+            except OSError as e:
+                failed.append((pair, e))
+    return done, failed
+
+@tracing.traced('folders.rename')
+def execute_folder_renames(plan, max_workers=FOLDER_WORKERS):
+    """并发执行重命名计划；任一重命名失败时撤销已完成的重命名，返回 (是否全部成功, [(课题编号, 错误)])"""
+    by_pair = {(item['old'], item['new']): item['project_id'] for item in plan}
+    done, failed = _rename_many(list(by_pair), max_workers)
+    if failed:
+        rollback_folder_renames([{'old': old, 'new': new} for old, new in done], max_workers)
+        return False, [(by_pair[pair], str(e)) for pair, e in failed]
+    return True, []
+
+def rollback_folder_renames(plan, max_workers=FOLDER_WORKERS):
+    """撤销重命名：把仍在新路径、原路径空闲的文件夹改回原名称，返回未能撤销的 [(新路径, 错误)]"""
+    pairs = [(item['new'], item['old']) for item in plan
+             if os.path.isdir(item['new']) and not os.path.exists(item['old'])]
+    _, failed = _rename_many(pairs, max_workers)
+    for (new_path, old_path), e in failed:
+        print(f"错误: 无法将文件夹 '{new_path}' 恢复为 '{old_path}': {e}")
+    return [(pair[0], str(e)) for pair, e in failed]
+
+def recover_rename_journal(saved_statuses=None, journal_file=TRANSITION_JOURNAL_FILE):
+    """启动时处理上次中断的批量状态变更，撤销数据未保存的课题的文件夹重命名。返回撤销的数量
+
+    saved_statuses 为已保存数据中的 {课题编号: 课题状态}：日志项的新状态已经保存 (在保存之后、删除日志之前中断)
+    的重命名已经提交，予以保留；未提供时撤销日志中的全部重命名。
+    """
+    try:
+        with open(journal_file, 'r', encoding='utf-8') as f:
+            plan = json.load(f).get('renames', [])
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError, AttributeError) as e:
+        print(f"警告: 读取重命名日志 '{journal_file}' 失败: {e}")
+        return 0
+    if saved_statuses is not None:
+        pending = [item for item in plan
+                   if 'status' not in item or saved_statuses.get(item['project_id']) != item['status']]
+        if len(pending) < len(plan):
+            print(f"信息: 上次批量状态变更中 {len(plan) - len(pending)} 个课题的新状态已保存，保留其文件夹重命名。")
+        plan = pending
+    if plan:
+        print(f"信息: 发现未完成的批量状态变更，正在撤销 {len(plan)} 个文件夹重命名。")
+    failed = rollback_folder_renames(plan)
+    if not failed:
+        clear_rename_journal(journal_file)
+    # 有未能撤销的重命名时保留日志，下次启动时再次尝试
+    return len(plan) - len(failed)
+
 def open_folder(folder_path):
     """在文件资源管理器中打开文件夹"""
     if not folder_path or not isinstance(folder_path, str):
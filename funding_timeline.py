@@ -0,0 +1,76 @@
+# funding_timeline.py
+import numpy as np
+import pandas as pd
+
+# 课题的实际结束日期按此顺序取第一个非空值：已结题的取结题时间，延期的取延期时间，否则为计划结束日期
+END_DATE_COLUMNS = ['实际结题时间', '延期时间', '计划结束日期']
+# 时间分布图中单独显示的分组数，其余分组合并为 OTHER_GROUP
+MAX_TIMELINE_GROUPS = 8
+OTHER_GROUP = '其他'
+
+
+def _month_numbers(values):
+    """'YYYY-MM-DD' 字符串列转为自 1970-01 起的月序号数组，空值或无法解析时为 -1"""
+    dates = pd.to_datetime(values, errors='coerce').to_numpy(dtype='datetime64[M]')
+    valid = ~np.isnat(dates)
+    months = np.full(len(dates), -1, dtype=np.int64)
+    months[valid] = dates[valid].astype(np.int64)
+    return months
+
+
+def effective_end_months(df):
+    """各课题实际结束月份的月序号 (考虑结题与延期)，均为空时为 -1"""
+    end = np.full(len(df), -1, dtype=np.int64)
+    for column in reversed(END_DATE_COLUMNS):
+        if column in df.columns:
+            months = _month_numbers(df[column])
+            end = np.where(months >= 0, months, end)
+    return end
+
+
+def monthly_funding(df, measure='总预算', by=None):
+    """将每个课题的 measure 经费平均分摊到开始月份至实际结束月份 (含) 的各月，返回按月汇总的 DataFrame
+
+    行为各月第一天 (DatetimeIndex)，列为 by 列的各取值 (by 为 None 时只有一列 measure)。
+    缺少开始日期或经费为 0 的课题不计入；缺少结束日期或结束早于开始时全部计入开始月份。
+    通过差分数组与 np.add.at 累加各课题的起止月份，不逐行展开月份。
+    """
+    start = _month_numbers(df['开始日期']) if '开始日期' in df.columns else np.full(len(df), -1, dtype=np.int64)
+    end = effective_end_months(df)
+    amount = pd.to_numeric(df[measure], errors='coerce').fillna(0).to_numpy(dtype=float)
+    valid = (start >= 0) & (amount != 0)
+    end = np.where(end >= start, end, start)
+
+    if by is None:
+        codes, groups = np.zeros(len(df), dtype=np.int64), pd.Index([measure])
+    else:
+        codes, groups = pd.factorize(df[by].fillna('').astype(str), sort=True)
+        groups = pd.Index(groups, name=by)
+    start, end, amount, codes = start[valid], end[valid], amount[valid], codes[valid]
+    if not len(start):
+        return pd.DataFrame(columns=groups, index=pd.DatetimeIndex([], name='月份'), dtype=float)
+
+    first, last = start.min(), end.max()
+    per_month = amount / (end - start + 1)
+    diff = np.zeros((len(groups), last - first + 2))
+    np.add.at(diff, (codes, start - first), per_month)
+    np.add.at(diff, (codes, end - first + 1), -per_month)
+    totals = np.cumsum(diff, axis=1)[:, :-1]
+
+    months = np.arange(first, last + 1).astype('datetime64[M]').astype('datetime64[ns]')
+    return pd.DataFrame(totals.T, index=pd.DatetimeIndex(months, name='月份'), columns=groups)
+
+
+def yearly_funding(monthly):
+    """按年汇总 monthly_funding 的结果"""
+    return monthly.groupby(monthly.index.year).sum().rename_axis('年份')
+
+
+def top_groups(monthly, limit=MAX_TIMELINE_GROUPS):
+    """保留经费合计最多的 limit - 1 个分组，其余合并为 OTHER_GROUP 列"""
+    if len(monthly.columns) <= limit:
+        return monthly
+    order = monthly.sum().sort_values(ascending=False).index
+    kept = monthly[order[:limit - 1]].copy()
+    kept[OTHER_GROUP] = monthly[order[limit - 1:]].sum(axis=1)
+    return kept
@@ -1,12 +1,26 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import pandas as pd
 import os
+import queue
 from datetime import datetime
 import re
-from tkcalendar import DateEntry
-from data_manager import load_projects_data, save_projects_data, add_new_project, update_project, delete_project
-from file_manager import create_project_folders, open_folder
+from table_view import VirtualTreeview, build_display_rows, column_sort_key
+from background_loader import BackgroundLoader, run_in_background
+from inventory import INVENTORY_COLUMNS, get_inventory, inventory_display_values, inventory_sort_values
+from lazy_import import lazy_module, prewarm
+from config import (EXCEL_COLUMNS, PROJECT_STATUSES, PROJECT_TYPES, PROJECT_LEVELS, PROJECT_CHARACTER, PROJECT_AUTHOR,
+                    PREWARM_ANALYSIS_MODULES, WATCH_FILE_CHANGES)
+
+# pandas、tkcalendar 与数据层在首次使用时才导入，主窗口无需等待它们加载
+pd = lazy_module('pandas')
+tkcalendar = lazy_module('tkcalendar')
+data_manager = lazy_module('data_manager')
+bulk_import = lazy_module('bulk_import')
+
+# 主列表的列：数据表各列之后是课题文件夹的文档清单
+DISPLAY_COLUMNS = EXCEL_COLUMNS + INVENTORY_COLUMNS
+# 课题对话框中的日期字段
+DATE_FIELDS = ["开始日期", "计划结束日期", "延期时间", "实际结题时间"]
 
 
 # ... (Other imports and code unchanged)
@@ -52,17 +66,25 @@ class ProjectDialog:
         form_frame = ttk.Frame(self.scrollable_frame)
         form_frame.pack(fill=tk.X, padx=10, pady=10)
 
+        # 字段名即数据表的列名
         fields = [
             ("课题编号", "entry"),
             ("课题名称", "entry"),
-            ("负责人", "entry"),
-            ("课题状态", "combobox", ["申报", "已立项", "在研", "中期已过", "已结题", "延期", "中止"]),
-            ("申报日期", "date"),
-            ("立项日期", "date"),
-            ("计划开始日期", "date"),
-            ("计划结题日期", "date"),
-            ("实际结题日期", "date"),
-            ("备注", "text"),
+            ("课题负责人", "entry"),
+            ("课题联系人", "entry"),
+            ("承担单位", "combobox", PROJECT_AUTHOR),
+            ("归口单位", "entry"),
+            ("课题级别", "combobox", PROJECT_LEVELS),
+            ("课题类型", "combobox", PROJECT_TYPES),
+            ("参与角色", "combobox", PROJECT_CHARACTER),
+            ("课题状态", "combobox", PROJECT_STATUSES),
+            ("开始日期", "date"),
+            ("计划结束日期", "date"),
+            ("延期时间", "date"),
+            ("实际结题时间", "date"),
+            ("外部专项经费", "entry"),
+            ("院自筹经费", "entry"),
+            ("所属单位自筹经费", "entry"),
         ]
 
         self.entries = {}
@@ -80,8 +102,10 @@ class ProjectDialog:
                 entry.grid(row=row, column=1, sticky=tk.W, pady=5)
                 self.entries[field_name] = entry
             elif field_type == "date":
-                entry = DateEntry(form_frame, width=47, date_pattern="yyyy-mm-dd")
+                entry = tkcalendar.DateEntry(form_frame, width=47, date_pattern="yyyy-mm-dd")
                 entry.grid(row=row, column=1, sticky=tk.W, pady=5)
+                # 日期可以为空 (如尚未延期、尚未结题)，不默认填入今天
+                entry.delete(0, tk.END)
                 self.entries[field_name] = entry
             elif field_type == "text":
                 entry = tk.Text(form_frame, width=50, height=4)
@@ -99,23 +123,27 @@ class ProjectDialog:
 
         # Load existing project data if editing
         if project_id:
-            project = app.projects_df[app.projects_df['课题编号'].astype(str) == str(project_id)]
-            if not project.empty:
-                row = project.iloc[0]
+            self.entries["课题编号"].insert(0, str(project_id))
+            self.entries["课题编号"].configure(state="readonly")
+            row = data_manager.find_project_row(app.projects_df, project_id)
+            if row is not None:
                 for field in self.entries:
                     value = row.get(field, "")
-                    if pd.notna(value):
-                        if isinstance(self.entries[field], tk.Text):
-                            self.entries[field].delete("1.0", tk.END)
-                            self.entries[field].insert("1.0", str(value))
-                        elif isinstance(self.entries[field], DateEntry):
-                            try:
-                                self.entries[field].set_date(value)
-                            except:
-                                self.entries[field].set_date("")
-                        else:
+                    if field == "课题编号" or pd.isna(value) or str(value) == "":
+                        continue
+                    if isinstance(self.entries[field], tk.Text):
+                        self.entries[field].delete("1.0", tk.END)
+                        self.entries[field].insert("1.0", str(value))
+                    elif isinstance(self.entries[field], tkcalendar.DateEntry):
+                        try:
+                            self.entries[field].set_date(value)
+                        except (ValueError, TypeError):
                             self.entries[field].delete(0, tk.END)
-                            self.entries[field].insert(0, str(value))
+                    else:
+                        self.entries[field].delete(0, tk.END)
+                        self.entries[field].insert(0, str(value))
+        else:
+            self.entries["课题状态"].set("申报")
 
         # Ensure dialog is centered
         self.dialog.update_idletasks()
@@ -140,67 +168,48 @@ class ProjectDialog:
         for field, entry in self.entries.items():
             if isinstance(entry, tk.Text):
                 value = entry.get("1.0", tk.END).strip()
-            elif isinstance(entry, DateEntry):
+            elif isinstance(entry, tkcalendar.DateEntry):
                 value = entry.get() or None
             else:
                 value = entry.get().strip() or None
             data[field] = value
 
-        if not data["课题编号"] or not data["课题名称"] or not data["负责人"]:
-            messagebox.showerror("错误", "课题编号、课题名称和负责人为必填项！", parent=self.dialog)
+        if not data["课题编号"] or not data["课题名称"] or not data["课题负责人"]:
+            messagebox.showerror("错误", "课题编号、课题名称和课题负责人为必填项！", parent=self.dialog)
             return
 
-        date_fields = ["申报日期", "立项日期", "计划开始日期", "计划结题日期", "实际结题日期"]
         date_format = r'^\d{4}-\d{2}-\d{2}$'
-        for field in date_fields:
+        for field in DATE_FIELDS:
             if data[field] and not re.match(date_format, data[field]):
                 messagebox.showerror("错误", f"{field} 格式不正确，请使用 YYYY-MM-DD 格式！", parent=self.dialog)
                 return
 
         project_id = data["课题编号"]
         if not self.project_id:  # New project
-            if not self.app.projects_df['课题编号'].astype(str).str.fullmatch(str(project_id)).empty:
+            if data_manager.project_exists(self.app.projects_df, project_id):
                 messagebox.showerror("错误", f"课题编号 '{project_id}' 已存在！", parent=self.dialog)
                 return
-            start_year = data["申报日期"][:4] if data["申报日期"] else str(datetime.now().year)
-            folder_path = create_project_folders(project_id, data["课题名称"], data["课题状态"], start_year)
-            if not folder_path:
-                messagebox.showerror("错误", f"无法创建课题文件夹！", parent=self.dialog)
-                return
-            data["课题文件夹路径"] = folder_path
-            self.app.projects_df, success = add_new_project(
-                self.app.projects_df,
-                project_id,
-                data["课题名称"],
-                data["负责人"],
-                data["课题状态"],
-                data["申报日期"],
-                data["立项日期"],
-                data["计划开始日期"],
-                data["计划结题日期"],
-                data["实际结题日期"],
-                data["备注"],
-                folder_path
-            )
+            # 文件夹名称中的年度取自开始日期
+            data["开始年份"] = data["开始日期"][:4] if data["开始日期"] else str(datetime.now().year)
+            self.app.projects_df, success, folder_path = data_manager.add_project_record(self.app.projects_df, data)
+            if success:
+                self.app.folder_cache[project_id] = folder_path
         else:  # Update existing project
-            self.app.projects_df, success = update_project(
-                self.app.projects_df,
-                project_id,
-                data["课题名称"],
-                data["负责人"],
-                data["课题状态"],
-                data["申报日期"],
-                data["立项日期"],
-                data["计划开始日期"],
-                data["计划结题日期"],
-                data["实际结题日期"],
-                data["备注"]
-            )
+            new_status = data.pop("课题状态")
+            folder_path = self.app.folder_cache.get(project_id)
+            self.app.projects_df, success, _ = data_manager.update_project_record(
+                self.app.projects_df, project_id, data, folder_path)
+            row = data_manager.find_project_row(self.app.projects_df, project_id)
+            if success and new_status and row is not None and row['课题状态'] != new_status:
+                # 状态变更同时重命名课题文件夹，并立即保存
+                self.app.projects_df, success, _ = data_manager.update_projects_status(
+                    self.app.projects_df, [project_id], new_status, self.app.folder_cache)
 
         if success:
             self.data_changed = True
             self.app.refresh_treeview()
-            save_projects_data(self.app.projects_df)
+            # 延迟批量保存，连续编辑时只在空闲后写入变更的记录
+            data_manager.schedule_save(self.app.projects_df)
             messagebox.showinfo("成功", "课题信息已保存！", parent=self.dialog)
             self.dialog.destroy()
         else:
@@ -220,21 +229,237 @@ class Application:
         self.root.title("科研课题管理系统")
         self.root.geometry("1200x800")
 
-        self.projects_df = load_projects_data()
+        # 数据在后台线程加载，主循环立即启动；加载完成前显示空表
+        self.projects_df = None
+        self.folder_cache = {}
         self.data_changed = False
+        self.watcher = None
+        self.file_changes = queue.Queue()
+        self._inventory_running = False
 
         self.create_widgets()
         self.refresh_treeview()
 
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
 
-    def create_widgets(self):
-        # ... (Unchanged widget creation code)
-        pass
+        self.loader = BackgroundLoader(
+            self.root,
+            on_table=self._on_table_loaded,
+            on_rows=self._on_rows_loaded,
+            on_progress=self.status_var.set,
+            on_done=self._on_load_done,
+            on_error=self._on_load_failed,
+        )
+        self.loader.start()
+
+    def _on_table_loaded(self, df, rows_ready):
+        """数据表读取完成：rows_ready 为 True 时各行已在解析过程中显示，否则清空列表，显示行随后按块到达"""
+        self.projects_df = df
+        if not rows_ready:
+            self.display_rows = {}
+            self.table.set_rows([], [])
+        # 数据层已由后台线程导入，此时注册不会阻塞界面
+        data_manager.add_change_listener(self._on_record_changed)
+
+    def _on_rows_loaded(self, keys, rows):
+        """后台线程生成的一块显示行，追加到列表末尾"""
+        rows = self._with_inventory(keys, rows)
+        self.display_rows.update(zip(keys, rows))
+        self.table.extend_rows(keys, rows)
+
+    def _on_load_done(self, folder_cache):
+        self.folder_cache = folder_cache
+        if self.projects_df is None:
+            return
+        self.status_var.set(f"共 {len(self.projects_df)} 条课题记录")
+        if WATCH_FILE_CHANGES:
+            self._start_file_watcher()
+        self.refresh_inventory()
+        if PREWARM_ANALYSIS_MODULES:
+            # 主窗口空闲后在后台预加载绘图模块，首次打开分析窗口时无需等待
+            import analysis
+            prewarm(analysis.PLOTTING_MODULES, self.root)
+
+    def _on_load_failed(self, error):
+        """后台加载出错：状态栏保留错误信息，不启动文件监视与文档统计"""
+        self.status_var.set(f"加载失败: {error}")
+        messagebox.showerror("加载失败", f"加载课题数据时发生错误: {error}")
+
+    def _start_file_watcher(self):
+        """监视课题文件夹与数据文件：同事在文件夹或 Excel 中的修改无需重启即可同步"""
+        self.watcher = data_manager.create_file_watcher(self.file_changes.put).start()
+        self.root.after(200, self._poll_file_changes)
+
+    def _poll_file_changes(self):
+        """在 Tk 主线程中合并监视线程送来的外部修改，只刷新受影响的行"""
+        while True:
+            try:
+                changes = self.file_changes.get_nowait()
+            except queue.Empty:
+                break
+            df, changed_ids, deleted_ids = data_manager.apply_file_changes(self.projects_df, changes, self.folder_cache)
+            if df is not self.projects_df:
+                self.projects_df = df
+                self.display_rows = {}
+                self.search_projects()
+            if changed_ids or deleted_ids:
+                self.status_var.set(f"已同步外部修改: {len(changed_ids)} 条新增或更新，{len(deleted_ids)} 条删除")
+            if changes['folders']:
+                get_inventory().invalidate(changes['folders'])
+                self.refresh_inventory()
+        if self.watcher is not None:
+            self.root.after(200, self._poll_file_changes)
 
-    def refresh_treeview(self):
-        # ... (Unchanged treeview refresh code)
-        pass
+    def create_widgets(self):
+        # 工具栏：边输入边检索与常用操作
+        toolbar = ttk.Frame(self.root, padding=(10, 5))
+        toolbar.pack(side=tk.TOP, fill=tk.X)
+        ttk.Label(toolbar, text="检索:").pack(side=tk.LEFT)
+        self.search_entry = ttk.Entry(toolbar, width=40)
+        self.search_entry.pack(side=tk.LEFT, padx=(0, 10))
+        self.search_entry.bind('<KeyRelease>', self.search_projects)
+        ttk.Button(toolbar, text="添加课题", command=self.add_project).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="批量导入", command=self.import_projects).pack(side=tk.LEFT, padx=2)
+        # 程序关闭期间被原地覆盖的文件不改变目录修改时间，需手动重新统计
+        ttk.Button(toolbar, text="重新统计文档", command=lambda: self.refresh_inventory(rescan=True)).pack(
+            side=tk.LEFT, padx=2)
+        status_button = ttk.Menubutton(toolbar, text="变更状态")
+        status_menu = tk.Menu(status_button, tearoff=0)
+        for status in PROJECT_STATUSES:
+            status_menu.add_command(label=status, command=lambda s=status: self.change_selected_status(s))
+        status_button['menu'] = status_menu
+        status_button.pack(side=tk.LEFT, padx=2)
+
+        # 状态栏
+        self.status_var = tk.StringVar(value="正在加载课题数据...")
+        ttk.Label(self.root, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W,
+                  padding=(5, 2)).pack(side=tk.BOTTOM, fill=tk.X)
+
+        # 课题列表：纵向滚动条由虚拟化表格按全部数据定位
+        table_frame = ttk.Frame(self.root, padding=(10, 0, 10, 5))
+        table_frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(table_frame, show='headings', selectmode='extended', height=30)
+        self.tree_scrollbar = ttk.Scrollbar(table_frame, orient=tk.VERTICAL)
+        x_scrollbar = ttk.Scrollbar(table_frame, orient=tk.HORIZONTAL, command=self.tree.xview)
+        self.tree.configure(xscrollcommand=x_scrollbar.set)
+        self.tree_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        x_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        # 课题列表使用虚拟化表格，只为可见行创建 Treeview 条目
+        self.table = VirtualTreeview(self.tree, self.tree_scrollbar)
+        self.tree.bind('<Double-1>', self.edit_project)
+        self.display_rows = {}
+        # 数据列之后显示文档清单列，点击列标题排序
+        self.sort_column = None
+        self.tree.configure(columns=DISPLAY_COLUMNS)
+        for col in DISPLAY_COLUMNS:
+            self.tree.heading(col, text=col, command=lambda c=col: self.sort_by_column(c))
+
+    def _with_inventory(self, keys, rows):
+        """在数据列的显示元组之后拼接文档清单列"""
+        inventory = get_inventory()
+        return [tuple(values) + inventory_display_values(inventory.summary(key)) for key, values in zip(keys, rows)]
+
+    def refresh_inventory(self, rescan=False):
+        """在后台统计课题文件夹的文档清单 (只重新列出修改时间变化的目录，rescan 时重新统计全部目录)，完成后更新对应的列"""
+        if not self.folder_cache or self._inventory_running:
+            return
+        self._inventory_running = True
+        folder_paths = dict(self.folder_cache)
+        if rescan:
+            self.status_var.set("正在重新统计全部课题文件夹的文档...")
+
+        def work():
+            inventory = get_inventory()
+            results, _ = inventory.refresh(folder_paths, prune=True, rescan=rescan)
+            inventory.save()
+            return results
+
+        def done(results):
+            self._inventory_running = False
+            self._on_inventory_ready(results)
+            if rescan:
+                self.status_var.set(f"已重新统计 {len(results)} 个课题文件夹的文档")
+
+        def failed(error):
+            self._inventory_running = False
+            print(f"统计文档清单时发生错误: {error}")
+
+        run_in_background(self.root, work, on_done=done, on_error=failed)
+
+    def _on_inventory_ready(self, results):
+        width = len(EXCEL_COLUMNS)
+        for key, summary in results.items():
+            values = self.display_rows.get(key)
+            if values is None:
+                continue
+            values = values[:width] + inventory_display_values(summary)
+            if values != self.display_rows[key]:
+                self.display_rows[key] = values
+                self.table.update_row(key, values)
+        if self.sort_column in INVENTORY_COLUMNS:
+            self.table.sort(self.table.sort_key, self.table.sort_reverse)
+
+    def sort_by_column(self, col):
+        """点击列标题按该列排序，再次点击切换升序/降序；文档清单列按数值排序"""
+        reverse = self.sort_column == col and not self.table.sort_reverse
+        if col in INVENTORY_COLUMNS:
+            inventory = get_inventory()
+            index = INVENTORY_COLUMNS.index(col)
+            key = lambda project_id, values: inventory_sort_values(inventory.summary(project_id))[index]
+        else:
+            key = column_sort_key(DISPLAY_COLUMNS.index(col))
+        if self.sort_column is not None:
+            self.tree.heading(self.sort_column, text=self.sort_column)
+        self.sort_column = col
+        self.tree.heading(col, text=f"{col} {'▼' if reverse else '▲'}")
+        self.table.sort(key, reverse)
+
+    def _rebuild_display_rows(self):
+        """一次性计算全部课题的显示元组"""
+        keys = self.projects_df['课题编号'].astype(str).tolist()
+        rows = self._with_inventory(keys, build_display_rows(self.projects_df, EXCEL_COLUMNS))
+        self.display_rows = dict(zip(keys, rows))
+
+    def refresh_treeview(self, df=None):
+        """刷新课题列表；df 为 None 时显示全部课题，否则显示 df 中的课题 (如检索结果)"""
+        if df is None:
+            df = self.projects_df
+        if df is None:
+            # 后台加载尚未完成，保留已逐块显示的行
+            return
+        if len(self.display_rows) != len(self.projects_df):
+            self._rebuild_display_rows()
+        keys = df['课题编号'].astype(str).tolist()
+        rows = [self.display_rows.get(key, ()) for key in keys]
+        self.table.set_rows(keys, rows)
+        self.status_var.set(f"共 {len(df)} 条课题记录")
+
+    def _on_record_changed(self, df, project_id, deleted):
+        """记录变更时只更新对应的一行显示"""
+        if deleted:
+            # 删除后其后各行的序号都会变化，下次刷新时重新计算显示元组
+            self.display_rows = {}
+            self.table.remove_row(project_id)
+            return
+        row = data_manager.find_project_row(df, project_id)
+        if row is None:
+            return
+        values = self._with_inventory([project_id], build_display_rows(row.to_frame().T, EXCEL_COLUMNS))[0]
+        self.display_rows[project_id] = values
+        if not self.table.update_row(project_id, values):
+            self.table.append_row(project_id, values)
+
+    def search_projects(self, event=None):
+        """边输入边检索：多个关键词取交集，结果按相关度排序"""
+        query = self.search_entry.get().strip()
+        if not query or self.projects_df is None:
+            self.refresh_treeview()
+            return
+        results = data_manager.search_projects(self.projects_df, query)
+        self.refresh_treeview(results)
+        self.status_var.set(f"找到 {len(results)} 条匹配记录")
 
     def add_project(self):
         dialog = ProjectDialog(self.root, self)
@@ -243,13 +468,102 @@ class Application:
             self.data_changed = True
             self.refresh_treeview()
 
-    def edit_project(self):
-        # ... (Unchanged edit project code)
-        pass
+    def import_projects(self):
+        """从 Excel/CSV/JSONL 文件批量导入课题：读取、校验与创建文件夹在后台进行，完成后一次性追加并保存"""
+        if self.projects_df is None:
+            return
+        path = filedialog.askopenfilename(
+            title="选择要导入的文件",
+            filetypes=[("Excel/CSV/JSONL", "*.xlsx *.csv *.jsonl"), ("所有文件", "*.*")])
+        if not path:
+            return
+        existing_ids = self.projects_df['课题编号'].astype(str).tolist()
+        self.status_var.set(f"正在导入 '{os.path.basename(path)}' ...")
+
+        def work():
+            new_rows, errors, total = bulk_import.read_import_file(path, existing_ids)
+            new_rows, folder_errors, folder_paths = bulk_import.create_import_folders(new_rows)
+            return new_rows, errors + folder_errors, total, folder_paths
+
+        def done(result):
+            new_rows, errors, total, folder_paths = result
+            # 数据表只在 Tk 主线程中修改
+            df, added_ids, duplicate_ids = data_manager.append_projects(self.projects_df, new_rows)
+            errors.extend({'行号': None, '课题编号': project_id, '错误': "课题编号已存在"} for project_id in duplicate_ids)
+            self.projects_df = df
+            self.folder_cache.update(folder_paths)
+            if added_ids:
+                self.data_changed = True
+                data_manager.schedule_save(df)
+            self.display_rows = {}
+            self.search_projects()
+            self.status_var.set(f"导入完成: 读取 {total} 条记录，导入 {len(added_ids)} 条，{len(errors)} 条有错误")
+            if errors:
+                self._report_import_errors(errors)
+            self.refresh_inventory()
+
+        def failed(error):
+            self.status_var.set("导入失败")
+            messagebox.showerror("导入失败", f"读取 '{path}' 时发生错误: {error}")
+
+        run_in_background(self.root, work, on_done=done, on_error=failed)
+
+    def _report_import_errors(self, errors):
+        """显示部分导入错误，并可将全部错误保存为 CSV"""
+        details = "\n".join(f"第 {error['行号'] or '-'} 行 {error['课题编号'] or '(无编号)'}: {error['错误']}"
+                            for error in errors[:20])
+        more = f"\n... 共 {len(errors)} 条" if len(errors) > 20 else ""
+        if not messagebox.askyesno("部分记录未导入", f"{details}{more}\n\n是否将全部错误保存为 CSV 文件？"):
+            return
+        report_path = filedialog.asksaveasfilename(title="保存错误报告", defaultextension=".csv",
+                                                   filetypes=[("CSV", "*.csv")])
+        if report_path:
+            bulk_import.write_error_report(errors, report_path)
+
+    def edit_project(self, event=None):
+        """编辑选中的第一个课题"""
+        project_ids = self.table.selected_keys()
+        if not project_ids or self.projects_df is None:
+            messagebox.showinfo("提示", "请先选择要编辑的课题。")
+            return
+        dialog = ProjectDialog(self.root, self, project_ids[0])
+        self.root.wait_window(dialog.dialog)
+        if dialog.data_changed:
+            self.data_changed = True
+            self.refresh_treeview()
+
+    def change_selected_status(self, new_status):
+        """将选中的全部课题一次性变更为 new_status (含文件夹重命名)，有冲突或失败时整体不生效"""
+        project_ids = self.table.selected_keys()
+        if not project_ids or self.projects_df is None:
+            messagebox.showinfo("提示", "请先选择要变更状态的课题。")
+            return
+        if not messagebox.askyesno("确认", f"确定将选中的 {len(project_ids)} 个课题的状态变更为 '{new_status}' 吗？"):
+            return
+        df, success, report = data_manager.update_projects_status(
+            self.projects_df, project_ids, new_status, self.folder_cache)
+        self.projects_df = df
+        if success:
+            self.status_var.set(f"已将 {len(report['updated'])} 个课题变更为 '{new_status}'，"
+                                f"重命名 {report['renamed']} 个文件夹")
+        else:
+            problems = report['conflicts'] or report['errors']
+            details = "\n".join(f"{project_id}: {reason}" for project_id, reason in problems[:20])
+            messagebox.showerror("批量变更失败", f"未做任何修改。\n{details}")
 
     def on_closing(self):
-        # ... (Unchanged closing handler)
-        pass
+        """写入待保存的变更并停止文件监视后关闭窗口；保存失败时由用户决定是否仍然退出"""
+        if not data_manager.flush_pending_saves():
+            if not messagebox.askyesno("保存失败", "部分修改未能保存，是否仍然退出？"):
+                return
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        self.root.destroy()
+
+
+# main.py 使用的名称
+ProjectManagerApp = Application
 
 
 # ... (Rest of gui.py unchanged)
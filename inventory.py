@@ -0,0 +1,227 @@
+# inventory.py
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from config import INVENTORY_FILE, FOLDER_WORKERS
+from file_manager import FOLDER_STRUCTURE
+
+# 主列表中显示的文档清单列
+INVENTORY_COLUMNS = ['文档数', '文档大小', '结题材料', '最近更新']
+# 各标准子文件夹 (顶层) 的名称
+STANDARD_SUBFOLDERS = [item['name'] if isinstance(item, dict) else item for item in FOLDER_STRUCTURE]
+# "结题材料" 列统计的子文件夹
+CLOSING_SUBFOLDER = '04_结题'
+
+
+def _empty_totals():
+    return {'files': 0, 'bytes': 0, 'latest': 0}
+
+
+def _add_totals(totals, other):
+    totals['files'] += other['files']
+    totals['bytes'] += other['bytes']
+    totals['latest'] = max(totals['latest'], other['latest'])
+
+
+def format_size(num_bytes):
+    """以 B/KB/MB/GB 显示文件大小"""
+    size = float(num_bytes)
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size < 1024 or unit == 'GB':
+            return f"{int(size)} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def inventory_display_values(summary):
+    """课题文档清单在主列表中的显示值，与 INVENTORY_COLUMNS 对应；尚未统计时全部为空"""
+    if not summary:
+        return ('',) * len(INVENTORY_COLUMNS)
+    closing = summary['subfolders'].get(CLOSING_SUBFOLDER, _empty_totals())
+    latest = datetime.fromtimestamp(summary['latest'] / 1e9).strftime('%Y-%m-%d') if summary['latest'] else ''
+    return (str(summary['files']), format_size(summary['bytes']), str(closing['files']), latest)
+
+
+def inventory_sort_values(summary):
+    """与 INVENTORY_COLUMNS 对应的排序值 (大小与时间按数值排序)"""
+    if not summary:
+        return (-1,) * len(INVENTORY_COLUMNS)
+    closing = summary['subfolders'].get(CLOSING_SUBFOLDER, _empty_totals())
+    return (summary['files'], summary['bytes'], closing['files'], summary['latest'])
+
+
+class DocumentInventory:
+    """统计每个课题文件夹及各标准子文件夹下的文件数、总大小与最近修改时间
+
+    按目录缓存直接包含的文件统计与子目录列表；刷新时每个目录只需一次 stat，修改时间未变化的目录
+    沿用缓存，变化的目录才重新 os.scandir。文件被原地覆盖时目录修改时间不变：程序运行期间由文件监视
+    通过 invalidate() 告知变化的目录；程序关闭期间被覆盖的文件需以 rescan=True 刷新 (重新统计全部目录)。
+    """
+
+    def __init__(self, cache_file=INVENTORY_FILE):
+        self.cache_file = cache_file
+        self.dirs = {}  # 目录路径 -> {'mtime_ns', 'files', 'bytes', 'latest', 'subdirs'}
+        self.summaries = {}  # 课题编号 -> 统计结果
+        self._lock = threading.Lock()
+
+    def load(self):
+        """读取目录统计缓存，文件缺失或损坏时从空缓存开始"""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            self.dirs = cached.get('dirs', {}) if isinstance(cached, dict) else {}
+        except FileNotFoundError:
+            self.dirs = {}
+        except (OSError, ValueError) as e:
+            print(f"警告: 读取文档清单缓存 '{self.cache_file}' 失败，将重新统计所有课题文件夹: {e}")
+            self.dirs = {}
+        return self
+
+    def save(self):
+        try:
+            tmp_file = self.cache_file + '.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({'dirs': self.dirs}, f, ensure_ascii=False)
+            os.replace(tmp_file, self.cache_file)
+            return True
+        except OSError as e:
+            print(f"警告: 保存文档清单缓存 '{self.cache_file}' 失败: {e}")
+            return False
+
+    def _scan_dir(self, path, mtime_ns):
+        """列出一个目录 (不递归)，返回该目录的缓存记录"""
+        entry = {'mtime_ns': mtime_ns, 'files': 0, 'bytes': 0, 'latest': 0, 'subdirs': []}
+        with os.scandir(path) as entries:
+            for item in entries:
+                try:
+                    if item.is_dir(follow_symlinks=False):
+                        entry['subdirs'].append(item.name)
+                    elif item.is_file():
+                        stat = item.stat()
+                        entry['files'] += 1
+                        entry['bytes'] += stat.st_size
+                        entry['latest'] = max(entry['latest'], stat.st_mtime_ns)
+                except OSError:
+                    continue
+        return entry
+
+    def _dir_entry(self, path, visited, counters, rescan=False):
+        """一次 stat 判断目录是否变化：未变化时返回缓存记录，否则重新列目录；目录不存在时返回 None
+
+        rescan 为 True 时不使用缓存，总是重新列目录。
+        """
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        visited.add(path)
+        entry = self.dirs.get(path)
+        if not rescan and entry is not None and entry.get('mtime_ns') == mtime_ns:
+            counters['cached'] += 1
+            return entry
+        try:
+            entry = self._scan_dir(path, mtime_ns)
+        except OSError as e:
+            print(f"警告: 无法列出目录 '{path}': {e}")
+            return None
+        self.dirs[path] = entry
+        counters['scanned'] += 1
+        return entry
+
+    def _tree_totals(self, path, visited, counters, rescan=False):
+        """递归统计目录树"""
+        entry = self._dir_entry(path, visited, counters, rescan)
+        if entry is None:
+            return _empty_totals()
+        totals = {'files': entry['files'], 'bytes': entry['bytes'], 'latest': entry['latest']}
+        for name in entry['subdirs']:
+            _add_totals(totals, self._tree_totals(os.path.join(path, name), visited, counters, rescan))
+        return totals
+
+    def inventory_project(self, project_path, visited=None, counters=None, rescan=False):
+        """统计单个课题文件夹：整体与各标准子文件夹的文件数、总大小与最近修改时间，文件夹不存在时返回 None"""
+        visited = visited if visited is not None else set()
+        counters = counters if counters is not None else {'scanned': 0, 'cached': 0}
+        entry = self._dir_entry(project_path, visited, counters, rescan)
+        if entry is None:
+            return None
+        totals = {'files': entry['files'], 'bytes': entry['bytes'], 'latest': entry['latest']}
+        subfolders = {name: _empty_totals() for name in STANDARD_SUBFOLDERS}
+        for name in entry['subdirs']:
+            subfolder_totals = self._tree_totals(os.path.join(project_path, name), visited, counters, rescan)
+            _add_totals(totals, subfolder_totals)
+            if name in subfolders:
+                subfolders[name] = subfolder_totals
+        return dict(totals, subfolders=subfolders)
+
+    def refresh(self, folder_paths, max_workers=FOLDER_WORKERS, progress=None, prune=False, rescan=False):
+        """通过线程池并发统计 {课题编号: 文件夹路径} 中的课题，返回 (统计结果, 汇总)
+
+        prune 为 True (folder_paths 包含全部课题) 时清除已不存在的目录与课题的缓存；rescan 为 True 时
+        忽略缓存重新统计全部目录。汇总包含 projects、scanned_dirs、cached_dirs、elapsed。
+        """
+        started = time.perf_counter()
+        items = [(str(pid), path) for pid, path in folder_paths.items() if path]
+        visited = set()
+        counters = {'scanned': 0, 'cached': 0}
+
+        def task(item):
+            project_id, path = item
+            task_visited, task_counters = set(), {'scanned': 0, 'cached': 0}
+            summary = self.inventory_project(path, task_visited, task_counters, rescan)
+            return project_id, summary, task_visited, task_counters
+
+        results = {}
+        if items:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+                futures = [executor.submit(task, item) for item in items]
+                for done, future in enumerate(as_completed(futures), 1):
+                    try:
+                        project_id, summary, task_visited, task_counters = future.result()
+                    except Exception as e:
+                        print(f"警告: 统计课题文件夹时出错: {e}")
+                        continue
+                    if summary is not None:
+                        results[project_id] = summary
+                    visited |= task_visited
+                    counters['scanned'] += task_counters['scanned']
+                    counters['cached'] += task_counters['cached']
+                    if progress:
+                        progress(done, len(items))
+
+        with self._lock:
+            if prune:
+                self.dirs = {path: entry for path, entry in self.dirs.items() if path in visited}
+                self.summaries = results
+            else:
+                self.summaries.update(results)
+        summary = {'projects': len(results), 'scanned_dirs': counters['scanned'],
+                   'cached_dirs': counters['cached'], 'elapsed': time.perf_counter() - started}
+        print(f"文档清单统计完成: {summary['projects']} 个课题，重新列出 {summary['scanned_dirs']} 个目录，"
+              f"{summary['cached_dirs']} 个目录命中缓存，用时 {summary['elapsed']:.2f} 秒。")
+        return results, summary
+
+    def invalidate(self, paths):
+        """文件监视报告的变化路径 (文件或目录) 所在目录的缓存失效，下次刷新时重新列出"""
+        with self._lock:
+            for path in paths:
+                path = os.path.abspath(path)
+                self.dirs.pop(path, None)
+                self.dirs.pop(os.path.dirname(path), None)
+
+    def summary(self, project_id):
+        return self.summaries.get(str(project_id))
+
+
+_inventory = None
+
+
+def get_inventory():
+    """获取文档清单 (进程内单例)，首次调用时读取缓存"""
+    global _inventory
+    if _inventory is None:
+        _inventory = DocumentInventory().load()
+    return _inventory
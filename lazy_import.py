@@ -0,0 +1,96 @@
+# lazy_import.py
+import importlib
+import re
+import subprocess
+import sys
+import threading
+
+
+class LazyModule:
+    """模块的延迟导入代理：首次访问属性时才真正导入，可指定导入后执行一次的初始化函数"""
+
+    def __init__(self, name, on_load=None):
+        self._name = name
+        self._on_load = on_load
+        self._module = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """导入模块 (线程安全，只执行一次)，返回真实模块"""
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    module = importlib.import_module(self._name)
+                    if self._on_load:
+                        self._on_load(module)
+                    self._module = module
+        return self._module
+
+    @property
+    def is_loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<LazyModule '{self._name}' ({state})>"
+
+
+def lazy_module(name, on_load=None):
+    """返回模块 name 的延迟导入代理"""
+    return LazyModule(name, on_load)
+
+
+def prewarm(modules, root=None):
+    """在后台线程中预先导入模块 (LazyModule 或模块名)；提供 root 时等主窗口空闲后再开始"""
+    def worker():
+        for module in modules:
+            try:
+                if isinstance(module, LazyModule):
+                    module.load()
+                else:
+                    importlib.import_module(module)
+            except Exception as e:
+                print(f"警告: 预加载模块 '{module}' 失败: {e}")
+
+    def start():
+        threading.Thread(target=worker, name='module-prewarm', daemon=True).start()
+
+    if root is not None:
+        root.after_idle(start)
+    else:
+        start()
+
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def import_time_report(modules, top=25):
+    """在子进程中以 -X importtime 导入 modules，返回按累计耗时排序的各模块导入耗时报告 (文本行)"""
+    code = '; '.join(f'import {name}' for name in modules)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            capture_output=True, text=True)
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+
+    lines = [f"导入耗时报告: {', '.join(modules)}"]
+    if result.returncode != 0:
+        lines.append(f"警告: 导入失败 (返回码 {result.returncode})")
+        lines.extend(l for l in result.stderr.splitlines() if not l.startswith('import time:'))
+    # 顶层导入 (缩进最小) 的累计耗时之和即为总耗时
+    if entries:
+        min_level = min(level for _, _, _, level in entries)
+        total_us = sum(cumulative for _, _, cumulative, level in entries if level == min_level)
+        lines.append(f"总计 {total_us / 1000:.1f} ms，共导入 {len(entries)} 个模块")
+    lines.append(f"{'累计(ms)':>10} {'自身(ms)':>10}  模块")
+    for name, self_us, cumulative_us, _ in sorted(entries, key=lambda e: -e[2])[:top]:
+        lines.append(f"{cumulative_us / 1000:>10.1f} {self_us / 1000:>10.1f}  {name}")
+    return lines
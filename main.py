@@ -1,8 +1,45 @@
 # main.py
-import tkinter as tk
-from gui import ProjectManagerApp
+import argparse
+import sys
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="科研课题管理系统")
+    parser.add_argument('--import-time', nargs='?', const=25, type=int, metavar='N',
+                        help="输出启动时各模块的导入耗时 (-X importtime)，显示耗时最多的 N 个模块后退出")
+    parser.add_argument('--dedup-report', action='store_true',
+                        help="检查课题文件夹中内容重复的文件，按课题与子文件夹分类输出报告后退出")
+    parser.add_argument('--trace', nargs='?', const='', metavar='FILE',
+                        help="记录加载、文件夹检查与保存各阶段的耗时，退出时导出为 Chrome trace JSON (默认写入 TRACE_FILE)")
+    return parser.parse_args(argv)
+
 
 if __name__ == "__main__":
+    args = parse_args()
+    if args.trace is not None:
+        import tracing
+        tracing.enable(args.trace or None)
+    if args.import_time is not None:
+        from lazy_import import import_time_report
+        # 启动路径 (gui) 与首次打开分析窗口时才加载的绘图模块分别统计
+        for line in import_time_report(['gui'], top=args.import_time):
+            print(line)
+        print()
+        plotting_modules = ['analysis', 'matplotlib.figure', 'matplotlib.backends.backend_agg', 'wordcloud', 'pandas']
+        for line in import_time_report(plotting_modules, top=args.import_time):
+            print(line)
+        sys.exit(0)
+
+    if args.dedup_report:
+        from dedup import find_duplicates, build_dedup_report, format_dedup_report
+        duplicates, summary = find_duplicates()
+        for line in format_dedup_report(duplicates, summary, build_dedup_report(duplicates)):
+            print(line)
+        sys.exit(0)
+
+    import tkinter as tk
+    from gui import ProjectManagerApp
+
     # 确保项目根目录存在
     from config import PROJECTS_ROOT_DIR
     import os
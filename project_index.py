@@ -0,0 +1,92 @@
+# project_index.py
+import weakref
+
+
+class ProjectIdIndex:
+    """课题编号到行位置的索引，单条记录的查找为 O(1)，并支持大小写不敏感查找
+
+    索引绑定到某个 DataFrame 对象；新增、删除记录产生新的 DataFrame 时通过
+    append/remove 同步更新，序号重新编号不影响行位置。
+    """
+
+    def __init__(self, df):
+        self.rebuild(df)
+
+    def rebuild(self, df):
+        """根据 DataFrame 的课题编号列重建索引 (重复编号以第一条为准)"""
+        self._df_ref = weakref.ref(df)
+        self.ids = df['课题编号'].astype(str).tolist() if '课题编号' in df.columns else []
+        self.positions = {}
+        self.lower_positions = {}
+        for pos, project_id in enumerate(self.ids):
+            self.positions.setdefault(project_id, pos)
+            self.lower_positions.setdefault(project_id.lower(), pos)
+        # 大小写不同的编号也视为重复，此时删除记录后整体重建
+        self.has_duplicates = len(self.lower_positions) != len(self.ids)
+
+    def is_bound_to(self, df):
+        return self._df_ref() is df and len(self.ids) == len(df)
+
+    def position(self, project_id, case_sensitive=True):
+        """返回课题编号所在的行位置，不存在时返回 None"""
+        project_id_str = str(project_id)
+        if case_sensitive:
+            return self.positions.get(project_id_str)
+        return self.lower_positions.get(project_id_str.lower())
+
+    def contains(self, project_id, case_sensitive=True):
+        return self.position(project_id, case_sensitive) is not None
+
+    def append(self, df, project_id):
+        """记录追加到末尾的新课题，并将索引绑定到新的 DataFrame"""
+        project_id_str = str(project_id)
+        pos = len(self.ids)
+        self.ids.append(project_id_str)
+        self.positions.setdefault(project_id_str, pos)
+        if self.lower_positions.setdefault(project_id_str.lower(), pos) != pos:
+            self.has_duplicates = True
+        self._df_ref = weakref.ref(df)
+
+    def remove(self, df, pos):
+        """删除指定行位置的课题，其后各行位置前移，并将索引绑定到新的 DataFrame"""
+        if self.has_duplicates:
+            self.rebuild(df)
+            return
+        removed_id = self.ids.pop(pos)
+        del self.positions[removed_id]
+        del self.lower_positions[removed_id.lower()]
+        for shifted_pos in range(pos, len(self.ids)):
+            project_id = self.ids[shifted_pos]
+            self.positions[project_id] = shifted_pos
+            self.lower_positions[project_id.lower()] = shifted_pos
+        self._df_ref = weakref.ref(df)
+
+    def locate(self, df, project_id, case_sensitive=True):
+        """返回课题所在行的索引标签，不存在时返回 None
+
+        命中后核对该行的课题编号，若数据表在索引之外被修改则重建索引后重新查找。
+        """
+        pos = self.position(project_id, case_sensitive)
+        if pos is not None and pos < len(df):
+            found_id = str(df['课题编号'].iat[pos])
+            expected_id = str(project_id)
+            if found_id == expected_id or (not case_sensitive and found_id.lower() == expected_id.lower()):
+                return df.index[pos]
+        elif pos is None and self.is_bound_to(df):
+            return None
+        self.rebuild(df)
+        pos = self.position(project_id, case_sensitive)
+        return df.index[pos] if pos is not None else None
+
+
+_index = None
+
+
+def get_project_index(df):
+    """获取与 df 绑定的课题编号索引，df 已被替换或行数变化时自动重建"""
+    global _index
+    if _index is None:
+        _index = ProjectIdIndex(df)
+    elif not _index.is_bound_to(df):
+        _index.rebuild(df)
+    return _index
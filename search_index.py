@@ -0,0 +1,158 @@
+# search_index.py
+import weakref
+
+# 建立全文索引的字段及其相关度权重
+SEARCH_FIELDS = {
+    '课题编号': 3.0,
+    '课题名称': 3.0,
+    '课题负责人': 2.0,
+    '课题联系人': 1.5,
+    '承担单位': 1.0,
+    '归口单位': 1.0,
+}
+
+
+def normalize_text(value):
+    """统一为小写并去除空白，空值返回空字符串"""
+    if value is None or value != value:  # None 或 NaN
+        return ''
+    return ''.join(str(value).lower().split())
+
+
+def char_ngrams(text):
+    """中文按字切分：返回文本中所有单字与相邻双字组合"""
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+def parse_query(query):
+    """解析查询字符串，返回 [(字段或 None, 查询词, 是否前缀匹配)]
+
+    空格分隔的多个查询词之间为 AND 关系；'字段:词' 限定字段；词末尾的 '*' 表示字段值以该词开头。
+    """
+    terms = []
+    for part in str(query or '').split():
+        field = None
+        if ':' in part or '：' in part:
+            name, _, value = part.replace('：', ':').partition(':')
+            if name in SEARCH_FIELDS:
+                field, part = name, value
+        prefix = part.endswith('*')
+        text = normalize_text(part.rstrip('*'))
+        if text:
+            terms.append((field, text, prefix))
+    return terms
+
+
+class ProjectSearchIndex:
+    """课题记录的内存倒排索引 (字 n-gram)，支持多字段 AND 查询、前缀匹配与相关度排序"""
+
+    def __init__(self, df=None):
+        self.postings = {}  # (字段, n-gram) -> {课题编号}
+        self.docs = {}  # 课题编号 -> {字段: 规范化后的值}
+        self.order = {}  # 课题编号 -> 加入顺序，用于同分时保持表格顺序
+        self._next_order = 0
+        self._source_ref = None
+        if df is not None:
+            self.rebuild(df)
+
+    def rebuild(self, df):
+        """根据整个数据表重建索引"""
+        self.postings.clear()
+        self.docs.clear()
+        self.order.clear()
+        self._next_order = 0
+        fields = [f for f in SEARCH_FIELDS if f in df.columns]
+        ids = df['课题编号'].astype(str).tolist()
+        columns = [df[f].tolist() for f in fields]
+        for row_values in zip(ids, *columns):
+            self._add(row_values[0], dict(zip(fields, row_values[1:])))
+        self.bind(df)
+
+    def bind(self, df):
+        self._source_ref = weakref.ref(df)
+
+    def is_bound_to(self, df):
+        return self._source_ref is not None and self._source_ref() is df and len(self.docs) == len(df)
+
+    def update(self, project_id, record):
+        """新增或更新一条记录的索引；record 为包含各字段值的映射"""
+        project_id_str = str(project_id)
+        order = self.order.get(project_id_str)
+        self.remove(project_id_str)
+        self._add(project_id_str, {f: record.get(f, '') for f in SEARCH_FIELDS}, order)
+
+    def remove(self, project_id):
+        """从索引中删除一条记录"""
+        project_id_str = str(project_id)
+        doc = self.docs.pop(project_id_str, None)
+        self.order.pop(project_id_str, None)
+        if doc is None:
+            return
+        for field, text in doc.items():
+            for gram in char_ngrams(text):
+                ids = self.postings.get((field, gram))
+                if ids is not None:
+                    ids.discard(project_id_str)
+                    if not ids:
+                        del self.postings[(field, gram)]
+
+    def _add(self, project_id_str, record, order=None):
+        doc = {}
+        for field, value in record.items():
+            text = normalize_text(value)
+            doc[field] = text
+            for gram in char_ngrams(text):
+                self.postings.setdefault((field, gram), set()).add(project_id_str)
+        self.docs[project_id_str] = doc
+        if order is None:
+            order = self._next_order
+            self._next_order += 1
+        self.order[project_id_str] = order
+
+    def _candidates(self, field, text):
+        """某字段中可能包含 text 的课题编号集合 (按 n-gram 求交集，结果仍需核对)"""
+        grams = [text] if len(text) == 1 else [text[i:i + 2] for i in range(len(text) - 1)]
+        postings = [self.postings.get((field, gram)) for gram in set(grams)]
+        if any(p is None for p in postings):
+            return set()
+        postings.sort(key=len)
+        result = set(postings[0])
+        for p in postings[1:]:
+            result &= p
+            if not result:
+                break
+        return result
+
+    def search(self, query, fields=None):
+        """执行查询，返回按相关度降序排列的 [(课题编号, 得分)]"""
+        terms = parse_query(query)
+        if not terms:
+            return []
+        search_fields = [f for f in (fields or SEARCH_FIELDS) if f in SEARCH_FIELDS]
+
+        scores = None
+        for field, text, prefix in terms:
+            term_scores = {}
+            for f in ([field] if field else search_fields):
+                weight = SEARCH_FIELDS[f]
+                for project_id in self._candidates(f, text):
+                    value = self.docs[project_id][f]
+                    if value == text:
+                        score = weight * 3
+                    elif value.startswith(text):
+                        score = weight * 2
+                    elif prefix or text not in value:
+                        continue
+                    else:
+                        score = weight
+                    if score > term_scores.get(project_id, 0):
+                        term_scores[project_id] = score
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {pid: s + term_scores[pid] for pid, s in scores.items() if pid in term_scores}
+            if not scores:
+                return []
+        return sorted(scores.items(), key=lambda item: (-item[1], self.order.get(item[0], 0)))
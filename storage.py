@@ -0,0 +1,537 @@
+# storage.py
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+
+import pandas as pd
+
+import tracing
+
+# 从 config 模块导入配置
+from config import EXCEL_FILE, SHEET_NAME, EXCEL_COLUMNS, DATA_CACHE_FILE, STORAGE_BACKEND, SQLITE_FILE
+
+DATE_COLUMNS = ['开始日期', '计划结束日期', '延期时间', '实际结题时间']
+NUMERIC_COLUMNS = ['外部专项经费', '院自筹经费', '所属单位自筹经费', '总预算']
+FUNDING_COLUMNS = ['外部专项经费', '院自筹经费', '所属单位自筹经费']
+
+# 二进制缓存格式版本，规范化逻辑变化时递增以使旧缓存失效
+DATA_CACHE_VERSION = 1
+# 解析 Excel 总表时每块读取的行数 (每块解析后即可交给界面显示)
+EXCEL_READ_CHUNK_ROWS = 2000
+# 按文本读取的列
+STRING_COLUMNS = [col for col in ('课题编号', '课题联系人', '课题负责人', '承担单位', '参与角色', '课题名称',
+                                  '归口单位', '课题级别', '课题类型', '课题状态') if col in EXCEL_COLUMNS]
+
+
+def _cell_value(value):
+    """Excel 单元格值：整数值的浮点数 (如数字形式的课题编号) 转为整数"""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def iter_excel_chunks(path, sheet_name=SHEET_NAME, chunk_size=EXCEL_READ_CHUNK_ROWS, strict=True):
+    """以 openpyxl 只读模式逐块读取工作表 (首行为列名)，逐块返回原始值的 DataFrame，空单元格为 None
+
+    各块的索引在整个工作表中连续；全空的行被跳过。工作表不存在时 strict 为 True 则抛出 ValueError，否则读取活动工作表。
+    """
+    import openpyxl
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        if sheet_name in workbook.sheetnames:
+            sheet = workbook[sheet_name]
+        elif strict:
+            raise ValueError(f"工作表 '{sheet_name}' 不存在")
+        else:
+            sheet = workbook.active
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(name).strip() if name is not None else '' for name in header]
+        named = [col for col in columns if col]
+        buffer, offset = [], 0
+        for values in rows:
+            if all(value is None for value in values):
+                continue
+            values = list(values[:len(columns)]) + [None] * (len(columns) - len(values))
+            buffer.append([_cell_value(value) for value in values])
+            if len(buffer) >= chunk_size:
+                yield pd.DataFrame(buffer, columns=columns, index=range(offset, offset + len(buffer)), dtype=object)[named]
+                offset += len(buffer)
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=columns, index=range(offset, offset + len(buffer)), dtype=object)[named]
+    finally:
+        workbook.close()
+
+
+@tracing.traced('storage.normalize')
+def normalize_projects_df(df, warn=True, first_number=1):
+    """校验课题编号，统一列顺序、日期、数值类型并重新计算总预算，返回 (df, 是否补充了缺失列)
+
+    warn 为 False 时不输出警告 (如只为显示而规范化的部分行)；序号从 first_number 开始编号。
+    """
+    # Validate project IDs
+    if '课题编号' in df.columns:
+        project_ids = df['课题编号'].astype(str)
+        # Check for missing project IDs
+        missing_ids = project_ids.isna() | (project_ids == '')
+        if missing_ids.any():
+            if warn:
+                print(f"警告: 发现 {missing_ids.sum()} 条记录缺少课题编号，将为这些记录分配临时编号。")
+            df.loc[missing_ids, '课题编号'] = [f"temp_id_{i}" for i in df.index[missing_ids]]
+        # Check for duplicate project IDs
+        duplicates = project_ids.duplicated(keep=False)
+        if duplicates.any() and warn:
+            duplicate_ids = df.loc[duplicates, '课题编号'].unique()
+            print(f"警告: 发现重复的课题编号: {', '.join(map(str, duplicate_ids))}。请确保课题编号唯一。")
+    else:
+        if warn:
+            print("警告: Excel 文件中缺少 '课题编号' 列，将为所有记录分配临时编号。")
+        df['课题编号'] = [f"temp_id_{i}" for i in df.index]
+
+    missing_cols_added = False
+    for col in EXCEL_COLUMNS:
+        if col not in df.columns:
+            df[col] = None
+            missing_cols_added = True
+            if warn:
+                print(f"警告: 文件中缺少列 '{col}'，已添加。")
+
+    df = df[EXCEL_COLUMNS]
+
+    if '序号' in EXCEL_COLUMNS:
+        df['序号'] = range(first_number, first_number + len(df))
+
+    with tracing.span('storage.normalize.dates'):
+        for col in DATE_COLUMNS:
+            if col in df.columns:
+                df[col] = pd.to_datetime(df[col], errors='coerce')
+                df[col] = df[col].dt.strftime('%Y-%m-%d').fillna('')
+            else:
+                df[col] = ''
+
+    with tracing.span('storage.normalize.numeric'):
+        for col in NUMERIC_COLUMNS:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+            else:
+                df[col] = 0.0
+
+    if all(c in df.columns for c in FUNDING_COLUMNS):
+        df['总预算'] = df['外部专项经费'] + df['院自筹经费'] + df['所属单位自筹经费']
+    elif '总预算' in df.columns and warn:
+        print("警告: 缺少部分经费列，无法重新计算总预算。将使用文件中读取的值。")
+
+    if '开始年份' in df.columns and '开始日期' in df.columns:
+        mask = df['开始日期'] != ''
+        df.loc[mask, '开始年份'] = pd.to_datetime(df.loc[mask, '开始日期']).dt.year
+        df['开始年份'] = df['开始年份'].astype('Int64').fillna(pd.NA).astype(str).replace('<NA>', '')
+
+    df.fillna('', inplace=True)
+    return df, missing_cols_added
+
+
+def prepare_excel_frame(df, columns=EXCEL_COLUMNS):
+    """将内存中的课题数据 (按 columns 的列) 转换为写入 Excel 的类型：经费为数值，日期为 datetime，开始年份为整数"""
+    df_to_save = df.reindex(columns=columns)
+    for col in NUMERIC_COLUMNS:
+        if col in df_to_save.columns:
+            df_to_save[col] = pd.to_numeric(df_to_save[col].replace('', 0), errors='coerce').fillna(0)
+
+    for col in DATE_COLUMNS:
+        if col in df_to_save.columns:
+            df_to_save[col] = pd.to_datetime(df_to_save[col].replace('', None), errors='coerce')
+
+    if '开始年份' in df_to_save.columns:
+        df_to_save['开始年份'] = pd.to_numeric(df_to_save['开始年份'], errors='coerce').astype('Int64').fillna(pd.NA)
+    return df_to_save
+
+
+def _excel_cell_values(values):
+    """将一列转换为写入单元格的 Python 值列表：缺失值为 None，日期列为 date (单元格格式为 yyyy-mm-dd)"""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        values = values.dt.date
+    values = values.astype(object)
+    return values.where(values.notna() & (values != ''), None).tolist()
+
+
+def write_excel_file(df_to_save, path, sheet_name=SHEET_NAME):
+    """以 openpyxl 只写模式逐行写入 Excel 工作簿，返回写入的字节数
+
+    各列在写入前一次性转换为单元格值，行数据直接流式写入，不在内存中构建单元格对象；
+    先写入同目录下的临时文件再替换原文件，写入中途出错或程序退出时原文件保持完整。
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    columns = [_excel_cell_values(df_to_save[col]) for col in df_to_save.columns]
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_name)
+    header = []
+    for col in df_to_save.columns:
+        cell = WriteOnlyCell(sheet, value=str(col))
+        cell.font = Font(bold=True)
+        header.append(cell)
+    sheet.append(header)
+    for row in zip(*columns):
+        sheet.append(row)
+    tracing.count('rows_written', len(df_to_save))
+
+    tmp_file = path + '.tmp'
+    try:
+        workbook.save(tmp_file)
+        size = os.path.getsize(tmp_file)
+        os.replace(tmp_file, path)
+    except BaseException:
+        try:
+            os.remove(tmp_file)
+        except OSError:
+            pass
+        raise
+    return size
+
+
+def empty_projects_df():
+    """创建带有全部列的空课题数据表"""
+    empty_df = pd.DataFrame(columns=EXCEL_COLUMNS)
+    for col in EXCEL_COLUMNS:
+        if col in NUMERIC_COLUMNS:
+            empty_df[col] = 0.0
+        elif col in DATE_COLUMNS:
+            empty_df[col] = ''
+        elif col == '开始年份':
+            empty_df[col] = ''
+        elif col == '序号':
+            empty_df[col] = pd.Series(dtype='int64')
+        else:
+            empty_df[col] = ''
+    return empty_df
+
+
+class StorageBackend:
+    """课题数据存储后端接口"""
+
+    name = ''
+    # 是否支持只写入变更记录的增量保存
+    supports_incremental = False
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self, on_chunk=None):
+        """读取规范化后的课题数据，返回 (df, 是否补充了缺失列)；数据源不存在时抛出 FileNotFoundError
+
+        逐块解析数据源的后端每解析一块调用 on_chunk(未经处理的 DataFrame)，供界面在解析完成前逐步显示。
+        """
+        raise NotImplementedError
+
+    def save(self, df, changed_ids=None, deleted_ids=None):
+        """保存课题数据，成功返回 True；changed_ids 与 deleted_ids 均为 None 时保存整表"""
+        raise NotImplementedError
+
+    def has_external_changes(self):
+        """数据源自上次由本程序读取或写入后是否被其他程序修改"""
+        return False
+
+
+class ExcelBackend(StorageBackend):
+    """以 Excel 工作簿作为存储，每次保存重写整个工作表，并维护规范化数据的二进制缓存"""
+
+    name = 'excel'
+
+    def __init__(self, path=EXCEL_FILE, sheet_name=SHEET_NAME, cache_file=DATA_CACHE_FILE):
+        super().__init__(path)
+        self.sheet_name = sheet_name
+        self.cache_file = cache_file
+        # 本程序最近一次读取或写入时 Excel 文件的 (大小, 修改时间)，用于区分外部修改与自身保存
+        self._known_stat = None
+        self._io_lock = threading.Lock()
+
+    @tracing.traced('storage.load')
+    def load(self, on_chunk=None):
+        """读取规范化后的总表：缓存有效时跳过 openpyxl 解析和类型处理，否则逐块解析 Excel 并重建缓存"""
+        fingerprint = self._fingerprint()
+        with tracing.span('storage.cache_read'):
+            cached = self._load_cache(fingerprint)
+        if cached is not None:
+            df = cached['df']
+            print(f"成功从缓存 '{self.cache_file}' 加载 {len(df)} 条课题数据。")
+            self._known_stat = (fingerprint['size'], fingerprint['mtime_ns'])
+            return df, cached.get('missing_cols_added', False)
+
+        df, missing_cols_added = normalize_projects_df(self._read_excel(on_chunk))
+        # 刚完整解析过文件，顺带记录内容哈希，文件之后仅修改时间变化 (如被复制) 时缓存仍可使用
+        self._store_cache(df, dict(fingerprint, sha1=self._content_hash()), missing_cols_added)
+        self._known_stat = (fingerprint['size'], fingerprint['mtime_ns'])
+        return df, missing_cols_added
+
+    @tracing.traced('storage.save')
+    def save(self, df, changed_ids=None, deleted_ids=None):
+        """将课题数据保存回 Excel，确保数据类型正确 (Excel 不支持增量写入，总是流式重写整表)"""
+        try:
+            with tracing.span('storage.prepare'):
+                df_to_save = prepare_excel_frame(df)
+            with self._io_lock, tracing.span('excel.write', rows=len(df_to_save)):
+                tracing.count('bytes_written', write_excel_file(df_to_save, self.path, self.sheet_name))
+                self._known_stat = self._stat()
+            print(f"数据已成功保存到 '{self.path}'。")
+
+            # 刷新二进制缓存，使下次启动无需重新解析刚写入的 Excel：内存中的数据已是规范化的，直接写入；
+            # 指纹使用刚取得的大小与修改时间，不重新读取文件计算哈希
+            if self.cache_file and self._known_stat is not None:
+                size, mtime_ns = self._known_stat
+                self._store_cache(df.reindex(columns=EXCEL_COLUMNS), {'size': size, 'mtime_ns': mtime_ns})
+            return True
+        except PermissionError:
+            print(f"保存错误: 无法写入文件 '{self.path}'。请确保文件未被其他程序打开，并且您有写入权限。")
+            return False
+        except Exception as e:
+            print(f"保存数据到 Excel 文件 '{self.path}' 时发生未知错误: {e}")
+            return False
+
+    def has_external_changes(self):
+        """Excel 文件的大小或修改时间与本程序最近一次读写时不同 (正在保存时等待保存完成再判断)"""
+        with self._io_lock:
+            stat = self._stat()
+            return stat is not None and stat != self._known_stat
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _read_excel(self, on_chunk=None):
+        """使用 openpyxl 只读模式逐块解析 Excel 总表，返回未经处理的 DataFrame；每解析一块调用 on_chunk(该块)"""
+        frames = []
+        with tracing.span('excel.read'):
+            for chunk in iter_excel_chunks(self.path, self.sheet_name):
+                for col in STRING_COLUMNS:
+                    if col in chunk.columns:
+                        chunk[col] = chunk[col].astype(str).where(chunk[col].notna())
+                tracing.count('rows_parsed', len(chunk))
+                if on_chunk:
+                    on_chunk(chunk)
+                frames.append(chunk)
+        df = pd.concat(frames) if frames else pd.DataFrame(columns=EXCEL_COLUMNS)
+        print(f"成功从 '{self.path}' 加载 {len(df)} 条课题数据。")
+        return df
+
+    def _fingerprint(self):
+        """Excel 文件的大小与修改时间，用于判断二进制缓存是否有效 (只在两者不能确定时才计算内容哈希)"""
+        stat = os.stat(self.path)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def _content_hash(self):
+        """Excel 文件内容的 SHA-1"""
+        with tracing.span('storage.fingerprint'):
+            digest = hashlib.sha1()
+            with open(self.path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+                    tracing.count('bytes_read', len(chunk))
+        return digest.hexdigest()
+
+    def _load_cache(self, fingerprint):
+        """读取二进制缓存，缓存缺失、过期或格式不符时返回 None"""
+        if not self.cache_file:
+            return None
+        try:
+            with open(self.cache_file, 'rb') as f:
+                cached = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"警告: 读取数据缓存 '{self.cache_file}' 失败，将重新解析 Excel: {e}")
+            return None
+
+        if not isinstance(cached, dict) or cached.get('version') != DATA_CACHE_VERSION:
+            return None
+        if cached.get('columns') != EXCEL_COLUMNS or cached.get('sheet') != self.sheet_name:
+            return None
+        # 大小不同说明 Excel 已在外部被修改；大小与修改时间都相同时直接使用缓存，不再读取整个文件
+        if cached.get('size') != fingerprint['size']:
+            return None
+        if cached.get('mtime_ns') == fingerprint['mtime_ns']:
+            return cached
+        # 仅修改时间不同 (如被复制或原样另存) 时比较内容哈希，内容未变则更新缓存中的修改时间；
+        # 保存时写入的缓存没有记录哈希，无法确认时重新解析
+        if not cached.get('sha1'):
+            return None
+        fingerprint = dict(fingerprint, sha1=self._content_hash())
+        if cached.get('sha1') != fingerprint['sha1']:
+            return None
+        self._store_cache(cached['df'], fingerprint, cached.get('missing_cols_added', False))
+        return cached
+
+    def _store_cache(self, df, fingerprint, missing_cols_added=False):
+        """将规范化后的 DataFrame 连同 Excel 指纹 (大小、修改时间，以及已知时的内容哈希) 写入二进制缓存"""
+        if not self.cache_file:
+            return False
+        cached = {
+            'version': DATA_CACHE_VERSION,
+            'columns': EXCEL_COLUMNS,
+            'sheet': self.sheet_name,
+            'missing_cols_added': missing_cols_added,
+            'df': df,
+            'sha1': None,
+        }
+        cached.update(fingerprint)
+        tmp_file = self.cache_file + '.tmp'
+        try:
+            with open(tmp_file, 'wb') as f, tracing.span('storage.cache_write'):
+                pickle.dump(cached, f, protocol=pickle.HIGHEST_PROTOCOL)
+                tracing.count('bytes_written', f.tell())
+            os.replace(tmp_file, self.cache_file)
+            return True
+        except Exception as e:
+            print(f"警告: 写入数据缓存 '{self.cache_file}' 失败: {e}")
+            return False
+
+
+class SQLiteBackend(StorageBackend):
+    """以 SQLite 数据库作为存储，每个课题编号一行，保存时按记录 UPSERT；Excel 仅用于导入导出"""
+
+    name = 'sqlite'
+    supports_incremental = True
+    table_name = 'projects'
+
+    def __init__(self, path=SQLITE_FILE, excel_file=EXCEL_FILE):
+        super().__init__(path)
+        self.excel_file = excel_file
+        # 序号不入库，加载时按插入顺序 (rowid) 重新编号
+        self.columns = [col for col in EXCEL_COLUMNS if col != '序号']
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        column_defs = []
+        for col in self.columns:
+            if col == '课题编号':
+                column_defs.append(f'"{col}" TEXT PRIMARY KEY NOT NULL')
+            elif col in NUMERIC_COLUMNS:
+                column_defs.append(f'"{col}" REAL NOT NULL DEFAULT 0')
+            else:
+                column_defs.append(f'"{col}" TEXT NOT NULL DEFAULT \'\'')
+        conn.execute(f'CREATE TABLE IF NOT EXISTS {self.table_name} ({", ".join(column_defs)})')
+        return conn
+
+    @tracing.traced('storage.load')
+    def load(self, on_chunk=None):
+        """从数据库读取课题数据 (一次读取，不逐块回调 on_chunk)；数据库不存在时从 Excel 总表导入"""
+        if not os.path.exists(self.path):
+            print(f"信息: 数据库 '{self.path}' 不存在，将从 '{self.excel_file}' 导入。")
+            return self.import_excel()
+
+        column_sql = ', '.join(f'"{col}"' for col in self.columns)
+        conn = self._connect()
+        try:
+            with tracing.span('sqlite.read'):
+                df = pd.read_sql_query(f'SELECT {column_sql} FROM {self.table_name} ORDER BY rowid', conn)
+                tracing.count('rows_parsed', len(df))
+        finally:
+            conn.close()
+
+        if '序号' in EXCEL_COLUMNS:
+            df['序号'] = range(1, len(df) + 1)
+        df = df[EXCEL_COLUMNS]
+        for col in NUMERIC_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+        df = df.fillna('')
+        print(f"成功从数据库 '{self.path}' 加载 {len(df)} 条课题数据。")
+        return df, False
+
+    @tracing.traced('storage.save')
+    def save(self, df, changed_ids=None, deleted_ids=None):
+        """UPSERT 变更的课题记录并删除已删除的记录；未提供变更集合时同步整表"""
+        full_sync = changed_ids is None and deleted_ids is None
+        try:
+            ids = df['课题编号'].astype(str)
+            rows = df if full_sync else df[ids.isin({str(i) for i in (changed_ids or ())})]
+            # 课题编号是主键，重复的记录写入时会互相覆盖，因此拒绝保存而不是静默合并
+            row_ids = rows['课题编号'].astype(str)
+            duplicate_ids = sorted(set(row_ids[row_ids.duplicated()]))
+            if duplicate_ids:
+                shown = ', '.join(duplicate_ids[:20]) + (f" 等 {len(duplicate_ids)} 个" if len(duplicate_ids) > 20 else '')
+                print(f"保存错误: 课题编号重复 ({shown})。数据库以课题编号区分记录，请先修改重复的编号再保存到 '{self.path}'。")
+                return False
+            records = self._to_records(rows)
+
+            conn = self._connect()
+            try:
+                with conn, tracing.span('sqlite.write', rows=len(records)):
+                    conn.executemany(self._upsert_sql(), records)
+                    tracing.count('rows_written', len(records))
+                    if full_sync:
+                        existing = {row[0] for row in conn.execute(f'SELECT "课题编号" FROM {self.table_name}')}
+                        to_delete = existing - set(ids)
+                    else:
+                        to_delete = {str(i) for i in (deleted_ids or ())} - set(rows['课题编号'].astype(str))
+                    conn.executemany(f'DELETE FROM {self.table_name} WHERE "课题编号" = ?',
+                                     [(project_id,) for project_id in to_delete])
+            finally:
+                conn.close()
+            print(f"数据已成功保存到 '{self.path}' (写入 {len(records)} 条，删除 {len(to_delete)} 条)。")
+            return True
+        except sqlite3.Error as e:
+            print(f"保存数据到数据库 '{self.path}' 时发生错误: {e}")
+            return False
+        except Exception as e:
+            print(f"保存数据到数据库 '{self.path}' 时发生未知错误: {e}")
+            return False
+
+    def import_excel(self, path=None):
+        """从 Excel 总表导入全部课题数据到数据库，返回 (df, 是否补充了缺失列)"""
+        path = path or self.excel_file
+        df, missing_cols_added = ExcelBackend(path, cache_file=None).load()
+        if not self.save(df):
+            raise RuntimeError(f"无法将 '{path}' 导入数据库 '{self.path}' (课题编号重复或数据库无法写入)")
+        return df, missing_cols_added
+
+    def export_excel(self, df, path=None):
+        """将课题数据导出为 Excel 总表"""
+        return ExcelBackend(path or self.excel_file, cache_file=None).save(df)
+
+    def _upsert_sql(self):
+        column_sql = ', '.join(f'"{col}"' for col in self.columns)
+        placeholders = ', '.join('?' for _ in self.columns)
+        updates = ', '.join(f'"{col}" = excluded."{col}"' for col in self.columns if col != '课题编号')
+        return (f'INSERT INTO {self.table_name} ({column_sql}) VALUES ({placeholders}) '
+                f'ON CONFLICT("课题编号") DO UPDATE SET {updates}')
+
+    def _to_records(self, df):
+        """将 DataFrame 行转换为数据库参数元组：经费列为浮点数，其余列为字符串"""
+        rows = df.reindex(columns=self.columns)
+        columns = []
+        for col in self.columns:
+            if col in NUMERIC_COLUMNS:
+                values = pd.to_numeric(rows[col].replace('', 0), errors='coerce').fillna(0).astype(float)
+            else:
+                values = rows[col].astype(object).where(rows[col].notna(), '').astype(str)
+            columns.append(values.tolist())
+        return list(zip(*columns))
+
+
+_backend = None
+
+
+def create_storage_backend(name=STORAGE_BACKEND):
+    """根据名称创建存储后端 ('excel' 或 'sqlite')"""
+    if name == 'sqlite':
+        return SQLiteBackend()
+    if name != 'excel':
+        print(f"警告: 未知的存储后端 '{name}'，将使用 Excel。")
+    return ExcelBackend()
+
+
+def get_storage_backend():
+    """获取当前配置的存储后端 (进程内单例)"""
+    global _backend
+    if _backend is None:
+        _backend = create_storage_backend()
+    return _backend
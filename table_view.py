@@ -0,0 +1,263 @@
+# table_view.py
+import tkinter as tk
+
+
+def build_display_rows(df, columns):
+    """将数据表一次性转换为 Treeview 显示用的元组列表 (空值显示为空字符串)"""
+    if df.empty:
+        return []
+    display_df = df.reindex(columns=columns)
+    display_df = display_df.astype(object).where(display_df.notna(), '').astype(str)
+    return list(display_df.itertuples(index=False, name=None))
+
+
+def sort_value(text):
+    """显示文本的排序值：数值按大小排序并排在文本之前，空值排在最后"""
+    if text == '':
+        return (2, 0.0, '')
+    try:
+        return (0, float(text), '')
+    except ValueError:
+        return (1, 0.0, text)
+
+
+def column_sort_key(index):
+    """按第 index 列显示文本排序的 key(键, 显示元组)"""
+    return lambda key, values: sort_value(values[index]) if index < len(values) else (2, 0.0, '')
+
+
+class VirtualTreeview:
+    """虚拟化的 Treeview：只为可见行及上下缓冲行创建条目，滚动时复用条目并替换显示内容
+
+    数据以 (keys, rows) 提供，rows 为预先计算好的显示元组；内容更新时只修改值发生变化的条目。
+    外部滚动条按全部数据的行数显示位置。选中状态按键记录，不随窗口平移丢失。
+    """
+
+    def __init__(self, tree, scrollbar, buffer_rows=30, row_height=20):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.buffer_rows = buffer_rows
+        self.row_height = row_height
+        self.visible_rows = max(1, int(tree.cget('height') or 10))
+
+        self.keys = []
+        self.rows = []
+        self.positions = {}
+        self.window_start = 0
+        self.items = []  # 条目池，依次显示 rows[window_start:]
+        self.item_values = {}  # 条目 -> 当前显示的元组，用于跳过未变化的条目
+        self._top = 0
+        self.sort_key = None
+        self.sort_reverse = False
+        self._order = []  # set_rows 提供的原始顺序，取消排序时恢复
+        self.selected = set()  # 选中行的键，包括已滚出窗口的行
+        self._anchor = None  # Shift 点击时范围选择的起点
+
+        self.tree.configure(yscrollcommand=self._on_tree_scroll)
+        self.scrollbar.configure(command=self._on_scrollbar)
+        self.tree.bind('<Configure>', self._on_configure, add='+')
+        # 点击事件在 Treeview 类绑定 (更新窗口内的选择) 之后处理
+        post_tag = f'VirtualTreeview{id(self)}'
+        tags = list(self.tree.bindtags())
+        tags.insert(tags.index('Treeview') + 1 if 'Treeview' in tags else 1, post_tag)
+        self.tree.bindtags(tuple(tags))
+        self.tree.bind_class(post_tag, '<ButtonPress-1>', lambda e: self._on_click(e, 'replace'))
+        self.tree.bind_class(post_tag, '<Control-ButtonPress-1>', lambda e: self._on_click(e, 'toggle'))
+        self.tree.bind_class(post_tag, '<Shift-ButtonPress-1>', lambda e: self._on_click(e, 'extend'))
+        self.tree.bind('<<TreeviewSelect>>', self._on_select, add='+')
+
+    # --- 数据 ---
+
+    def set_rows(self, keys, rows):
+        """替换全部数据，保留当前滚动位置与仍然存在的选中行，只刷新内容变化的条目"""
+        self._order = list(keys)
+        self._arrange(self._order, list(rows))
+
+    def _arrange(self, keys, rows):
+        """按当前排序方式排列并显示 keys/rows"""
+        if self.sort_key is not None:
+            pairs = sorted(zip(keys, rows), key=lambda pair: self.sort_key(*pair), reverse=self.sort_reverse)
+            keys, rows = [key for key, _ in pairs], [values for _, values in pairs]
+        self.keys = list(keys)
+        self.rows = list(rows)
+        self.positions = {key: pos for pos, key in enumerate(self.keys)}
+        self.selected &= self.positions.keys()
+        self._render(min(self._top, max(0, len(self.rows) - 1)))
+
+    def update_row(self, key, values):
+        """更新单行数据；该行在窗口内时只修改对应的一个条目"""
+        pos = self.positions.get(key)
+        if pos is None:
+            return False
+        values = tuple(values)
+        self.rows[pos] = values
+        offset = pos - self.window_start
+        if 0 <= offset < len(self.items):
+            self._set_item(self.items[offset], values)
+        return True
+
+    def append_row(self, key, values):
+        """在末尾追加一行"""
+        self.positions[key] = len(self.keys)
+        self.keys.append(key)
+        self._order.append(key)
+        self.rows.append(tuple(values))
+        self._render(self._top)
+
+    def extend_rows(self, keys, rows):
+        """在末尾批量追加多行 (用于后台加载时逐块显示)"""
+        for key in keys:
+            self.positions[key] = len(self.keys)
+            self.keys.append(key)
+            self._order.append(key)
+        self.rows.extend(tuple(values) for values in rows)
+        self._render(self._top)
+
+    def remove_row(self, key):
+        """删除一行，其后各行位置前移"""
+        pos = self.positions.pop(key, None)
+        if pos is None:
+            return False
+        del self.keys[pos]
+        del self.rows[pos]
+        self._order.remove(key)
+        self.selected.discard(key)
+        for shifted_pos in range(pos, len(self.keys)):
+            self.positions[self.keys[shifted_pos]] = shifted_pos
+        self._render(min(self._top, max(0, len(self.rows) - 1)))
+        return True
+
+    def sort(self, key=None, reverse=False):
+        """按 key(键, 显示元组) 对全部行排序；之后 set_rows 提供的数据也按此排序，key 为 None 时恢复原始顺序"""
+        self.sort_key = key
+        self.sort_reverse = reverse
+        row_by_key = dict(zip(self.keys, self.rows))
+        self._arrange(self._order, [row_by_key[key] for key in self._order])
+
+    def __len__(self):
+        return len(self.rows)
+
+    # --- 选择 ---
+
+    def selected_keys(self):
+        """全部选中行的键 (课题编号)，按显示顺序排列，包括不在当前窗口内的行"""
+        if len(self.selected) < 1000:
+            return sorted(self.selected, key=self.positions.__getitem__)
+        return [key for key in self.keys if key in self.selected]
+
+    def select(self, keys):
+        """以代码方式设置选中的行"""
+        self.selected = {key for key in keys if key in self.positions}
+        self._apply_selection()
+
+    def key_for_item(self, iid):
+        if iid not in self.item_values:
+            return None
+        pos = self.window_start + self.items.index(iid)
+        return self.keys[pos] if pos < len(self.keys) else None
+
+    def _window_keys(self):
+        return self.keys[self.window_start:self.window_start + len(self.items)]
+
+    def _apply_selection(self):
+        """将按键记录的选中状态映射到当前窗口的条目上"""
+        items = [iid for iid, key in zip(self.items, self._window_keys()) if key in self.selected]
+        if set(self.tree.selection()) != set(items):
+            self.tree.selection_set(items)
+
+    def _window_selected(self):
+        return {self.key_for_item(iid) for iid in self.tree.selection()} - {None}
+
+    def _on_click(self, event, mode):
+        """点击行后更新选中的键：单击替换全部选择，Ctrl 点击切换该行，Shift 点击按全部数据选择范围"""
+        key = self.key_for_item(self.tree.identify_row(event.y))
+        if key is None:
+            return
+        if mode == 'replace':
+            self.selected = self._window_selected()
+        elif mode == 'extend' and self._anchor in self.positions:
+            first, last = sorted((self.positions[self._anchor], self.positions[key]))
+            self.selected = set(self.keys[first:last + 1])
+            self._apply_selection()
+            return
+        else:
+            self._on_select()
+        self._anchor = key
+
+    def _on_select(self, event=None):
+        """窗口内的选择改变 (键盘等) 后同步选中的键，窗口外的选中行保持不变"""
+        self.selected = (self.selected - set(self._window_keys())) | self._window_selected()
+
+    # --- 渲染 ---
+
+    def _window_size(self):
+        return min(len(self.rows), self.visible_rows + 2 * self.buffer_rows)
+
+    def _render(self, top):
+        """以 top 为首个可见行重新定位窗口，并让 Treeview 滚动到对应位置"""
+        size = self._window_size()
+        top = max(0, min(top, max(0, len(self.rows) - self.visible_rows)))
+        start = max(0, min(top - self.buffer_rows, len(self.rows) - size))
+
+        while len(self.items) > size:
+            iid = self.items.pop()
+            self.item_values.pop(iid, None)
+            self.tree.delete(iid)
+        while len(self.items) < size:
+            iid = self.tree.insert('', tk.END, values=())
+            self.items.append(iid)
+            self.item_values[iid] = ()
+
+        self.window_start = start
+        for offset, iid in enumerate(self.items):
+            self._set_item(iid, self.rows[start + offset])
+
+        self._top = top
+        if self.items:
+            self.tree.yview_moveto((top - start) / len(self.items))
+        self._apply_selection()
+        self._update_scrollbar()
+
+    def _set_item(self, iid, values):
+        if self.item_values.get(iid) != values:
+            self.tree.item(iid, values=values)
+            self.item_values[iid] = values
+
+    def _update_scrollbar(self):
+        total = len(self.rows)
+        if total == 0:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        self.scrollbar.set(self._top / total, min(1.0, (self._top + self.visible_rows) / total))
+
+    # --- 事件 ---
+
+    def _on_tree_scroll(self, first, last):
+        """Treeview 在窗口内滚动 (滚轮、键盘) 后，接近窗口边缘时平移窗口"""
+        if not self.items:
+            self._update_scrollbar()
+            return
+        local_top = int(round(float(first) * len(self.items)))
+        top = self.window_start + local_top
+        margin = self.buffer_rows // 2
+        near_start = local_top < margin and self.window_start > 0
+        near_end = (local_top + self.visible_rows > len(self.items) - margin
+                    and self.window_start + len(self.items) < len(self.rows))
+        if near_start or near_end:
+            self._render(top)
+        else:
+            self._top = top
+            self._update_scrollbar()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        """外部滚动条按全部数据定位"""
+        if action == 'moveto':
+            self._render(int(float(amount) * len(self.rows)))
+        elif action == 'scroll':
+            self.tree.yview_scroll(int(amount), unit)
+
+    def _on_configure(self, event):
+        visible_rows = max(1, event.height // self.row_height)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self._render(self._top)
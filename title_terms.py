@@ -0,0 +1,104 @@
+# title_terms.py
+import re
+import weakref
+from collections import Counter
+from functools import lru_cache
+
+# 词云中不显示的虚词与连接词
+STOP_WORDS = {'的', '与', '及', '和', '在', '对', '等', '中', '基于', '关于', '面向', '及其', '以及', '若干'}
+
+# 未安装 jieba 时，在这些虚词处断开连续的汉字后再切分双字
+_FALLBACK_SEPARATORS = re.compile('[的与及和]')
+# 连续的汉字、英文单词 (可含数字与连字符)
+_TOKEN_PATTERN = re.compile(r'[\u4e00-\u9fff]+|[A-Za-z][A-Za-z0-9\-]*')
+
+_jieba = None
+_jieba_checked = False
+
+
+def _get_jieba():
+    """jieba 为可选依赖，已安装时用于中文分词，否则返回 None"""
+    global _jieba, _jieba_checked
+    if not _jieba_checked:
+        try:
+            import jieba
+            jieba.setLogLevel(60)
+            _jieba = jieba
+        except ImportError:
+            _jieba = None
+        _jieba_checked = True
+    return _jieba
+
+
+@lru_cache(maxsize=20000)
+def tokenize_title(title):
+    """将课题名称切分为词语元组 (结果按名称缓存)
+
+    安装了 jieba 时用其分词；否则连续的汉字按相邻双字切分，英文按单词切分。单字与 STOP_WORDS 中的词被忽略。
+    """
+    jieba = _get_jieba()
+    tokens = []
+    for run in _TOKEN_PATTERN.findall(title):
+        if run[0].isascii():
+            words = [run.lower()]
+        elif jieba is not None:
+            words = jieba.lcut(run)
+        else:
+            words = []
+            for piece in _FALLBACK_SEPARATORS.split(run):
+                words.extend([piece] if len(piece) <= 2 else [piece[i:i + 2] for i in range(len(piece) - 1)])
+        tokens.extend(word for word in words if len(word) > 1 and word not in STOP_WORDS)
+    return tuple(tokens)
+
+
+def _title_text(value):
+    if value is None or value != value:  # None 或 NaN
+        return ''
+    return str(value).strip()
+
+
+class TitleTermCounter:
+    """课题名称的词频统计：记录每个课题的词语，记录变更时只增减该课题的词频"""
+
+    def __init__(self, df=None):
+        self.counts = Counter()
+        self.tokens = {}  # 课题编号 -> 词语元组
+        self._source_ref = None
+        if df is not None:
+            self.rebuild(df)
+
+    def rebuild(self, df):
+        """根据整个数据表重新统计"""
+        self.counts.clear()
+        self.tokens.clear()
+        for project_id, title in zip(df['课题编号'].astype(str), df['课题名称']):
+            tokens = tokenize_title(_title_text(title))
+            self.tokens[project_id] = tokens
+            self.counts.update(tokens)
+        self.bind(df)
+
+    def bind(self, df):
+        self._source_ref = weakref.ref(df)
+
+    def is_bound_to(self, df):
+        return self._source_ref is not None and self._source_ref() is df and len(self.tokens) == len(df)
+
+    def update(self, project_id, title):
+        """新增或更新一个课题的名称"""
+        project_id_str = str(project_id)
+        tokens = tokenize_title(_title_text(title))
+        if self.tokens.get(project_id_str) == tokens:
+            return
+        self.remove(project_id_str)
+        self.tokens[project_id_str] = tokens
+        self.counts.update(tokens)
+
+    def remove(self, project_id):
+        tokens = self.tokens.pop(str(project_id), ())
+        for token in tokens:
+            self.counts[token] -= 1
+            if self.counts[token] <= 0:
+                del self.counts[token]
+
+    def most_common(self, n=None):
+        return self.counts.most_common(n)
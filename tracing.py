@@ -0,0 +1,212 @@
+# tracing.py
+import atexit
+import json
+import os
+import threading
+import time
+from functools import wraps
+
+from config import TRACE_ENV_VAR, TRACE_FILE
+
+# 追踪默认关闭：span() 返回共享的空上下文，count() 直接返回，关闭时几乎没有额外开销
+_enabled = False
+_output = None
+_events = []  # Chrome trace 事件
+_counters = {}  # 计数器名称 -> 累计值 (全部线程)
+_local = threading.local()  # 各线程自己的计数器累计值，用于计算计时区间内的增量
+_threads = set()  # 已写入线程名称元数据的线程
+_lock = threading.Lock()
+_origin_ns = time.perf_counter_ns()
+_pid = os.getpid()
+_atexit_registered = False
+
+
+class _NullSpan:
+    """追踪关闭时使用的空计时区间"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def _timestamp(ns):
+    return (ns - _origin_ns) / 1000  # Chrome trace 以微秒为单位
+
+
+def _thread_counters():
+    counters = getattr(_local, 'counters', None)
+    if counters is None:
+        counters = _local.counters = {}
+    return counters
+
+
+def _thread_metadata(tid):
+    """线程首次出现时记录其名称 (调用方持有 _lock)"""
+    if tid not in _threads:
+        _threads.add(tid)
+        _events.append({'name': 'thread_name', 'ph': 'M', 'pid': _pid, 'tid': tid,
+                        'args': {'name': threading.current_thread().name}})
+
+
+class _Span:
+    """计时区间：退出时记录为 Chrome trace 的完整事件 ('X')，参数中附带区间内各计数器的增量
+
+    增量只统计本线程 (及通过 credit 记入本线程的线程池任务) 的计数，并发运行的其他线程不计入。
+    """
+
+    __slots__ = ('name', 'args', 'start_ns', 'counters')
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.start_ns = 0
+        self.counters = None
+
+    def __enter__(self):
+        self.counters = dict(_thread_counters())
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def set(self, **args):
+        """补充区间参数 (如处理的行数)"""
+        self.args.update(args)
+
+    def __exit__(self, exc_type, exc, tb):
+        end_ns = time.perf_counter_ns()
+        tid = threading.get_ident()
+        deltas = {name: value - self.counters.get(name, 0) for name, value in _thread_counters().items()
+                  if value != self.counters.get(name, 0)}
+        with _lock:
+            args = dict(self.args, **deltas)
+            if exc_type is not None:
+                args['error'] = exc_type.__name__
+            _thread_metadata(tid)
+            _events.append({'name': self.name, 'cat': self.name.split('.')[0], 'ph': 'X',
+                            'ts': _timestamp(self.start_ns), 'dur': (end_ns - self.start_ns) / 1000,
+                            'pid': _pid, 'tid': tid, 'args': args})
+            # 计数器在查看器中显示为随时间变化的曲线
+            for name in deltas:
+                _events.append({'name': name, 'ph': 'C', 'ts': _timestamp(end_ns), 'pid': _pid,
+                                'args': {name: _counters[name]}})
+        return False
+
+
+def is_enabled():
+    return _enabled
+
+
+def enable(path=None):
+    """开启追踪，程序退出时导出到 path (默认 TRACE_FILE)"""
+    global _enabled, _output, _atexit_registered
+    _output = path or _output or TRACE_FILE
+    _enabled = True
+    if not _atexit_registered:
+        atexit.register(_export_at_exit)
+        _atexit_registered = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def reset():
+    """清除已记录的事件与计数器"""
+    with _lock:
+        _events.clear()
+        _counters.clear()
+        _threads.clear()
+    _thread_counters().clear()
+
+
+def span(name, **args):
+    """计时区间 (上下文管理器)，名称以 '.' 分隔，第一段作为分类；用法: with span('storage.load'): ..."""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+
+def traced(name):
+    """将整个函数调用记录为名为 name 的计时区间的装饰器"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, value=1):
+    """累加计数器 (如解析的行数、stat 调用次数、写入的字节数)"""
+    if not _enabled:
+        return
+    thread_counters = _thread_counters()
+    thread_counters[name] = thread_counters.get(name, 0) + value
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def counters():
+    """各计数器当前的累计值 (全部线程)"""
+    with _lock:
+        return dict(_counters)
+
+
+def thread_counters():
+    """当前线程的计数器累计值；线程池任务前后各取一次，差值交给主调线程的 credit"""
+    return dict(_thread_counters()) if _enabled else {}
+
+
+def credit(deltas):
+    """将线程池任务的计数增量记入当前线程，使其计入当前线程中正在进行的计时区间 (全局累计值不重复累加)"""
+    if not _enabled or not deltas:
+        return
+    thread_counters = _thread_counters()
+    for name, value in deltas.items():
+        thread_counters[name] = thread_counters.get(name, 0) + value
+
+
+def export(path=None):
+    """将已记录的事件写入 Chrome trace JSON 文件 (可在 chrome://tracing 或 Perfetto 中打开)，返回文件路径"""
+    path = path or _output or TRACE_FILE
+    with _lock:
+        trace = {'traceEvents': list(_events), 'displayTimeUnit': 'ms',
+                 'otherData': {'counters': dict(_counters)}}
+    try:
+        tmp_file = path + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(trace, f, ensure_ascii=False)
+        os.replace(tmp_file, path)
+    except OSError as e:
+        print(f"警告: 导出性能追踪文件 '{path}' 失败: {e}")
+        return None
+    print(f"性能追踪已导出到 '{path}' ({len(trace['traceEvents'])} 个事件)。")
+    return path
+
+
+def _export_at_exit():
+    if _enabled and _events:
+        export()
+
+
+def enable_from_env():
+    """环境变量 TRACE_ENV_VAR 非空时开启追踪；其值为 1/true 时导出到 TRACE_FILE，否则作为导出文件路径"""
+    value = os.environ.get(TRACE_ENV_VAR, '').strip()
+    if value and value.lower() not in ('0', 'false', 'no', 'off'):
+        enable(None if value.lower() in ('1', 'true', 'yes', 'on') else value)
+
+
+enable_from_env()
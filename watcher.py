@@ -0,0 +1,266 @@
+# watcher.py
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+from config import WATCH_DEBOUNCE_SECONDS, WATCH_POLL_INTERVAL, WATCH_FOLDER_DEPTH
+
+# inotify 事件掩码 (见 <sys/inotify.h>)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_MASK_ADD = 0x20000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# 目录内条目的新增、删除、改名 (课题文件夹根目录与各课题文件夹)
+DIR_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF
+# 课题文件夹及其各级子文件夹：除条目变化外还关注文件被原地覆盖 (目录修改时间不变)
+CONTENT_MASK = DIR_MASK | IN_CLOSE_WRITE
+# 数据文件写入完成或被替换 (Excel 保存时通常写入临时文件后改名)
+FILE_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def _load_libc():
+    """加载支持 inotify 的 libc，非 Linux 或不可用时返回 None"""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class InotifySource:
+    """基于 inotify 的变化来源：监视根目录、其下各课题文件夹及 depth 层以内的子文件夹以及数据文件所在目录"""
+
+    name = 'inotify'
+
+    def __init__(self, root, files=(), libc=None, depth=WATCH_FOLDER_DEPTH):
+        self.libc = libc or _load_libc()
+        if self.libc is None:
+            raise OSError("当前平台不支持 inotify")
+        self.root = os.path.abspath(root)
+        self.depth = depth
+        self.file_names = {}  # 数据文件所在目录 -> 需要关注的文件名
+        for path in files:
+            path = os.path.abspath(path)
+            self.file_names.setdefault(os.path.dirname(path), set()).add(os.path.basename(path))
+        self.watches = {}  # wd -> 目录
+        self.limited = False  # 达到监视数量上限后不再为子文件夹添加监视
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        try:
+            self.add_watch(self.root, DIR_MASK)
+            with os.scandir(self.root) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        self._watch_project_folder(entry.path)
+            for directory in self.file_names:
+                self.add_watch(directory, FILE_MASK)
+        except OSError:
+            self.close()
+            raise
+
+    def add_watch(self, path, mask):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), mask | IN_MASK_ADD)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        self.watches[wd] = path
+        return wd
+
+    def _watch_project_folder(self, path, level=0):
+        """监视课题文件夹 (level 0) 及其下 depth 层以内的子文件夹"""
+        if self.limited or level > self.depth:
+            return
+        try:
+            self.add_watch(path, CONTENT_MASK)
+            subfolders = []
+            if level < self.depth:
+                with os.scandir(path) as entries:
+                    subfolders = [entry.path for entry in entries if entry.is_dir(follow_symlinks=False)]
+        except OSError as e:
+            if e.errno == errno.ENOSPC:
+                # 超出 max_user_watches 时其余文件夹不再监视，其内部的变化在下次启动检查时发现
+                self.limited = True
+                print(f"警告: 已达到 inotify 监视数量上限，部分课题文件夹内部的变化将在下次启动时同步: {e}")
+            else:
+                print(f"警告: 无法监视文件夹 '{path}': {e}")
+            return
+        for subfolder in subfolders:
+            self._watch_project_folder(subfolder, level + 1)
+
+    def read(self, timeout):
+        """等待最多 timeout 秒，返回发生变化的路径列表；事件队列溢出时返回根目录表示需要整体重新扫描"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        paths = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                paths.append(self.root)
+                continue
+            directory = self.watches.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self.watches[wd]
+                continue
+            if directory in self.file_names and directory != self.root:
+                if name in self.file_names[directory]:
+                    paths.append(os.path.join(directory, name))
+                continue
+            path = os.path.join(directory, name) if name else directory
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self._watch_project_folder(path, os.path.relpath(path, self.root).count(os.sep))
+            paths.append(path)
+        return paths
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingSource:
+    """轮询的变化来源：每隔 interval 秒列一次根目录 (os.scandir)，比较各课题文件夹与数据文件的修改时间"""
+
+    name = 'polling'
+
+    def __init__(self, root, files=(), interval=WATCH_POLL_INTERVAL, stop_event=None):
+        self.root = os.path.abspath(root)
+        self.files = [os.path.abspath(path) for path in files]
+        self.interval = interval
+        self.stop_event = stop_event or threading.Event()
+        self.snapshot = self._snapshot()
+        self._next_poll = time.monotonic() + interval
+
+    def _snapshot(self):
+        snapshot = {}
+        try:
+            with os.scandir(self.root) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        snapshot[entry.path] = entry.stat().st_mtime_ns
+        except OSError:
+            pass
+        for path in self.files:
+            try:
+                stat = os.stat(path)
+                snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                snapshot[path] = None
+        return snapshot
+
+    def read(self, timeout):
+        wait = min(timeout, max(0.0, self._next_poll - time.monotonic()))
+        if self.stop_event.wait(wait) or time.monotonic() < self._next_poll:
+            return []
+        self._next_poll = time.monotonic() + self.interval
+        previous, self.snapshot = self.snapshot, self._snapshot()
+        return [path for path in previous.keys() | self.snapshot.keys()
+                if previous.get(path) != self.snapshot.get(path)]
+
+    def close(self):
+        pass
+
+
+class FileSystemWatcher:
+    """在后台线程中监视课题文件夹根目录与数据文件，合并短时间内的变化后回调 on_change(路径集合)
+
+    Linux 上使用 inotify，不可用时 (其他平台、超出监视数量限制等) 退回定时轮询。
+    变化来源 (为各课题文件夹添加监视或首次列目录) 在监视线程中建立，start() 立即返回。
+    最后一次变化后空闲 debounce 秒才回调一次；回调在监视线程中执行。
+    """
+
+    def __init__(self, root, files=(), on_change=None, debounce=WATCH_DEBOUNCE_SECONDS,
+                 poll_interval=WATCH_POLL_INTERVAL, use_inotify=True):
+        self.root = root
+        self.files = list(files)
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.source = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def backend(self):
+        return self.source.name if self.source else None
+
+    def start(self):
+        self.source = None
+        self._thread = threading.Thread(target=self._run, name='file-watcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def _create_source(self):
+        if self.use_inotify:
+            try:
+                return InotifySource(self.root, self.files)
+            except OSError as e:
+                if sys.platform.startswith('linux'):
+                    print(f"信息: 无法使用 inotify 监视文件变化，改为每 {self.poll_interval} 秒轮询: {e}")
+        return PollingSource(self.root, self.files, self.poll_interval, self._stop)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self):
+        self.source = self._create_source()
+        pending = set()
+        last_event = 0.0
+        try:
+            while not self._stop.is_set():
+                timeout = self.debounce if pending else 0.5
+                paths = self.source.read(timeout)
+                now = time.monotonic()
+                if paths:
+                    pending.update(paths)
+                    last_event = now
+                elif pending and now - last_event >= self.debounce:
+                    batch, pending = pending, set()
+                    if self.on_change:
+                        try:
+                            self.on_change(batch)
+                        except Exception as e:
+                            print(f"处理文件变化时发生错误: {e}")
+        finally:
+            self.source.close()